@@ -0,0 +1,257 @@
+#
+# -------------------------------------------------------------------------
+#   Copyright (c) 2019 AT&T Intellectual Property
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# -------------------------------------------------------------------------
+#
+import operator
+import random
+import unittest
+
+from valet.engine.resource_manager.resources.numa import NUMA
+from valet.engine.search import capacity_index
+from valet.engine.search.capacity_index import CapacityIndex
+from valet.engine.search.filters.capacity_filter import CapacityFilter
+from valet.engine.search.filters.cpu_filter import CPUFilter
+from valet.engine.search.filters.disk_filter import DiskFilter
+from valet.engine.search.filters.mem_filter import MemFilter
+from valet.engine.search.filters.numa_filter import NUMAFilter
+from valet.engine.search.resource import GroupResource
+from valet.engine.search.resource import HostResource
+
+
+# Datacenter totals of (cpu, mem, disk) and weights to score hosts
+TOTALS = (1000.0, 4000000.0, 80000.0)
+WEIGHTS = (0.5, 0.3, 0.2)
+
+
+class StubServer(object):
+    """Server demand as seen by filters."""
+
+    def __init__(self, _vcpus, _mem, _disk):
+        self.vCPUs = _vcpus
+        self.mem = _mem
+        self.local_volume_size = _disk
+
+
+def get_numa_spec(_cpus, _mem):
+    """Get NUMA of host type with the capacity split into 2 cells."""
+
+    return {"cell_0": {"cpus": _cpus // 2, "mem": _mem // 2, "server_list": []},
+            "cell_1": {"cpus": _cpus - _cpus // 2, "mem": _mem - _mem // 2, "server_list": []}}
+
+
+def set_sort_base(_candidate_list):
+    """Score hosts as Search._set_compute_sort_base does at host level."""
+
+    (cpu_weight, mem_weight, disk_weight) = WEIGHTS
+    (cpu_total, mem_total, disk_total) = TOTALS
+
+    for c in _candidate_list:
+        c.sort_base = (1.0 - cpu_weight) * (float(c.host_avail_vCPUs) / cpu_total) + \
+                      (1.0 - mem_weight) * (float(c.host_avail_mem) / mem_total) + \
+                      (1.0 - disk_weight) * (float(c.host_avail_local_disk) / disk_total)
+
+
+@unittest.skipUnless(capacity_index.is_supported(), "numpy is not installed")
+class TestCapacityIndex(unittest.TestCase):
+
+    def setUp(self):
+        super(TestCapacityIndex, self).setUp()
+
+        self.random = random.Random(11)
+
+        self.avail_hosts = {}
+        for rack in range(4):
+            rack_hosts = []
+
+            for i in range(6):
+                hr = HostResource()
+                hr.host_name = "r%dh%d" % (rack, i)
+                hr.rack_name = "r%d" % rack
+                self._set_random_capacity(hr)
+
+                rack_hosts.append(hr)
+                self.avail_hosts[hr.host_name] = hr
+
+            for hr in rack_hosts:
+                hr.rack_hosts = rack_hosts
+            self._set_rack_capacity(rack_hosts[0])
+
+        self.index = CapacityIndex(self.avail_hosts)
+        self.index.set_score_weights(WEIGHTS, TOTALS)
+
+    def _set_random_capacity(self, _hr):
+        r = self.random
+
+        _hr.host_avail_vCPUs = r.randint(0, 32)
+        _hr.host_avail_mem = r.randint(0, 128) * 1024
+        _hr.host_avail_local_disk = r.randint(0, 20) * 100
+
+        _hr.NUMA = NUMA(numa=get_numa_spec(_hr.host_avail_vCPUs, _hr.host_avail_mem))
+
+    def _set_rack_capacity(self, _hr):
+        """Set rack capacity of all hosts in the rack as their sums."""
+
+        cpus = sum(hr.host_avail_vCPUs for hr in _hr.rack_hosts)
+        mem = sum(hr.host_avail_mem for hr in _hr.rack_hosts)
+        disk = sum(hr.host_avail_local_disk for hr in _hr.rack_hosts)
+
+        for hr in _hr.rack_hosts:
+            hr.rack_avail_vCPUs = cpus
+            hr.rack_avail_mem = mem
+            hr.rack_avail_local_disk = disk
+
+    def _get_candidates(self):
+        candidate_list = list(self.avail_hosts.values())
+        self.random.shuffle(candidate_list)
+
+        return candidate_list[:self.random.randint(1, len(candidate_list))]
+
+    def _get_server(self, _level="host"):
+        r = self.random
+
+        if _level == "rack":
+            # Around the sums of 6 hosts
+            return StubServer(r.randint(1, 120), r.randint(1, 500) * 1024, r.randint(0, 70) * 100)
+
+        return StubServer(r.randint(1, 16), r.randint(1, 64) * 1024, r.randint(0, 10) * 100)
+
+    def _assert_same(self):
+        """Check the index answers as scanning candidates does."""
+
+        for _ in range(30):
+            candidate_list = self._get_candidates()
+
+            for level in ("host", "rack"):
+                v = self._get_server(level)
+
+                for filter_type in (CPUFilter, MemFilter, DiskFilter):
+                    self.assertEqual(filter_type().filter_candidates(level, v, candidate_list),
+                                     filter_type(self.index).filter_candidates(level, v, candidate_list))
+
+                # All at once, as the filters applied one after another
+                expected = candidate_list
+                for filter_type in (CPUFilter, MemFilter, DiskFilter):
+                    expected = filter_type().filter_candidates(level, v, expected)
+
+                self.assertEqual(expected, CapacityFilter(self.index).filter_candidates(level, v, candidate_list))
+                self.assertEqual(expected, CapacityFilter().filter_candidates(level, v, candidate_list))
+
+            v = self._get_server()
+            self.assertEqual(NUMAFilter().filter_candidates("host", v, candidate_list),
+                             NUMAFilter(self.index).filter_candidates("host", v, candidate_list))
+
+            set_sort_base(candidate_list)
+            self.assertIs(min(candidate_list, key=operator.attrgetter("sort_base")),
+                          self.index.get_best_fit(candidate_list))
+
+    def _deduct(self, _hr, _v):
+        """Place server in host as Search._deduct_server_resources does."""
+
+        _hr.host_avail_vCPUs -= _v.vCPUs
+        _hr.host_avail_mem -= _v.mem
+        _hr.host_avail_local_disk -= _v.local_volume_size
+
+        for hr in _hr.rack_hosts:
+            hr.rack_avail_vCPUs -= _v.vCPUs
+            hr.rack_avail_mem -= _v.mem
+            hr.rack_avail_local_disk -= _v.local_volume_size
+
+        self.index.refresh(_hr.host_name)
+
+    def test_same_as_filters(self):
+        self._assert_same()
+
+    def test_same_with_tied_scores(self):
+        for hr in self.avail_hosts.values():
+            hr.host_avail_vCPUs = 8
+            hr.host_avail_mem = 8192
+            hr.host_avail_local_disk = 100
+            self.index.refresh(hr.host_name)
+
+        self._assert_same()
+
+    def test_same_after_deduct_and_undo(self):
+        for _ in range(10):
+            hr = self.random.choice(list(self.avail_hosts.values()))
+            v = self._get_server()
+
+            self._deduct(hr, v)
+            self._assert_same()
+
+            self._deduct(hr, StubServer(-v.vCPUs, -v.mem, -v.local_volume_size))
+            self._assert_same()
+
+    def test_same_after_dynamic_aggregate(self):
+        ha = GroupResource()
+        ha.name = "ha1"
+
+        candidate = self.avail_hosts["r1h2"]
+
+        mockup = {"avail_vCPUs": candidate.host_avail_vCPUs,
+                  "avail_mem": candidate.host_avail_mem,
+                  "avail_local_disk": candidate.host_avail_local_disk,
+                  "NUMA": get_numa_spec(candidate.host_avail_vCPUs, candidate.host_avail_mem)}
+        host_type = {"default": True,
+                     "avail_vCPUs": 48, "avail_mem": 256 * 1024, "avail_local_disk": 4000,
+                     "NUMA": get_numa_spec(48, 256 * 1024)}
+        candidate.candidate_host_types = {"mockup": [mockup], ha.name: [host_type]}
+
+        # As DynamicAggregateFilter adjusts the candidate and its rack
+        candidate.adjust_avail_resources(ha)
+        for hr in candidate.rack_hosts:
+            if hr is not candidate:
+                hr.adjust_avail_rack_resources(ha,
+                                               candidate.rack_avail_vCPUs,
+                                               candidate.rack_avail_mem,
+                                               candidate.rack_avail_local_disk)
+        candidate.old_candidate_host_types = candidate.candidate_host_types
+        candidate.candidate_host_types = {}
+        self.index.refresh(candidate.host_name)
+
+        self.assertEqual(48, candidate.host_avail_vCPUs)
+        self._assert_same()
+
+        # And rolls back
+        candidate.rollback_avail_resources(ha)
+        candidate.candidate_host_types = candidate.old_candidate_host_types
+        candidate.old_candidate_host_types = {}
+        for hr in candidate.rack_hosts:
+            if hr is not candidate:
+                hr.rollback_avail_rack_resources(ha,
+                                                 candidate.rack_avail_vCPUs,
+                                                 candidate.rack_avail_mem,
+                                                 candidate.rack_avail_local_disk)
+        self.index.refresh(candidate.host_name)
+
+        self.assertEqual(mockup["avail_vCPUs"], candidate.host_avail_vCPUs)
+        self._assert_same()
+
+    def test_not_indexed_candidates(self):
+        hr = HostResource()
+        hr.host_name = "unknown"
+        hr.rack_name = "any"
+
+        candidate_list = [self.avail_hosts["r0h0"], hr]
+
+        self.assertIsNone(self.index.filter_capacity("host", "vcpus", 1, candidate_list))
+        self.assertIsNone(self.index.filter_capacities("host", (("vcpus", 1),), candidate_list))
+        self.assertIsNone(self.index.get_best_fit(candidate_list))
+        self.assertIsNone(self.index.filter_capacity("cluster", "vcpus", 1, candidate_list[:1]))
+
+
+if __name__ == "__main__":
+    unittest.main()
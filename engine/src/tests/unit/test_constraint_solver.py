@@ -0,0 +1,320 @@
+#
+# -------------------------------------------------------------------------
+#   Copyright (c) 2019 AT&T Intellectual Property
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# -------------------------------------------------------------------------
+#
+import random
+import unittest
+
+from valet.engine.app_manager.group import Group
+from valet.engine.app_manager.server import Server
+from valet.engine.resource_manager.resources.numa import NUMA
+from valet.engine.search.constraint_solver import ConstraintSolver
+from valet.engine.search.constraint_solver import FilterStats
+from valet.engine.search.resource import GroupIndex
+from valet.engine.search.resource import GroupResource
+from valet.engine.search.resource import HostResource
+
+
+# Names of filters ranked by stats
+FILTER_NAMES = ("availability-zone", "aggregate-instance-extra-specs", "capacity",
+                "numa", "diversity", "exclusivity", "no-exclusivity", "affinity")
+
+EXTRA_SPECS = ({"aggregate_instance_extra_specs:disk": "ssd"},
+               {"aggregate_instance_extra_specs:disk": "<or> ssd <or> hdd"},
+               {"hw:numa_nodes": "1"})
+
+
+class StubLogger(object):
+    """Logger dropping all messages."""
+
+    def _log(self, *_args, **_kwargs):
+        pass
+
+    debug = _log
+    info = _log
+    warning = _log
+    error = _log
+
+
+class StubAvailResources(object):
+    """Candidates of a level as given to the solver by search."""
+
+    def __init__(self, _level, _candidates):
+        self.level = _level
+
+        # key = resource name, value = HostResource
+        self.candidates = _candidates
+
+
+def get_group_resource(_name, _group_type, _level="host", _metadata=None):
+    gr = GroupResource()
+    gr.name = _name
+    gr.group_type = _group_type
+    gr.level = _level
+    if _metadata is not None:
+        gr.metadata = _metadata
+        gr.factory = "nova"
+    else:
+        gr.factory = "valet"
+
+    return gr
+
+
+def get_group(_vid, _group_type, _level="host"):
+    group = Group(_vid)
+    group.group_type = _group_type
+    group.level = _level
+
+    return group
+
+
+class TestConstraintSolver(unittest.TestCase):
+
+    def setUp(self):
+        super(TestConstraintSolver, self).setUp()
+
+        self.random = random.Random(5)
+        self.logger = StubLogger()
+
+        index = GroupIndex()
+
+        self.avail_groups = {}
+        for gr in (get_group_resource("nova:az1", "az"),
+                   get_group_resource("nova:az2", "az"),
+                   get_group_resource("ag_ssd", "aggr", _metadata={"disk": "ssd"}),
+                   get_group_resource("ag_hdd", "aggr", _metadata={"disk": "hdd"}),
+                   get_group_resource("div1", "diversity"),
+                   get_group_resource("qdiv1", "quorum-diversity"),
+                   get_group_resource("ex1", "exclusivity"),
+                   get_group_resource("aff1", "affinity", _level="rack")):
+            self.avail_groups[gr.name] = gr
+
+        self.avail_groups["qdiv1"].original_num_of_placed_servers = 2
+
+        self.avail_hosts = {}
+        for rack in range(4):
+            rack_hosts = []
+
+            for i in range(8):
+                hr = HostResource(index)
+                hr.host_name = "r%dh%d" % (rack, i)
+                hr.rack_name = "r%d" % rack
+                self._set_random_host(hr)
+
+                rack_hosts.append(hr)
+                self.avail_hosts[hr.host_name] = hr
+
+            for hr in rack_hosts:
+                hr.rack_hosts = rack_hosts
+                hr.rack_avail_vCPUs = sum(h.host_avail_vCPUs for h in rack_hosts)
+                hr.rack_avail_mem = sum(h.host_avail_mem for h in rack_hosts)
+                hr.rack_avail_local_disk = sum(h.host_avail_local_disk for h in rack_hosts)
+                hr.rack_num_of_placed_servers = sum(h.host_num_of_placed_servers for h in rack_hosts)
+
+            if self.random.random() < 0.5:
+                for hr in rack_hosts:
+                    hr.rack_memberships["aff1"] = self.avail_groups["aff1"]
+
+    def _set_random_host(self, _hr):
+        r = self.random
+
+        _hr.host_avail_vCPUs = r.randint(0, 32)
+        _hr.host_avail_mem = r.randint(0, 64) * 1024
+        _hr.host_avail_local_disk = r.randint(0, 10) * 100
+
+        _hr.NUMA = NUMA(numa={"cell_0": {"cpus": _hr.host_avail_vCPUs // 2,
+                                         "mem": _hr.host_avail_mem // 2,
+                                         "server_list": []},
+                              "cell_1": {"cpus": _hr.host_avail_vCPUs - _hr.host_avail_vCPUs // 2,
+                                         "mem": _hr.host_avail_mem - _hr.host_avail_mem // 2,
+                                         "server_list": []}})
+
+        _hr.host_num_of_placed_servers = r.choice([0, 0, 1, 2])
+
+        for gk, p in (("nova:az1", 0.7), ("nova:az2", 0.3),
+                      ("ag_ssd", 0.5), ("ag_hdd", 0.5),
+                      ("div1", 0.2), ("qdiv1", 0.3), ("ex1", 0.2)):
+            if r.random() < p:
+                _hr.host_memberships[gk] = self.avail_groups[gk]
+
+                if gk == "qdiv1":
+                    gr = self.avail_groups[gk]
+                    gr.num_of_placed_servers_of_host[_hr.host_name] = r.randint(0, 2)
+
+                # Memberships of the rack include ones of its hosts.
+                _hr.rack_memberships[gk] = self.avail_groups[gk]
+
+    def _set_random_groups(self, _n):
+        r = self.random
+
+        if r.random() < 0.3:
+            _n.diversity_groups["div1"] = get_group("div1", "diversity")
+
+        if r.random() < 0.3:
+            qdiv = get_group("qdiv1", "quorum-diversity")
+            qdiv.server_list = ["s1", "s2", "s3"]
+            _n.quorum_diversity_groups["qdiv1"] = qdiv
+
+        if r.random() < 0.3:
+            _n.exclusivity_groups["ex1"] = get_group("ex1", "exclusivity")
+
+            # Multiple exclusivities are reported by pre-condition.
+            if r.random() < 0.2:
+                _n.exclusivity_groups["ex2"] = get_group("ex2", "exclusivity")
+
+    def _get_server(self, _i):
+        r = self.random
+
+        s = Server("s" + str(_i), "none")
+        s.vCPUs = r.randint(1, 16)
+        s.mem = r.randint(1, 32) * 1024
+        s.local_volume_size = r.randint(0, 5) * 100
+
+        s.availability_zone = r.choice([None, None, "az1", "az2"])
+        if r.random() < 0.5:
+            s.extra_specs_list.append(dict(r.choice(EXTRA_SPECS)))
+
+        self._set_random_groups(s)
+
+        return s
+
+    def _get_affinity_group(self, _i):
+        r = self.random
+
+        g = get_group("aff" + str(r.randint(1, 2)), "affinity", _level="rack")
+        g.vCPUs = r.randint(1, 64)
+        g.mem = r.randint(1, 128) * 1024
+        g.local_volume_size = r.randint(0, 20) * 100
+
+        if r.random() < 0.5:
+            g.availability_zone_list.append("az1")
+        if r.random() < 0.5:
+            g.extra_specs_list.append(dict(EXTRA_SPECS[0]))
+
+        self._set_random_groups(g)
+
+        return g
+
+    def _get_random_stats(self):
+        """Get stats forcing a random order of filters in stages."""
+
+        r = self.random
+
+        stats = FilterStats()
+        for name in FILTER_NAMES:
+            kind = r.random()
+            if kind < 0.2:
+                # Unknown, ranked 0
+                continue
+            elif kind < 0.4:
+                # Removes nothing, ranked last
+                stats.stats[name] = [10, 100, 100, r.random()]
+            else:
+                stats.stats[name] = [10, 100, r.randint(0, 99), r.random()]
+
+        return stats
+
+    def _get_candidates(self, _level):
+        candidates = {}
+
+        if _level == "host":
+            host_names = sorted(self.avail_hosts.keys())
+            if self.random.random() < 0.5:
+                # A few, so that any filter may remove all
+                host_names = self.random.sample(host_names, self.random.randint(1, 4))
+
+            for hk in host_names:
+                candidates[hk] = self.avail_hosts[hk]
+        else:
+            for _, hr in self.avail_hosts.items():
+                if hr.rack_name not in candidates.keys():
+                    candidates[hr.rack_name] = hr
+
+        if self.random.random() < 0.2:
+            # Resource of which name is 'any'
+            ghost = HostResource(GroupIndex())
+            ghost.host_name = "any"
+            ghost.rack_name = "any"
+            ghost.NUMA = NUMA()
+            candidates["any"] = ghost
+
+        return candidates
+
+    def _assert_same(self, _n, _level, _solver):
+        candidates = self._get_candidates(_level)
+
+        expected_solver = ConstraintSolver(self.logger)
+        ghost = candidates.get("any")
+        expected = expected_solver._get_candidate_list_in_order(_n, _level, list(candidates.values()), ghost,
+                                                                self.avail_hosts, self.avail_groups)
+
+        _solver.status = "ok"
+        candidate_list = _solver.get_candidate_list(_n, StubAvailResources(_level, candidates),
+                                                    self.avail_hosts, self.avail_groups)
+
+        self.assertEqual([c.host_name for c in expected], [c.host_name for c in candidate_list])
+        self.assertEqual(expected_solver.status, _solver.status)
+
+        return len(expected) > 0
+
+    def test_same_as_filters_in_order(self):
+        passed = 0
+        failed = 0
+
+        for i in range(200):
+            solver = ConstraintSolver(self.logger, _stats=self._get_random_stats())
+
+            if self._assert_same(self._get_server(i), "host", solver):
+                passed += 1
+            else:
+                failed += 1
+
+        # Both cases are covered.
+        self.assertGreater(passed, 0)
+        self.assertGreater(failed, 0)
+
+    def test_same_for_groups_in_order(self):
+        for i in range(100):
+            solver = ConstraintSolver(self.logger, _stats=self._get_random_stats())
+
+            self._assert_same(self._get_affinity_group(i), "rack", solver)
+
+    def test_same_with_static_results_reused(self):
+        # Results of static filters are reused across servers of the same shape.
+        solver = ConstraintSolver(self.logger, _stats=self._get_random_stats())
+
+        for i in range(200):
+            self._assert_same(self._get_server(i), "host", solver)
+
+            if i % 50 == 0:
+                solver.stats = self._get_random_stats()
+
+    def test_rank_of_stats(self):
+        stats = FilterStats()
+
+        self.assertEqual(0.0, stats.get_rank("cpu"))
+
+        stats.add("cpu", 10, 10, 0.1)
+        self.assertEqual(float("inf"), stats.get_rank("cpu"))
+
+        stats.add("mem", 10, 5, 0.1)
+        stats.add("disk", 10, 0, 0.1)
+        self.assertLess(stats.get_rank("disk"), stats.get_rank("mem"))
+
+
+if __name__ == "__main__":
+    unittest.main()
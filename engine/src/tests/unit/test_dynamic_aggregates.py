@@ -0,0 +1,130 @@
+#
+# -------------------------------------------------------------------------
+#   Copyright (c) 2019 AT&T Intellectual Property
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# -------------------------------------------------------------------------
+#
+import unittest
+
+from valet.engine.resource_manager.resource import Resource
+from valet.engine.resource_manager.resources.group import Group
+from valet.engine.resource_manager.resources.host import Host
+
+
+class StubSource(object):
+    """Platform client always valid."""
+
+    def valid_client(self, _datacenter_url):
+        return True
+
+    def set_client(self, _datacenter_url):
+        pass
+
+
+class StubMetadata(object):
+    """Metadata manager applying Host-Aggregates with no platform."""
+
+    def __init__(self):
+        self.source = StubSource()
+        self.calls = []
+
+    def create_exclusive_aggregate(self, _group, _hosts):
+        _group.uuid = 100
+        self.calls.append(("create", _group.name, sorted(h.name for h in _hosts)))
+        return "ok"
+
+    def update_exclusive_aggregate(self, _id, _metadata, _host, _old_aggregates):
+        self.calls.append(("update", _id, _host))
+        return "ok"
+
+    def remove_host_from_exclusive_aggregate(self, _id, _metadata, _host, _old_aggregates):
+        self.calls.append(("remove_host", _id, _host))
+        return "ok"
+
+    def remove_exclusive_aggregate(self, _id):
+        self.calls.append(("remove", _id))
+        return "ok"
+
+
+class StubLogger(object):
+    """Logger dropping all messages."""
+
+    def _log(self, *_args, **_kwargs):
+        pass
+
+    debug = _log
+    info = _log
+    warning = _log
+    error = _log
+
+
+class TestDynamicHostAggregates(unittest.TestCase):
+
+    def setUp(self):
+        super(TestDynamicHostAggregates, self).setUp()
+
+        self.metadata = StubMetadata()
+        self.resource = Resource({"id": "dc1"}, None, None, self.metadata, None, StubLogger())
+
+        for hk in ("h1", "h2", "h3"):
+            self.resource.hosts[hk] = Host(hk)
+
+        self.ex_group = Group("ex1")
+        self.ex_group.group_type = "exclusivity"
+        self.ex_group.factory = "valet"
+        self.resource.groups[self.ex_group.name] = self.ex_group
+
+        for hk in ("h1", "h2"):
+            self.ex_group.member_hosts[hk] = []
+            self.resource.hosts[hk].memberships[self.ex_group.name] = self.ex_group
+
+    def test_create_and_update(self):
+        self.resource._manage_dynamic_host_aggregates()
+
+        dha = self.resource.groups["valet:ex1"]
+        self.assertEqual(["h1", "h2"], sorted(dha.member_hosts.keys()))
+        self.assertEqual([("create", "valet:ex1", ["h1", "h2"])], self.metadata.calls)
+
+        self.ex_group.member_hosts["h3"] = []
+        self.resource._manage_dynamic_host_aggregates()
+
+        self.assertEqual(["h1", "h2", "h3"], sorted(dha.member_hosts.keys()))
+        self.assertEqual(("update", 100, "h3"), self.metadata.calls[-1])
+
+    def test_remove_host(self):
+        self.resource._manage_dynamic_host_aggregates()
+
+        del self.ex_group.member_hosts["h1"]
+        self.resource._manage_dynamic_host_aggregates()
+
+        dha = self.resource.groups["valet:ex1"]
+        self.assertEqual(["h2"], list(dha.member_hosts.keys()))
+        self.assertNotIn(dha.name, self.resource.hosts["h1"].memberships)
+        self.assertEqual(("remove_host", 100, "h1"), self.metadata.calls[-1])
+
+    def test_remove(self):
+        self.resource._manage_dynamic_host_aggregates()
+
+        self.ex_group.status = "disabled"
+        self.resource._manage_dynamic_host_aggregates()
+
+        self.assertNotIn("valet:ex1", self.resource.groups)
+        for hk in ("h1", "h2"):
+            self.assertNotIn("valet:ex1", self.resource.hosts[hk].memberships)
+        self.assertEqual(("remove", 100), self.metadata.calls[-1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,145 @@
+#
+# -------------------------------------------------------------------------
+#   Copyright (c) 2019 AT&T Intellectual Property
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# -------------------------------------------------------------------------
+#
+import threading
+import time
+import unittest
+
+from valet.engine.db_connect.db_apis.mem_db import MemDB
+from valet.engine.db_connect.db_handler import DBHandler
+from valet.engine.db_connect.intake import RequestIntake
+
+
+DB_CONFIG = {"mode": "mem_db",
+             "keyspace": "valet",
+             "requests_table": "requests",
+             "results_table": "results"}
+
+
+class StubLogger(object):
+    """Logger dropping all messages."""
+
+    def _log(self, *_args, **_kwargs):
+        pass
+
+    debug = _log
+    info = _log
+    warning = _log
+    error = _log
+
+
+class TestRequestIntake(unittest.TestCase):
+
+    def setUp(self):
+        super(TestRequestIntake, self).setUp()
+
+        self.logger = StubLogger()
+        self.db = MemDB(DB_CONFIG, self.logger)
+        self.dbh = DBHandler(self.db, DB_CONFIG, self.logger)
+
+    def _get_intake(self, _mode, _min_interval, _max_interval):
+        intake = RequestIntake(self.dbh, {"mode": _mode,
+                                          "min_interval": _min_interval,
+                                          "max_interval": _max_interval},
+                               self.logger)
+
+        # As set by bootstrapper
+        if intake.mode == "event":
+            self.db.listener = intake.notify
+
+        return intake
+
+    def _insert_request(self, _request_id):
+        self.db.insert_atom(DB_CONFIG["keyspace"], DB_CONFIG["requests_table"],
+                            {"request_id": _request_id, "timestamp": 0,
+                             "request": "{}"})
+
+    def test_interval_backs_off_while_idle(self):
+        intake = self._get_intake("poll", 0.01, 0.04)
+
+        intervals = []
+        for busy in (False, False, False, True, False):
+            intake.get_requests()
+            intake.wait(busy)
+            intervals.append(intake.interval)
+
+        self.assertEqual([0.02, 0.04, 0.04, 0.01, 0.02], intervals)
+
+    def test_max_interval_not_below_min(self):
+        intake = self._get_intake("poll", 2, 1)
+
+        self.assertEqual(2, intake.max_interval)
+
+    def test_poll_does_not_wake_on_insert(self):
+        intake = self._get_intake("poll", 0.05, 0.05)
+
+        intake.get_requests()
+        self._insert_request("r1")
+
+        begin = time.time()
+        intake.wait(False)
+
+        self.assertGreaterEqual(time.time() - begin, 0.04)
+        self.assertEqual(1, len(intake.get_requests()))
+
+    def test_event_wakes_wait_on_insert(self):
+        intake = self._get_intake("event", 0.01, 10)
+        intake.interval = 10
+
+        self.assertEqual([], intake.get_requests())
+
+        timer = threading.Timer(0.05, self._insert_request, ["r1"])
+        timer.start()
+
+        begin = time.time()
+        intake.wait(False)
+        timer.join()
+
+        self.assertLess(time.time() - begin, 5)
+        self.assertEqual(0.01, intake.interval)
+        self.assertEqual("r1", intake.get_requests()[0]["request_id"])
+
+    def test_event_before_wait_is_kept(self):
+        intake = self._get_intake("event", 10, 10)
+
+        intake.get_requests()
+
+        # Inserted while the requests read are handled
+        self._insert_request("r1")
+
+        begin = time.time()
+        intake.wait(True)
+
+        self.assertLess(time.time() - begin, 5)
+        self.assertEqual(1, len(intake.get_requests()))
+
+    def test_event_before_read_is_covered(self):
+        intake = self._get_intake("event", 0.05, 0.05)
+
+        self._insert_request("r1")
+
+        self.assertEqual(1, len(intake.get_requests()))
+
+        begin = time.time()
+        intake.wait(True)
+
+        self.assertGreaterEqual(time.time() - begin, 0.04)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,149 @@
+#
+# -------------------------------------------------------------------------
+#   Copyright (c) 2019 AT&T Intellectual Property
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# -------------------------------------------------------------------------
+#
+import json
+import socket
+import threading
+import unittest
+
+import requests
+
+from six.moves import BaseHTTPServer
+
+from valet.engine.db_connect.db_apis.music import Music
+from valet.engine.db_connect.db_apis.music import REST
+
+
+class StubMusicHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    """Answer every request with the status set on the server."""
+
+    def _reply(self):
+        length = int(self.headers.get("content-length", 0))
+        if length > 0:
+            self.rfile.read(length)
+
+        body = json.dumps({"status": "SUCCESS"}).encode()
+
+        self.send_response(self.server.status)
+        self.send_header("content-type", "application/json")
+        self.send_header("content-length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = _reply
+    do_POST = _reply
+    do_PUT = _reply
+    do_DELETE = _reply
+
+    def log_message(self, *_args):
+        pass
+
+
+class StubLogger(object):
+    """Logger dropping all messages."""
+
+    def _log(self, *_args, **_kwargs):
+        pass
+
+    debug = _log
+    info = _log
+    warning = _log
+    error = _log
+
+
+def get_refused_port():
+    """Get a local port nothing listens to."""
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+
+    return port
+
+
+class TestREST(unittest.TestCase):
+
+    def setUp(self):
+        super(TestREST, self).setUp()
+
+        self.server = BaseHTTPServer.HTTPServer(("127.0.0.1", 0), StubMusicHandler)
+        self.server.status = 200
+        self.port = self.server.server_address[1]
+
+        thread = threading.Thread(target=self.server.serve_forever)
+        thread.daemon = True
+        thread.start()
+
+        self.logger = StubLogger()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+        super(TestREST, self).tearDown()
+
+    def _get_rest(self, _urls):
+        rest = REST(["127.0.0.1"], self.port, "/MUSIC/rest/v2", 1, 1,
+                    "user", "pw", "ns", self.logger)
+        rest.urls = _urls
+        return rest
+
+    def _get_url(self, _port):
+        return "http://127.0.0.1:%s/MUSIC/rest/v2" % _port
+
+    def test_request_succeeds(self):
+        rest = self._get_rest([self._get_url(self.port)])
+
+        response = rest.request(method="get", path="/version")
+
+        self.assertEqual(200, response.status_code)
+
+    def test_request_raises_when_all_refuse(self):
+        rest = self._get_rest([self._get_url(get_refused_port()),
+                               self._get_url(get_refused_port())])
+
+        self.assertRaises(requests.exceptions.ConnectionError,
+                          rest.request, method="put", path="/keyspaces/k/tables/t/rows",
+                          data={"values": {}})
+
+    def test_request_fails_over_and_skips_refused_server(self):
+        refused_url = self._get_url(get_refused_port())
+        rest = self._get_rest([refused_url, self._get_url(self.port)])
+
+        response = rest.request(method="get", path="/version")
+
+        self.assertEqual(200, response.status_code)
+        self.assertIn(refused_url, rest.down_until)
+        self.assertEqual(refused_url, rest._REST__urls()[-1])
+
+    def test_request_raises_http_error(self):
+        self.server.status = 500
+        rest = self._get_rest([self._get_url(self.port)])
+
+        self.assertRaises(requests.exceptions.HTTPError,
+                          rest.request, method="get", path="/version")
+
+    def test_insert_atom_raises_when_all_refuse(self):
+        music = Music.__new__(Music)
+        music.logger = self.logger
+        music.rest = self._get_rest([self._get_url(get_refused_port())])
+
+        self.assertRaises(requests.exceptions.ConnectionError,
+                          music.insert_atom, "k", "regions", {"region_id": "r1"},
+                          name="region_id", value="r1")
@@ -0,0 +1,208 @@
+#
+# -------------------------------------------------------------------------
+#   Copyright (c) 2019 AT&T Intellectual Property
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# -------------------------------------------------------------------------
+#
+import unittest
+
+from valet.engine.resource_manager.nova_compute import NovaCompute
+
+
+class Record(object):
+    """Object returned by novaclient, i.e., attributes in __dict__."""
+
+    def __init__(self, **_attrs):
+        self.__dict__.update(_attrs)
+
+    def __getattr__(self, _name):
+        try:
+            return self.__dict__[_name]
+        except KeyError:
+            raise AttributeError(_name)
+
+
+class StubNova(object):
+    """Nova of 2 hosts, one server in each, answering from memory.
+
+    Calls named in failures raise that many times before answering.
+    """
+
+    def __init__(self, _failures=None):
+        self.failures = dict(_failures or {})
+        self.calls = {}
+
+        self.flavors = Record(list=self._wrap("flavors", self._list_flavors))
+        self.hosts = Record(list=self._wrap("hosts", self._list_hosts))
+        self.hypervisors = Record(list=self._wrap("hypervisors", self._list_hypervisors))
+        self.servers = Record(list=self._wrap("servers", self._list_servers))
+        self.availability_zones = Record(list=self._wrap("availability-zones", self._list_azs))
+        self.aggregates = Record(list=self._wrap("host-aggregates", self._list_aggregates))
+        self.server_groups = Record(list=self._wrap("server-groups", self._list_server_groups))
+
+        self.server_list = []
+        for i, hk in enumerate(("h1", "h2")):
+            s = Record(id="u%d" % i, name="vm%d" % i, metadata={"stack-id": "st1"},
+                       flavor={"id": "f1"}, image={"id": "img"}, tenant_id="t1")
+            setattr(s, "OS-EXT-SRV-ATTR:host", hk)
+            self.server_list.append(s)
+
+    def _wrap(self, _name, _call):
+        def call(*_args, **_kwargs):
+            self.calls[_name] = self.calls.get(_name, 0) + 1
+
+            if self.failures.get(_name, 0) > 0:
+                self.failures[_name] -= 1
+                raise Exception("nova is not available")
+
+            return _call(*_args, **_kwargs)
+        return call
+
+    def _list_flavors(self, detailed=False, is_public=True):
+        if is_public:
+            return [Record(id="f1", name="small")]
+        return [Record(id="f2", name="private")]
+
+    def _list_hosts(self):
+        return [Record(host_name="h1", service="compute"),
+                Record(host_name="h2", service="compute"),
+                Record(host_name="c1", service="conductor")]
+
+    def _list_hypervisors(self, detailed=True):
+        hv_list = []
+        for i, hk in enumerate(("h1", "h2")):
+            hv_list.append(Record(id=i + 1, service={"host": hk}, status="enabled", state="up",
+                                  vcpus=16, vcpus_used=2, memory_mb=65536, free_ram_mb=61440,
+                                  local_gb=1000, free_disk_gb=980, disk_available_least=970))
+        return hv_list
+
+    def _list_servers(self, detailed=True, search_opts=None, marker=None, limit=None):
+        server_list = self.server_list
+
+        if marker is not None:
+            for i, s in enumerate(server_list):
+                if s.id == marker:
+                    server_list = server_list[i + 1:]
+                    break
+
+        return server_list[:limit]
+
+    def _list_azs(self, detailed=True):
+        hosts = {"h1": {"nova-compute": {"active": True, "available": True}},
+                 "h2": {"nova-compute": {"active": True, "available": True}}}
+        return [Record(zoneName="az1", zoneState={"available": True}, hosts=hosts)]
+
+    def _list_aggregates(self):
+        return [Record(id=1, name="ag1", deleted=False, metadata={"ssd": "true"}, hosts=["h1"])]
+
+    def _list_server_groups(self):
+        return [Record(id="g1", name="sg1", policies=["anti-affinity"], members=["u0", "u1"])]
+
+
+class StubLogger(object):
+    """Logger dropping all messages."""
+
+    def _log(self, *_args, **_kwargs):
+        pass
+
+    debug = _log
+    info = _log
+    warning = _log
+    error = _log
+
+
+class TestNovaCompute(unittest.TestCase):
+
+    def _get_compute(self, _nova):
+        compute = NovaCompute.__new__(NovaCompute)
+        compute.logger = StubLogger()
+        compute._init_sync({"sync_workers": 4, "server_page_size": 1})
+
+        compute.nova = _nova
+        compute.auth_url = "http://dc1.example.com:5000/v2.0"
+
+        return compute
+
+    def test_get_resource_status(self):
+        nova = StubNova()
+        compute = self._get_compute(nova)
+
+        flavors = {}
+        hosts = {}
+        groups = {}
+        status = compute.get_resource_status(flavors, hosts, groups)
+
+        self.assertEqual("ok", status)
+
+        self.assertEqual(["private", "small"], sorted(flavors.keys()))
+        self.assertEqual("f1", flavors["small"].flavor_id)
+
+        self.assertEqual(["h1", "h2"], sorted(hosts.keys()))
+        self.assertEqual(16.0, hosts["h1"].original_vCPUs)
+        self.assertEqual(970.0, hosts["h2"].disk_available_least)
+
+        self.assertEqual(["u0"], [s["uuid"] for s in hosts["h1"].server_list])
+        self.assertEqual(["u1"], [s["uuid"] for s in hosts["h2"].server_list])
+        self.assertEqual("st1", hosts["h1"].server_list[0]["stack_id"])
+        self.assertEqual(-1, hosts["h1"].server_list[0]["vcpus"])
+
+        self.assertEqual(["ag1", "az:az1", "sg1"], sorted(groups.keys()))
+        self.assertEqual(["h1"], list(groups["ag1"].member_hosts.keys()))
+        self.assertEqual("diversity", groups["sg1"].group_type)
+
+        # Paged one server at a time until an empty page
+        self.assertEqual(3, nova.calls["servers"])
+
+    def test_retry_then_succeed(self):
+        nova = StubNova({"hypervisors": 1})
+        compute = self._get_compute(nova)
+
+        hosts = {}
+        status = compute.get_resource_status({}, hosts, {})
+
+        self.assertEqual("ok", status)
+        self.assertEqual(2, nova.calls["hypervisors"])
+        self.assertEqual(16.0, hosts["h1"].original_vCPUs)
+
+    def test_retry_then_fail(self):
+        nova = StubNova({"host-aggregates": 3})
+        compute = self._get_compute(nova)
+
+        status = compute.get_resource_status({}, {}, {})
+
+        self.assertEqual("error while getting host-aggregates from Nova", status)
+        self.assertEqual(3, nova.calls["host-aggregates"])
+
+        # Other calls are made once each.
+        self.assertEqual(1, nova.calls["hypervisors"])
+
+    def test_call_in_parallel(self):
+        compute = self._get_compute(StubNova())
+
+        def fail():
+            raise Exception("fail")
+
+        (status, results) = compute._call_in_parallel({"a": lambda: 1,
+                                                       "b": fail,
+                                                       "c": lambda: [3]})
+
+        self.assertEqual("error while getting b from Nova", status)
+        self.assertEqual(1, results["a"])
+        self.assertIsNone(results["b"])
+        self.assertEqual([3], results["c"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,200 @@
+#
+# -------------------------------------------------------------------------
+#   Copyright (c) 2019 AT&T Intellectual Property
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# -------------------------------------------------------------------------
+#
+import random
+import unittest
+
+from valet.engine.resource_manager.resource import Resource
+from valet.engine.resource_manager.resources.group import Group
+from valet.engine.resource_manager.resources.host import Host
+from valet.engine.resource_manager.resources.server_index import ServerIndex
+
+
+def get_server_info(_uuid="none", _stack_id="none", _name="none", _stack_name="none"):
+    """Get server info as kept in resource."""
+
+    return {"uuid": _uuid, "stack_id": _stack_id, "stack_name": _stack_name,
+            "orch_id": "none", "name": _name, "flavor_id": "none",
+            "vcpus": -1, "mem": -1, "disk": -1, "numa": "none",
+            "image_id": "none", "tenant_id": "none",
+            "state": "none", "status": "none"}
+
+
+def scan(_server_list, _s_info):
+    """Find server info the way resource did before indexing."""
+
+    for s_info in _server_list:
+        if _s_info["uuid"] != "none":
+            if s_info["uuid"] != "none" and \
+               s_info["uuid"] == _s_info["uuid"]:
+                return s_info
+
+        if _s_info["stack_id"] != "none":
+            if (s_info["stack_id"] != "none" and
+                    s_info["stack_id"] == _s_info["stack_id"]) and \
+               s_info["name"] == _s_info["name"]:
+                return s_info
+
+        if _s_info["stack_name"] != "none":
+            if (s_info["stack_name"] != "none" and
+                    s_info["stack_name"] == _s_info["stack_name"]) and \
+               s_info["name"] == _s_info["name"]:
+                return s_info
+
+    return None
+
+
+class StubLogger(object):
+    """Logger dropping all messages."""
+
+    def _log(self, *_args, **_kwargs):
+        pass
+
+    debug = _log
+    info = _log
+    warning = _log
+    error = _log
+
+
+class TestServerIndex(unittest.TestCase):
+
+    def setUp(self):
+        super(TestServerIndex, self).setUp()
+
+        self.random = random.Random(7)
+
+    def _get_random_info(self):
+        r = self.random
+
+        return get_server_info(r.choice(["none", "u1", "u2", "u3"]),
+                               r.choice(["none", "s1", "s2"]),
+                               r.choice(["vm1", "vm2"]),
+                               r.choice(["none", "n1"]))
+
+    def _assert_same(self, _server_list, _index):
+        for _ in range(20):
+            q = self._get_random_info()
+            self.assertIs(scan(_server_list, q), _index.find(_server_list, q))
+
+    def test_find_after_add_and_remove(self):
+        server_list = []
+        index = ServerIndex()
+
+        for _ in range(300):
+            if len(server_list) > 0 and self.random.random() < 0.4:
+                s_info = scan(server_list, self._get_random_info())
+                if s_info is not None:
+                    server_list.remove(s_info)
+                    index.remove(server_list, s_info)
+            else:
+                s_info = self._get_random_info()
+                server_list.append(s_info)
+                index.add(server_list, s_info)
+
+            self._assert_same(server_list, index)
+
+    def test_find_after_direct_append(self):
+        server_list = []
+        index = ServerIndex()
+
+        for _ in range(10):
+            server_list.append(self._get_random_info())
+
+        self._assert_same(server_list, index)
+
+        server_list.append(self._get_random_info())
+
+        self._assert_same(server_list, index)
+
+    def test_find_after_host_update(self):
+        host = Host("h1")
+        group = Group("g1")
+        group.factory = "valet"
+
+        for i in range(5):
+            s_info = get_server_info(_stack_id="s1", _name="vm" + str(i))
+            host.add_server(s_info)
+            group.add_server(s_info, host.name)
+
+        # Orchestration assigns uuid to the planned server.
+        updated = host.update_server(get_server_info("u3", "s1", "vm3"))
+        self.assertIsNotNone(updated)
+        group.server_index.invalidate()
+
+        for q in (get_server_info(_uuid="u3"),
+                  get_server_info(_stack_id="s1", _name="vm3"),
+                  get_server_info(_stack_id="s1", _name="vm4")):
+            self.assertIs(scan(host.server_list, q), host.get_server_info(q))
+            self.assertIs(scan(group.server_list, q), group.get_server_info(q))
+
+        self.assertIs(updated, host.get_server_info(get_server_info(_uuid="u3")))
+
+
+class TestResourceServerIndexes(unittest.TestCase):
+
+    def setUp(self):
+        super(TestResourceServerIndexes, self).setUp()
+
+        self.resource = Resource({"id": "dc1"}, None, None, None, None, StubLogger())
+
+        for hk in ("h1", "h2"):
+            self.resource.hosts[hk] = Host(hk)
+
+        self.group = Group("g1")
+        self.group.factory = "valet"
+        self.resource.groups[self.group.name] = self.group
+
+        old_host = self.resource.hosts["h1"]
+        old_host.memberships[self.group.name] = self.group
+
+        self.s_info = get_server_info(_stack_id="s1", _name="vm1")
+        old_host.add_server(self.s_info)
+        self.group.add_server(self.s_info, old_host.name)
+
+        # Build lookups before the change.
+        self.assertIs(self.s_info, self.group.get_server_info(self.s_info))
+
+    def test_find_after_migrate(self):
+        new_info = get_server_info("u1", "s1", "vm1")
+        change = {"s1:vm1": {"old_host": "h1", "new_host": "h2", "info": new_info}}
+
+        self.resource.update_server_placements(change_of_placements=change)
+
+        q = get_server_info(_uuid="u1")
+
+        self.assertIsNone(self.resource.hosts["h1"].get_server_info(q))
+        self.assertIs(self.s_info, self.resource.hosts["h2"].get_server_info(q))
+
+        # The group still holds the server until regrouped.
+        self.assertIs(scan(self.group.server_list, q), self.group.get_server_info(q))
+        self.assertIs(self.s_info, self.group.get_server_info(q))
+
+    def test_find_after_update(self):
+        new_info = get_server_info("u1", "s1", "vm1")
+        change = {"s1:vm1": {"host": "h1", "info": new_info}}
+
+        self.resource.update_server_placements(change_of_placements=change)
+
+        q = get_server_info(_uuid="u1")
+
+        self.assertIs(self.s_info, self.resource.hosts["h1"].get_server_info(q))
+        self.assertIs(scan(self.group.server_list, q), self.group.get_server_info(q))
+
+
+if __name__ == "__main__":
+    unittest.main()
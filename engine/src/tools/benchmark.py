@@ -0,0 +1,683 @@
+#
+# -------------------------------------------------------------------------
+#   Copyright (c) 2019 AT&T Intellectual Property
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# -------------------------------------------------------------------------
+#
+#!/usr/bin/env python3
+
+"""
+Placement latency benchmark of valet-engine.
+Generate synthetic datacenters (racks, hosts, NUMA, AZs, host-aggregates and
+servers already running), replay create/confirm/delete requests through the
+engine with MemDB, and report latencies per operation and per phase.
+For help invoke with benchmark.py --help
+"""
+
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import uuid
+
+from datetime import datetime
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # ../..
+from valet.bootstrapper import Bootstrapper
+from valet.engine.resource_manager.nova_compute import NovaCompute
+from valet.engine.resource_manager.resource import Resource
+from valet.solver.ostro import Ostro
+from valet.utils.logger import Logger
+
+
+# name, vcpus, ram (MB), disk (GB), extra specs
+FLAVORS = [
+    ("bench.small", 2, 4096, 20, {}),
+    ("bench.medium", 4, 8192, 40, {}),
+    ("bench.large", 8, 16384, 80, {}),
+    ("bench.numa", 4, 8192, 40, {"hw:numa_nodes": "1"}),
+    ("bench.ssd", 4, 8192, 40, {"aggregate_instance_extra_specs:bench_type": "ssd"}),
+]
+
+# Valet rules of stacks, randomly chosen per stack ("" means no rule)
+RULES = [
+    "",
+    "VNF_host_diversity_RDN",
+    "VNF_Rack_Diversity_RDN",
+    "VNF_host_diversity_RDN,VNF_Rack_Diversity_RDN",
+    "VALET_HOST_AFFINITY_RULE",
+]
+
+# Host capacity
+HOST_VCPUS = 64
+HOST_MEM_MB = 262144
+HOST_DISK_GB = 2000
+
+# Phases of request handling
+PHASES = ("load", "sync", "search", "store")
+
+
+class Record(object):
+    """Object returned by novaclient, i.e., attributes in __dict__."""
+
+    def __init__(self, **_attrs):
+        self.__dict__.update(_attrs)
+
+    def __getattr__(self, _name):
+        try:
+            return self.__dict__[_name]
+        except KeyError:
+            raise AttributeError(_name)
+
+
+class Manager(object):
+    """Collection of API calls of a resource type (e.g., nova.servers).
+
+    Each call takes the given latency (in seconds) as a remote call does.
+    """
+
+    def __init__(self, _latency, **_calls):
+        for ck, call in _calls.items():
+            setattr(self, ck, self._delay(_latency, call))
+
+    @staticmethod
+    def _delay(_latency, _call):
+        if _latency <= 0:
+            return _call
+
+        def delayed(*_args, **_kwargs):
+            time.sleep(_latency)
+            return _call(*_args, **_kwargs)
+        return delayed
+
+
+class SyntheticNova(object):
+    """Nova API of a synthetic datacenter, as used by NovaCompute."""
+
+    def __init__(self, _name, _num_of_racks, _num_of_hosts, _preload, _latency, _rnd):
+        self.name = _name
+
+        self.flavors = {}
+        for (name, vcpus, ram, disk, extra_specs) in FLAVORS:
+            self.flavors[name] = Record(id=name, name=name,
+                                        vcpus=vcpus, ram=ram, disk=disk, swap='',
+                                        get_keys=(lambda _e=extra_specs: dict(_e)))
+            setattr(self.flavors[name], "OS-FLV-EXT-DATA:ephemeral", 0)
+
+        # Hosts follow the naming convention of topology,
+        # i.e., zone + 'r' + rack + 'c' + host.
+        self.racks = []
+        self.hosts = []
+        for r in range(_num_of_racks):
+            rack = []
+            for h in range(_num_of_hosts):
+                rack.append("%sr%02dc%03d" % (_name, r + 1, h + 1))
+            self.racks.append(rack)
+            self.hosts.extend(rack)
+
+        # Two AZs, each having half of racks.
+        self.azs = {}
+        for i, rack in enumerate(self.racks):
+            az_name = "%s-az%d" % (_name, i % 2 + 1)
+            if az_name not in self.azs.keys():
+                self.azs[az_name] = []
+            self.azs[az_name].extend(rack)
+
+        # Host-aggregates with metadata for flavor extra specs.
+        self.aggregates = {}
+        self.next_aggregate_id = 1
+        for bench_type in ("ssd", "general"):
+            aggregate = self._create_aggregate(_name + "-" + bench_type, None)
+            aggregate.metadata["bench_type"] = bench_type
+        for i, rack in enumerate(self.racks):
+            if i // 2 % 2 == 0:
+                self.aggregates[1].hosts.extend(rack)
+            else:
+                self.aggregates[2].hosts.extend(rack)
+
+        # Servers already running, not placed by valet.
+        self.servers = {}
+
+        # Servers deleted, kept for changes-since listing
+        self.deleted_servers = {}
+        for h in self.hosts:
+            for _ in range(_rnd.randint(0, _preload)):
+                flavor = _rnd.choice(FLAVORS[:3])[0]
+                self.boot("preload-" + uuid.uuid4().hex[:8], flavor, h, {})
+
+        self.availability_zones = Manager(_latency, list=self._list_availability_zones)
+        self.aggregates_api = Manager(_latency,
+                                      list=self._list_aggregates,
+                                      create=self._create_aggregate,
+                                      add_host=self._add_host_to_aggregate,
+                                      remove_host=self._remove_host_from_aggregate,
+                                      delete=self._delete_aggregate,
+                                      set_metadata=self._set_metadata_of_aggregate)
+        self.server_groups = Manager(_latency, list=lambda: [])
+        self.hosts_api = Manager(_latency, list=self._list_hosts)
+        self.hypervisors = Manager(_latency, list=self._list_hypervisors)
+        self.servers_api = Manager(_latency, list=self._list_servers)
+        self.flavors_api = Manager(_latency, list=self._list_flavors, get=self._get_flavor)
+
+    def client(self):
+        """Get the client having the same attributes as novaclient."""
+
+        return Record(availability_zones=self.availability_zones,
+                      aggregates=self.aggregates_api,
+                      server_groups=self.server_groups,
+                      hosts=self.hosts_api,
+                      hypervisors=self.hypervisors,
+                      servers=self.servers_api,
+                      flavors=self.flavors_api)
+
+    def boot(self, _name, _flavor, _host, _metadata):
+        """Run a server in the host."""
+
+        f = self.flavors[_flavor]
+
+        s = Record(id=str(uuid.uuid4()), name=_name, metadata=dict(_metadata),
+                   flavor={"id": f.id},
+                   image={"id": "bench-image"}, tenant_id="bench-tenant",
+                   status="ACTIVE", updated=datetime.utcnow())
+        setattr(s, "OS-EXT-SRV-ATTR:host", _host)
+
+        self.servers[s.id] = s
+
+    def terminate(self, _stack_id):
+        """Delete all servers of the stack."""
+
+        for sk in list(self.servers.keys()):
+            s = self.servers[sk]
+            if s.metadata.get("stack-id") == _stack_id:
+                del self.servers[sk]
+
+                s.status = "DELETED"
+                s.updated = datetime.utcnow()
+                self.deleted_servers[sk] = s
+
+    def _list_availability_zones(self, detailed=True):
+        az_list = []
+        for az_name, hosts in self.azs.items():
+            az_hosts = {}
+            for h in hosts:
+                az_hosts[h] = {"nova-compute": {"active": True, "available": True}}
+            az_list.append(Record(zoneName=az_name, zoneState={"available": True}, hosts=az_hosts))
+        return az_list
+
+    def _list_aggregates(self):
+        return list(self.aggregates.values())
+
+    def _create_aggregate(self, _name, _az):
+        aggregate = Record(id=self.next_aggregate_id, name=_name, deleted=False,
+                           availability_zone=_az, metadata={}, hosts=[])
+        self.aggregates[aggregate.id] = aggregate
+        self.next_aggregate_id += 1
+        return aggregate
+
+    def _get_aggregate(self, _aggr):
+        aggregate = self.aggregates.get(int(_aggr))
+        if aggregate is None:
+            for _, a in self.aggregates.items():
+                if a.name == _aggr:
+                    aggregate = a
+                    break
+        return aggregate
+
+    def _add_host_to_aggregate(self, _aggr, _host):
+        aggregate = self._get_aggregate(_aggr)
+        if _host not in aggregate.hosts:
+            aggregate.hosts.append(_host)
+
+    def _remove_host_from_aggregate(self, _aggr, _host):
+        aggregate = self._get_aggregate(_aggr)
+        if _host in aggregate.hosts:
+            aggregate.hosts.remove(_host)
+
+    def _delete_aggregate(self, _aggr):
+        del self.aggregates[self._get_aggregate(_aggr).id]
+
+    def _set_metadata_of_aggregate(self, _aggr, _metadata):
+        # Nova adds key/value pairs and removes the ones with None value.
+        metadata = self._get_aggregate(_aggr).metadata
+        for mk, mv in _metadata.items():
+            if mv is None:
+                metadata.pop(mk, None)
+            else:
+                metadata[mk] = mv
+
+    def _list_hosts(self):
+        return [Record(host_name=h, service="compute") for h in self.hosts]
+
+    def _list_hypervisors(self, detailed=True):
+        used = {}
+        for h in self.hosts:
+            used[h] = [0, 0, 0]
+        for _, s in self.servers.items():
+            u = used[getattr(s, "OS-EXT-SRV-ATTR:host")]
+            f = self.flavors[s.flavor["id"]]
+            u[0] += f.vcpus
+            u[1] += f.ram
+            u[2] += f.disk
+
+        hv_list = []
+        for i, h in enumerate(self.hosts):
+            (vcpus, mem, disk) = used[h]
+            hv_list.append(Record(id=i + 1, service={"host": h},
+                                  status="enabled", state="up",
+                                  vcpus=HOST_VCPUS, vcpus_used=vcpus,
+                                  memory_mb=HOST_MEM_MB, free_ram_mb=HOST_MEM_MB - mem,
+                                  local_gb=HOST_DISK_GB, free_disk_gb=HOST_DISK_GB - disk,
+                                  disk_available_least=HOST_DISK_GB - disk))
+        return hv_list
+
+    def _list_servers(self, detailed=True, search_opts=None, marker=None, limit=None):
+        server_list = list(self.servers.values())
+
+        since = None
+        if search_opts is not None and "changes-since" in search_opts.keys():
+            since = datetime.fromisoformat(search_opts["changes-since"])
+            server_list.extend(self.deleted_servers.values())
+            server_list = [s for s in server_list if s.updated >= since]
+
+        if marker is not None:
+            for i, s in enumerate(server_list):
+                if s.id == marker:
+                    server_list = server_list[i + 1:]
+                    break
+
+        if limit is not None:
+            server_list = server_list[:limit]
+
+        return server_list
+
+    def _list_flavors(self, detailed=True, is_public=True):
+        if not is_public:
+            return []
+        return list(self.flavors.values())
+
+    def _get_flavor(self, _flavor_id):
+        return self.flavors[_flavor_id]
+
+
+class SyntheticCompute(NovaCompute):
+    """NovaCompute connecting to synthetic datacenters, keyed by url."""
+
+    def __init__(self, _config, _logger, _platforms):
+        self.logger = _logger
+
+        self.nova = None
+
+        self.novas = {}
+        self.last_activate_urls = {}
+        self.life_time = 43200
+
+        self._init_sync(_config["compute"])
+
+        self.platforms = _platforms
+
+    def set_client(self, _auth_url):
+        if _auth_url not in self.platforms.keys():
+            self.logger.error("unknown datacenter url = " + _auth_url)
+            return False
+
+        self.novas[_auth_url] = self.platforms[_auth_url].client()
+        self.last_activate_urls[_auth_url] = time.time()
+
+        self.nova = self.novas[_auth_url]
+        self.auth_url = _auth_url
+
+        self.server_caches.pop(_auth_url, None)
+        return True
+
+
+class BenchBootstrapper(Bootstrapper):
+    """Bootstrapper using synthetic datacenters instead of OpenStack."""
+
+    def __init__(self, _config, _logger, _platforms):
+        Bootstrapper.__init__(self, _config, _logger)
+
+        self.platforms = _platforms
+
+    def get_compute_source(self):
+        return SyntheticCompute(self.config, self.logger, self.platforms)
+
+
+class PhaseTimer(object):
+    """Accumulate elapsed time of phases within the current request."""
+
+    def __init__(self):
+        self.current = {}
+
+    def reset(self):
+        self.current = {}
+
+    def wrap(self, _phase, _func):
+        def timed(*_args, **_kwargs):
+            begin = time.perf_counter()
+            try:
+                return _func(*_args, **_kwargs)
+            finally:
+                self.current[_phase] = self.current.get(_phase, 0.0) + time.perf_counter() - begin
+        return timed
+
+    def attach(self, _ostro):
+        """Time the phases of request handling of the engine."""
+
+        _ostro.rh.load_resource = self.wrap("load", _ostro.rh.load_resource)
+
+        Resource.sync_with_platform = self.wrap("sync", Resource.sync_with_platform)
+
+        for op in ("place", "update", "confirm", "rollback"):
+            setattr(_ostro.optimizer, op, self.wrap("search", getattr(_ostro.optimizer, op)))
+
+        _ostro.ahandler.store_app = self.wrap("store", _ostro.ahandler.store_app)
+        Resource.store_resource = self.wrap("store", Resource.store_resource)
+
+
+class Bench(object):
+    """Replay request streams and collect latencies."""
+
+    def __init__(self, _ostro, _platforms, _timer, _opts, _rnd):
+        self.ostro = _ostro
+        self.platforms = _platforms
+        self.timer = _timer
+        self.opts = _opts
+        self.rnd = _rnd
+
+        # key = operation, value = list of (total, {phase: elapsed}) in seconds
+        self.samples = {}
+        self.failures = {}
+
+        self.recording = False
+
+        # Stacks alive, list of (url, stack_name, stack_id)
+        self.stacks = []
+        self.count = 0
+
+    def request(self, _op, _req_id, _body):
+        """Handle a request and return its status and result."""
+
+        request_id = _op + "-" + _req_id
+        req = {"request_id": request_id, "request": json.dumps(_body)}
+
+        self.timer.reset()
+        begin = time.perf_counter()
+        if not self.ostro._handle_requests([req]):
+            raise RuntimeError("engine failed with " + request_id)
+        elapsed = time.perf_counter() - begin
+
+        row = self.ostro.dbh.db.results.get(request_id)
+        status = json.loads(row["status"])
+        result = json.loads(row["result"])
+
+        if self.recording:
+            if _op not in self.samples.keys():
+                self.samples[_op] = []
+                self.failures[_op] = 0
+            self.samples[_op].append((elapsed, self.timer.current))
+            if status["status"] != "ok":
+                self.failures[_op] += 1
+
+        return status, result
+
+    def create(self, _url):
+        """Create and confirm a stack."""
+
+        self.count += 1
+
+        platform = self.platforms[_url]
+        stack_name = "bench-stack-%06d" % self.count
+        az_name = self.rnd.choice(sorted(platform.azs.keys()))
+        rule = self.rnd.choice(self.opts.rule if self.opts.rule else RULES)
+
+        resources = {}
+        flavors = {}
+        for i in range(self.rnd.randint(1, self.opts.servers)):
+            name = "%s-vm%02d" % (stack_name, i)
+            flavors[name] = self.rnd.choice(FLAVORS)[0]
+
+            properties = {
+                "name": name,
+                "flavor": flavors[name],
+                "availability_zone": [az_name, "host_" + name],
+                "metadata": {}
+            }
+            if rule != "":
+                properties["metadata"]["valet_groups"] = rule
+
+            resources[name] = {"type": "OS::Nova::Server", "properties": properties}
+
+        body = {
+            "datacenter": {"id": platform.name, "url": _url},
+            "tenant_id": "bench-tenant",
+            "service_instance_id": "bench-service",
+            "vnf_instance_id": "bench-vnf-%06d" % self.count,
+            "vnf_instance_name": "bench-vnf-%06d" % self.count,
+            "stack_name": stack_name,
+            "stack": {"resources": resources}
+        }
+
+        req_id = str(uuid.uuid4())
+        (status, result) = self.request("create", req_id, body)
+        if status["status"] != "ok":
+            return
+
+        # Run servers where valet decided, as the platform does.
+        stack_id = str(uuid.uuid4())
+        for name, flavor in flavors.items():
+            host = result["host_" + name].split("::")[-1]
+            platform.boot(name, flavor, host, {"stack-id": stack_id})
+
+        (status, _) = self.request("confirm", req_id, {"stack_id": stack_name + "/" + stack_id})
+        if status["status"] == "ok":
+            self.stacks.append((_url, stack_name, stack_id))
+
+    def delete(self):
+        """Delete and confirm the oldest stack."""
+
+        (url, stack_name, stack_id) = self.stacks.pop(0)
+
+        platform = self.platforms[url]
+
+        body = {
+            "datacenter": {"id": platform.name, "url": url},
+            "tenant_id": "bench-tenant",
+            "stack_name": stack_name
+        }
+
+        req_id = str(uuid.uuid4())
+        (status, _) = self.request("delete", req_id, body)
+        if status["status"] != "ok":
+            return
+
+        platform.terminate(stack_id)
+
+        self.request("confirm", req_id, {"stack_id": stack_name + "/" + stack_id})
+
+    def run(self, _num_of_stacks):
+        urls = sorted(self.platforms.keys())
+
+        for i in range(_num_of_stacks):
+            self.create(urls[i % len(urls)])
+
+            if len(self.stacks) > self.opts.live:
+                self.delete()
+
+
+def percentile(_values, _p):
+    """Get the nearest-rank percentile."""
+
+    values = sorted(_values)
+    rank = int(round(_p / 100.0 * len(values) + 0.5)) - 1
+    return values[min(max(rank, 0), len(values) - 1)]
+
+
+def summarize(_bench):
+    """Get p50/p99 per operation and per phase in milliseconds."""
+
+    summary = {}
+
+    for op, samples in sorted(_bench.samples.items()):
+        totals = [s[0] * 1000.0 for s in samples]
+
+        summary[op] = {
+            "count": len(samples),
+            "failed": _bench.failures[op],
+            "p50": percentile(totals, 50),
+            "p99": percentile(totals, 99),
+            "mean": sum(totals) / len(totals),
+            "phases": {}
+        }
+
+        for phase in PHASES:
+            elapsed = [s[1].get(phase, 0.0) * 1000.0 for s in samples]
+            if sum(elapsed) == 0.0:
+                continue
+            summary[op]["phases"][phase] = {
+                "p50": percentile(elapsed, 50),
+                "p99": percentile(elapsed, 99),
+                "mean": sum(elapsed) / len(elapsed)
+            }
+
+    return summary
+
+
+def print_summary(_summary):
+    print("%-16s %6s %6s %10s %10s %10s" % ("operation", "count", "failed", "p50(ms)", "p99(ms)", "mean(ms)"))
+    for op, s in _summary.items():
+        print("%-16s %6d %6d %10.2f %10.2f %10.2f" % (op, s["count"], s["failed"], s["p50"], s["p99"], s["mean"]))
+        for phase in PHASES:
+            if phase in s["phases"].keys():
+                p = s["phases"][phase]
+                print("  %-14s %6s %6s %10.2f %10.2f %10.2f" % (phase, "", "", p["p50"], p["p99"], p["mean"]))
+
+
+def print_filter_stats(_filter_stats):
+    for dc_id, stats in sorted(_filter_stats.items()):
+        print("filters of " + dc_id)
+        print("  %-30s %8s %12s %12s %10s" % ("filter", "calls", "candidates", "selectivity", "cost(us)"))
+        for name, s in sorted(stats.items(), key=lambda _s: _s[1]["cost_us"]):
+            print("  %-30s %8d %12d %12.3f %10.3f" %
+                  (name, s["calls"], s["candidates_in"], s["selectivity"], s["cost_us"]))
+
+
+def options():
+    default_config = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                  "config", "solver_test.json")
+
+    parser = argparse.ArgumentParser(description='\033[34mPlacement Latency Benchmark Of Valet-Engine.\033[0m', add_help=False)
+
+    group = parser.add_argument_group("Synthetic Datacenters")
+    group.add_argument('-datacenters', metavar='N', type=int, default=1, help='number of datacenters (default: 1)')
+    group.add_argument('-racks', metavar='N', type=int, default=8, help='racks per datacenter (default: 8)')
+    group.add_argument('-hosts', metavar='N', type=int, default=16, help='hosts per rack (default: 16)')
+    group.add_argument('-preload', metavar='N', type=int, default=4, help='max running servers per host not placed by valet (default: 4)')
+    group.add_argument('-latency', metavar='ms', type=float, default=0.0, help='latency of each Nova API call (default: 0)')
+    group.add_argument('-seed', type=int, default=0, help='random seed (default: 0)')
+
+    group = parser.add_argument_group("Request Streams")
+    group.add_argument('-warmup', metavar='N', type=int, default=20, help='stacks created before measuring (default: 20)')
+    group.add_argument('-stacks', metavar='N', type=int, default=100, help='stacks created while measuring (default: 100)')
+    group.add_argument('-servers', metavar='N', type=int, default=4, help='max servers per stack (default: 4)')
+    group.add_argument('-live', metavar='N', type=int, default=50, help='stacks kept before deleting the oldest (default: 50)')
+    group.add_argument('-rule', metavar='rules', action="append", help='valet_groups of stacks, comma separated (multiples allowed)')
+
+    group = parser.add_argument_group("Engine And Output")
+    group.add_argument('-config', default=default_config, help='engine config file (default: config/solver_test.json)')
+    group.add_argument('-capacity_index', action='store_true', help='use capacity index of search')
+    group.add_argument('-staleness', metavar='sec', type=float, default=0.0, help='skip sync of requests within this bound (default: 0)')
+    group.add_argument('-sync_interval', metavar='sec', type=float, default=0.0, help='sync resources in background every interval (default: off)')
+    group.add_argument('-page_size', metavar='N', type=int, default=1000, help='servers listed per call to nova (default: 1000)')
+    group.add_argument('-changes_since', action='store_true', help='list only servers changed since the last sync')
+    group.add_argument('-filter_stats', action='store_true', help='also report runtime stats of search filters')
+    group.add_argument('-log', metavar='dir', help='directory for engine logs (default: temporary)')
+    group.add_argument('-json', metavar='file', help='also write the summary as json')
+    group.add_argument("-?", "--help", action="help", help="show this help message and exit")
+
+    return parser.parse_args()
+
+
+def main():
+    opts = options()
+
+    with open(opts.config) as f:
+        config = json.load(f)
+
+    log_dir = opts.log if opts.log else tempfile.mkdtemp(prefix="valet-bench-")
+    config["logging"]["path"] = os.path.join(log_dir, "")
+    config["db"]["mode"] = "mem_db"
+    config["engine"]["workers"] = 1
+    config["engine"]["intake"] = {"mode": "poll"}
+    config["engine"]["capacity_index"] = "true" if opts.capacity_index else "false"
+    config["compute"]["sync_staleness"] = opts.staleness
+    config["compute"]["batch_sync_interval"] = opts.sync_interval
+    config["compute"]["server_page_size"] = opts.page_size
+    config["compute"]["server_changes_since"] = "true" if opts.changes_since else "false"
+
+    logger = Logger(config["logging"]).get_logger('debug')
+
+    rnd = random.Random(opts.seed)
+
+    platforms = {}
+    for d in range(opts.datacenters):
+        name = "bench%02d" % (d + 1)
+        url = "http://%s.example.com:5000/v2.0" % name
+        platforms[url] = SyntheticNova(name, opts.racks, opts.hosts, opts.preload,
+                                        opts.latency / 1000.0, rnd)
+
+    bootstrapper = BenchBootstrapper(config, logger, platforms)
+    if not bootstrapper.config_valet():
+        print("error while configuring valet-engine, see logs in " + log_dir)
+        sys.exit(2)
+
+    ostro = Ostro(bootstrapper)
+
+    timer = PhaseTimer()
+    timer.attach(ostro)
+
+    bench = Bench(ostro, platforms, timer, opts, rnd)
+
+    # Engine main loop is not run, start the sync thread only.
+    ostro._start_sync()
+
+    begin = time.perf_counter()
+    bench.run(opts.warmup)
+    bench.recording = True
+    bench.run(opts.stacks)
+    elapsed = time.perf_counter() - begin
+
+    ostro.end_of_sync.set()
+
+    summary = summarize(bench)
+
+    print("%d datacenter(s) x %d racks x %d hosts, %d stacks (+%d warmup) in %.1f sec, logs in %s" %
+          (opts.datacenters, opts.racks, opts.hosts, opts.stacks, opts.warmup, elapsed, log_dir))
+    print_summary(summary)
+
+    if opts.filter_stats:
+        summary["filters"] = ostro.optimizer.search.get_filter_stats()
+        print_filter_stats(summary["filters"])
+
+    if opts.json:
+        with open(opts.json, 'w') as f:
+            json.dump(summary, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
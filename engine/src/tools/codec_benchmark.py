@@ -0,0 +1,134 @@
+#
+# -------------------------------------------------------------------------
+#   Copyright (c) 2019 AT&T Intellectual Property
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# -------------------------------------------------------------------------
+#
+
+"""
+Encode/decode benchmark of the resource blob stored in DB.
+Generate a synthetic datacenter, store its resource with MemDB, then time
+each JSON library installed and the msgpack encoding on that blob.
+For help invoke with codec_benchmark.py --help
+"""
+
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # ../..
+from benchmark import BenchBootstrapper, SyntheticNova
+from valet.utils import codec
+from valet.utils.logger import Logger
+
+
+def build_resource(_opts):
+    """Store the resource of a synthetic datacenter and return its blob."""
+
+    with open(_opts.config) as f:
+        config = json.load(f)
+
+    log_dir = tempfile.mkdtemp(prefix="valet-codec-")
+    config["logging"]["path"] = os.path.join(log_dir, "")
+    config["db"]["mode"] = "mem_db"
+    config["db"]["resource_encoding"] = "json"
+    config["engine"]["workers"] = 1
+    config["engine"]["intake"] = {"mode": "poll"}
+
+    logger = Logger(config["logging"]).get_logger('debug')
+
+    name = "bench01"
+    url = "http://%s.example.com:5000/v2.0" % name
+    platform = SyntheticNova(name, _opts.racks, _opts.hosts, _opts.preload, 0.0,
+                             random.Random(_opts.seed))
+
+    bootstrapper = BenchBootstrapper(config, logger, {url: platform})
+    if not bootstrapper.config_valet():
+        print("error while configuring valet-engine, see logs in " + log_dir)
+        sys.exit(2)
+
+    rh = bootstrapper.rh
+    if rh.load_group_rules_from_db() is None or \
+       not rh.load_resource({"id": name, "url": url}):
+        print("error while loading resource, see logs in " + log_dir)
+        sys.exit(2)
+
+    resource = rh.resource_list[0]
+    if not resource.sync_with_platform() or not resource.store_resource():
+        print("error while storing resource, see logs in " + log_dir)
+        sys.exit(2)
+
+    return bootstrapper.dbh.db.resources[name]["resource"]
+
+
+def measure(_func, _arg, _rounds):
+    """Get the mean elapsed time of func(arg) in milliseconds."""
+
+    begin = time.perf_counter()
+    for _ in range(_rounds):
+        _func(_arg)
+    return (time.perf_counter() - begin) * 1000.0 / _rounds
+
+
+def options():
+    default_config = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                  "config", "solver_test.json")
+
+    parser = argparse.ArgumentParser(description='\033[34mEncode/Decode Benchmark Of Resource Blob.\033[0m', add_help=False)
+    parser.add_argument('-racks', metavar='N', type=int, default=50, help='racks of datacenter (default: 50)')
+    parser.add_argument('-hosts', metavar='N', type=int, default=100, help='hosts per rack (default: 100)')
+    parser.add_argument('-preload', metavar='N', type=int, default=4, help='max running servers per host (default: 4)')
+    parser.add_argument('-seed', type=int, default=0, help='random seed (default: 0)')
+    parser.add_argument('-rounds', metavar='N', type=int, default=10, help='encode/decode rounds (default: 10)')
+    parser.add_argument('-config', default=default_config, help='engine config file (default: config/solver_test.json)')
+    parser.add_argument("-?", "--help", action="help", help="show this help message and exit")
+
+    return parser.parse_args()
+
+
+def main():
+    opts = options()
+
+    resource = json.loads(build_resource(opts))
+
+    # key = encoding, value = (encode, decode)
+    encodings = {}
+    for name, (dumps, loads) in codec.JSON_BACKENDS.items():
+        encodings[name] = (dumps, loads)
+    if codec.is_msgpack_supported():
+        encodings["msgpack"] = (lambda _r: codec.encode_resource(_r, "msgpack"),
+                                codec.decode_resource)
+
+    print("%d racks x %d hosts, %d rounds, default json library = %s" %
+          (opts.racks, opts.hosts, opts.rounds, codec.backend))
+    print("%-10s %12s %12s %12s %6s" % ("encoding", "size(KB)", "encode(ms)", "decode(ms)", "same"))
+    for name, (encode, decode) in encodings.items():
+        blob = encode(resource)
+        same = decode(blob) == resource
+
+        print("%-10s %12.1f %12.2f %12.2f %6s" %
+              (name, len(blob) / 1024.0,
+               measure(encode, resource, opts.rounds),
+               measure(decode, blob, opts.rounds),
+               "yes" if same else "no"))
+
+
+if __name__ == "__main__":
+    main()
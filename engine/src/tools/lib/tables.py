@@ -293,15 +293,41 @@ class Regions(Tables):
         self.key = Regions.key
 
 
+class Resource_versions(Tables):
+    alias = ["version", "v"]
+    key = "id"
+    schema = json.loads('{ "id": "text", "requests": "text", "timestamp": "text", "PRIMARY KEY": "(id)" }')
+
+    def __init__(self, music, logger):
+        Tables.__init__(self, music, logger)
+        self.key = Resource_versions.key
+
+
+class Resource_patches(Tables):
+    alias = ["patch", "p"]
+    key = "id"
+    schema = json.loads('{ "id": "text", "resource": "text", "timestamp": "text", "PRIMARY KEY": "(id)" }')
+
+    def __init__(self, music, logger):
+        Tables.__init__(self, music, logger)
+        self.key = Resource_patches.key
+
+
 class Groups(Tables):
     alias = ["group", "g"]
     key = "id"
-    schema = json.loads('{ "id ": "text", "uuid": "text", "type ": "text", "level": "text", "factory": "text", "rule_id ": "text", "metadata ": "text", "server_list": "text", "member_hosts": "text", "status": "text", "PRIMARY KEY": "(id)" }')
+    schema = json.loads('{ "id ": "text", "uuid": "text", "type ": "text", "level": "text", "factory": "text", "rule_id ": "text", "metadata ": "text", "server_list": "text", "member_hosts": "text", "status": "text", "datacenter_id": "text", "PRIMARY KEY": "(id)" }')
 
     def __init__(self, music, logger):
         Tables.__init__(self, music, logger)
         self.key = Groups.key
 
+    def create_table(self):
+        """ create table and index to read groups by datacenter """
+
+        Tables.create_table(self)
+        self.music.create_index(self.keyspace, self.table(), "datacenter_id")
+
 
 if __name__ == "__main__":
 
@@ -24,6 +24,9 @@ import os
 import json
 import argparse
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # ../..
+from valet.utils.codec import decode_resource
+
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='parse results.')
@@ -75,7 +78,7 @@ if __name__ == "__main__":
 
     if "resource" in results.keys():
         key = "resource"
-        result = json.loads(results[key])
+        result = decode_resource(results[key])
         print (json.dumps(result, sort_keys=True, indent=4))
 
         if not isinstance(result, list):
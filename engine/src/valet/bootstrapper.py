@@ -22,8 +22,10 @@ import os
 import sys
 
 from valet.engine.app_manager.app_handler import AppHandler
+from valet.engine.db_connect.db_apis.mem_db import MemDB
 from valet.engine.db_connect.db_apis.music import Music
 from valet.engine.db_connect.db_handler import DBHandler
+from valet.engine.db_connect.intake import RequestIntake
 from valet.engine.db_connect.locks import Locks
 from valet.engine.resource_manager.compute_manager import ComputeManager
 from valet.engine.resource_manager.metadata_manager import MetadataManager
@@ -47,6 +49,7 @@ class Bootstrapper(object):
         self.valet_id = None
 
         self.dbh = None
+        self.intake = None
         self.ah = None
         self.rh = None
         self.compute = None
@@ -64,17 +67,54 @@ class Bootstrapper(object):
         # Set DB connection.
         db_config = self.config.get("db")
         self.logger.info("launch engine -- keyspace: %s" % db_config.get("keyspace"))
-        db = Music(self.config, self.logger)
+        if db_config.get("mode") == "mem_db":
+            db = MemDB(db_config, self.logger)
+        else:
+            db = Music(self.config, self.logger)
 
         self.dbh = DBHandler(db, db_config, self.logger)
 
+        # Set how to read requests from DB.
+        self.intake = RequestIntake(self.dbh, self.config["engine"].get("intake"), self.logger)
+        if self.intake.mode == "event":
+            if isinstance(db, MemDB):
+                db.listener = self.intake.notify
+            else:
+                self.logger.warning("intake mode 'event' works only with mem_db, poll instead")
+
+        self.config_handlers()
+
+        # Read initial Valet Group rules and create in DB.
+        root = os.path.dirname(os.path.dirname(os.path.realpath(sys.argv[0])))
+        for rule_file in glob.glob(root + "/valet/rules/" + "*.json"):
+            rule = json.loads(open(rule_file).read())
+            self.dbh.create_group_rule(
+                rule["name"],
+                rule["app_scope"],
+                rule["type"],
+                rule["level"],
+                rule["members"],
+                rule["description"]
+            )
+
+            self.logger.debug("rule (" + rule["name"] + ") created")
+
+        # Groups are read by datacenter_id, which old rows do not have.
+        if self.dbh.scoped_group_reads:
+            if not self.dbh.index_valet_groups():
+                return False
+
+        return True
+
+    def config_handlers(self):
+        """Set the request handlers sharing the DB connection."""
+
         # Set lock to deal with datacenters in parallel.
         self.lock = Locks(self.dbh, self.config["engine"]["timeout"])
 
         # Set backend platform connection.
         compute_config = self.config.get("compute")
-        compute_source = NovaCompute(self.config,
-                                     self.logger)
+        compute_source = self.get_compute_source()
 
         topology_config = self.config.get("topology")
         topology_source = Naming(self.config.get("naming"), self.logger)
@@ -100,22 +140,30 @@ class Bootstrapper(object):
         # Set application handler.
         self.ah = AppHandler(self.dbh, use_dha, self.logger)
 
+        capacity_index = self.config["engine"].get("capacity_index", "false")
+        use_capacity_index = True
+        if capacity_index == "false" or not capacity_index:
+            use_capacity_index = False
+
         # Set optimizer for placement decisions.
-        self.optimizer = Optimizer(self.logger)
+        self.optimizer = Optimizer(self.logger, use_capacity_index)
 
-        # Read initial Valet Group rules and create in DB.
-        root = os.path.dirname(os.path.dirname(os.path.realpath(sys.argv[0])))
-        for rule_file in glob.glob(root + "/valet/rules/" + "*.json"):
-            rule = json.loads(open(rule_file).read())
-            self.dbh.create_group_rule(
-                rule["name"],
-                rule["app_scope"],
-                rule["type"],
-                rule["level"],
-                rule["members"],
-                rule["description"]
-            )
+    def get_compute_source(self):
+        """Get the platform to collect resource status (i.e., OpenStack Nova)."""
 
-            self.logger.debug("rule (" + rule["name"] + ") created")
+        return NovaCompute(self.config, self.logger)
 
-        return True
+    def clone(self):
+        """Create a bootstrapper with its own request handlers.
+
+        Used by a worker dealing with one datacenter at a time.
+        """
+
+        worker = Bootstrapper(self.config, self.logger)
+
+        worker.valet_id = self.valet_id
+        worker.dbh = self.dbh
+
+        worker.config_handlers()
+
+        return worker
@@ -32,6 +32,8 @@ class MemDB(object):
         self.stacks_table = _config.get("stacks_table")
         self.resources_table = _config.get("resources_table")
         self.stack_id_map_table = _config.get("stack_id_map_table")
+        self.resource_versions_table = _config.get("resource_versions_table")
+        self.resource_patches_table = _config.get("resource_patches_table")
 
         self.requests = {}
         self.results = {}
@@ -40,6 +42,11 @@ class MemDB(object):
         self.stacks = {}
         self.resources = {}
         self.stack_id_map = {}
+        self.resource_versions = {}
+        self.resource_patches = {}
+
+        # Called when a new request is inserted.
+        self.listener = None
 
     def read_all_rows(self, keyspace, table):
         rows = {"result": {}}
@@ -62,16 +69,28 @@ class MemDB(object):
     def insert_atom(self, keyspace, table, data, name=None, value=None):
         if table == self.requests_table:
             self.requests[data['request_id']] = data
+            if self.listener is not None:
+                self.listener()
         elif table == self.results_table:
             self.results[data['request_id']] = data
         elif table == self.group_rules_table:
             self.group_rules[data['id']] = data
         elif table == self.groups_table:
-            self.groups[data['id']] = data
+            # Only given columns are updated as in MUSIC.
+            if data['id'] not in self.groups.keys():
+                self.groups[data['id']] = {}
+            self.groups[data['id']].update(data)
         elif table == self.resources_table:
-            self.resources[data['id']] = data
+            # Only given columns are updated as in MUSIC.
+            if data['id'] not in self.resources.keys():
+                self.resources[data['id']] = {}
+            self.resources[data['id']].update(data)
         elif table == self.stacks_table:
             self.stacks[data['id']] = data
+        elif table == self.resource_versions_table:
+            self.resource_versions[data['id']] = data
+        elif table == self.resource_patches_table:
+            self.resource_patches[data['id']] = data
         elif table == self.stack_id_map_table:
             self.stack_id_map[data['request_id']] = data
 
@@ -107,6 +126,19 @@ class MemDB(object):
         elif table == self.stacks_table:
             if pk_value in self.stacks.keys():
                 row["result"]["row 0"] = copy.deepcopy(self.stacks[pk_value])
+        elif table == self.resource_versions_table:
+            if pk_value in self.resource_versions.keys():
+                row["result"]["row 0"] = copy.deepcopy(self.resource_versions[pk_value])
+        elif table == self.resource_patches_table:
+            if pk_value in self.resource_patches.keys():
+                row["result"]["row 0"] = copy.deepcopy(self.resource_patches[pk_value])
+        elif table == self.groups_table:
+            # Rows matched by any column (e.g., indexed datacenter_id).
+            i = 0
+            for v in self.groups.values():
+                if v.get(pk_name) == pk_value:
+                    row["result"]["row " + str(i)] = copy.deepcopy(v)
+                    i += 1
 
         return row
 
@@ -20,15 +20,31 @@
 import base64
 import json
 import requests
+import time
+
+from requests.adapters import HTTPAdapter
 
 from valet.utils.decryption import decrypt
 
 
+# Connections kept alive per Music server
+POOL_SIZE = 10
+
+# Seconds a Music server failing to connect is tried last
+COOLDOWN = 30
+
+
 class REST(object):
-    """Helper class for REST operations."""
+    """Helper class for REST operations.
+
+    Requests go through a session keeping connections alive to each server.
+    A server failing to connect is tried after the others until its
+    cooldown is over.
+    """
 
     def __init__(self, hosts, port, path, timeout, retries,
-                 userid, password, ns, logger):
+                 userid, password, ns, logger,
+                 pool_size=POOL_SIZE, cooldown=COOLDOWN):
         """Initializer. Accepts target host list, port, and path."""
 
         self.hosts = hosts   # List of IP or FQDNs
@@ -39,6 +55,7 @@ class REST(object):
         self.userid = userid
         self.password = password
         self.ns = ns
+        self.cooldown = float(cooldown)   # Seconds to skip a failed server
         self.logger = logger  # For logging
 
         self.urls = []
@@ -50,18 +67,52 @@ class REST(object):
                 'path': self.path,
             })
 
+        # Time until which each url is tried last
+        self.down_until = {}
+
+        self.authorization = 'Basic %s' % base64.b64encode((self.userid + ':' + self.password).encode()).decode()
+
+        # Headers by content type, built once
+        self.headers = {}
+
+        self.session = requests.Session()
+
+        adapter = HTTPAdapter(pool_connections=max(len(self.urls), 1),
+                              pool_maxsize=int(pool_size))
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
     def __headers(self, content_type='application/json'):
         """Returns HTTP request headers."""
 
-        headers = {
-            'ns': self.ns,
-            'accept': content_type,
-            'content-type': content_type,
-            'authorization': 'Basic %s' % base64.b64encode((self.userid + ':' + self.password).encode()).decode()
-        }
+        headers = self.headers.get(content_type)
+
+        if headers is None:
+            headers = {
+                'ns': self.ns,
+                'accept': content_type,
+                'content-type': content_type,
+                'authorization': self.authorization
+            }
+            self.headers[content_type] = headers
 
         return headers
 
+    def __urls(self):
+        """Returns urls in the order to try, the ones in cooldown last."""
+
+        now = time.time()
+
+        up_urls = []
+        down_urls = []
+        for url in self.urls:
+            if self.down_until.get(url, 0) > now:
+                down_urls.append(url)
+            else:
+                up_urls.append(url)
+
+        return up_urls + down_urls
+
     def request(self, method='get', content_type='application/json', path='/',
                 data=None, raise400=True):
         """ Performs HTTP request """
@@ -69,44 +120,53 @@ class REST(object):
         if method not in ('post', 'get', 'put', 'delete'):
             raise KeyError("Method must be: post, get, put, or delete.")
 
-        method_fn = getattr(requests, method)
-
         if data:
             data_json = json.dumps(data)
         else:
             data_json = None
 
         response = None
+        error = None
         timeout = False
         err_message = ""
         full_url = ""
-        for url in self.urls:
+        my_headers = self.__headers(content_type)
+        for url in self.__urls():
             # Try each url in turn. First one to succeed wins.
             full_url = url + path
 
-            for attempt in range(self.retries):
+            # Whether every attempt failed to reach the server
+            unreachable = True
+
+            for attempt in range(int(self.retries)):
                 # Ignore the previous exception.
                 try:
-                    my_headers = self.__headers(content_type)
-                    for header_key in my_headers:
-                        if (type(my_headers[header_key]).__name__ == 'unicode'):
-                            my_headers[header_key] = my_headers[header_key].encode('ascii', 'ignore')
-                    response = method_fn(full_url, data=data_json,
-                                         headers=my_headers,
-                                         timeout=self.timeout)
+                    response = self.session.request(method, full_url, data=data_json,
+                                                    headers=my_headers,
+                                                    timeout=self.timeout)
+                    unreachable = False
+
                     if raise400 or not response.status_code == 400:
                         response.raise_for_status()
+
+                    self.down_until.pop(url, None)
                     return response
 
                 except requests.exceptions.Timeout as err:
+                    error = err
                     err_message = str(err) #err.message
-                    response = requests.Response()
-                    response.url = full_url
                     if not timeout:
                         self.logger.warning("Music: %s Timeout" % url, errorCode='availability')
                         timeout = True
 
+                except requests.exceptions.ConnectionError as err:
+                    error = err
+                    err_message = str(err)
+                    self.logger.debug("Music: %s Connection Error" % url)
+                    self.logger.debug(" err = %s" % err)
+
                 except requests.exceptions.RequestException as err:
+                    error = err
                     err_message = str(err) #err.message
                     self.logger.debug("Music: %s Request Exception" % url)
                     self.logger.debug(" method = %s" % method)
@@ -115,17 +175,25 @@ class REST(object):
                     self.logger.debug(" full url = %s" % full_url)
                     self.logger.debug(" request data = %s" % data_json)
                     self.logger.debug(" request headers = %s" % my_headers)
-                    self.logger.debug(" status code = %s" % response.status_code)
-                    self.logger.debug(" response = %s" % response.text)
-                    self.logger.debug(" response headers = %s" % response.headers)
+                    if response is not None:
+                        self.logger.debug(" status code = %s" % response.status_code)
+                        self.logger.debug(" response = %s" % response.text)
+                        self.logger.debug(" response headers = %s" % response.headers)
+
+            if unreachable:
+                # Try the other servers first for a while.
+                self.down_until[url] = time.time() + self.cooldown
+                self.logger.warning("Music: %s unreachable, tried last for %s sec" % (url, self.cooldown))
 
         # If we get here, an exception was raised for every url,
-        # but we passed so we could try each endpoint. Raise status
-        # for the last attempt (for now) so that we report something.
-        if response is not None:
-            self.logger.debug("Music: Full Url: %s", full_url)
-            self.logger.debug("Music: %s ", err_message)
-            response.raise_for_status()
+        # but we passed so we could try each endpoint. Raise the one
+        # of the last attempt, even if no server was ever reached.
+        self.logger.debug("Music: Full Url: %s", full_url)
+        self.logger.debug("Music: %s ", err_message)
+
+        if error is None:
+            raise requests.exceptions.ConnectionError("Music: no server tried for " + path)
+        raise error
 
 
 class Music(object):
@@ -151,6 +219,8 @@ class Music(object):
             'password': pw,
             'ns': _config["music"]["namespace"],
             'logger': _logger,
+            'pool_size': _config["music"].get("pool_size", POOL_SIZE),
+            'cooldown': _config["music"].get("cooldown", COOLDOWN),
         }
         self.rest = REST(**kwargs)
 
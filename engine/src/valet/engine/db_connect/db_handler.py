@@ -16,10 +16,18 @@
 #
 # -------------------------------------------------------------------------
 #
-import json
 import operator
+import threading
+import time
+
+from concurrent.futures import ThreadPoolExecutor
 
 from valet.engine.db_connect.locks import Locks, now
+from valet.utils import codec
+
+
+# Number of batched writes applied in parallel
+BATCH_WORKERS = 4
 
 
 class DBHandler(object):
@@ -35,10 +43,113 @@ class DBHandler(object):
         self.stack_id_map_table = _config.get("stack_id_map_table")
         self.regions_table = _config.get("regions_table")
 
+        # Version and pending requests of each resource, to check if the
+        # resident resource is current without reading the resource blob.
+        self.resource_versions_table = _config.get("resource_versions_table")
+
+        # Patches of changed resources stored on top of the full resource
+        self.resource_patches_table = _config.get("resource_patches_table")
+
+        # Max number of resource patches before the full resource is
+        # stored again. 0 means always store the full resource, which is
+        # also the case if no table of patches is configured.
+        self.resource_patch_limit = int(_config.get("resource_patch_limit", 0))
+        if self.resource_patches_table is None:
+            self.resource_patch_limit = 0
+
+        # Encoding of resource blobs, 'json' or 'msgpack' (if installed).
+        # Blobs of any encoding are read.
+        self.resource_encoding = _config.get("resource_encoding", "json")
+
+        self.batch_workers = int(_config.get("batch_workers", BATCH_WORKERS))
+
+        # Created on first batch
+        self.pool = None
+
+        # Open batch of this thread
+        self.local = threading.local()
+
+        # Read valet groups of a datacenter only, by the index of
+        # datacenter_id instead of reading the whole table.
+        self.scoped_group_reads = _config.get("scoped_group_reads", "false") == "true"
+
+        # Rules are cached until a rule is created or this bound
+        # (in seconds) is passed. 0 means read rules for every request.
+        self.rule_cache_ttl = float(_config.get("rule_cache_ttl", 0))
+
+        # Cached (read time, rule list) and
+        # the generation bumped by every rule creation
+        self.rule_cache = None
+        self.rule_generation = 0
+
         self.db = _db
 
         self.logger = _logger
 
+    def begin_batch(self):
+        """Collect writes of this thread until submit_batch() is called."""
+
+        self.local.batch = []
+
+    def submit_batch(self):
+        """Apply the collected writes and close the batch.
+
+        Writes with the same key (e.g., rows of a datacenter) are applied
+        in the collected order, the others in parallel.
+        Each failed write is logged with its own error.
+        Return False if any failed.
+        """
+
+        batch = getattr(self.local, "batch", None)
+        self.local.batch = None
+
+        if not batch:
+            return True
+
+        # Writes to apply in order, key = batch key
+        chains = {}
+        for w in batch:
+            if w[1] not in chains.keys():
+                chains[w[1]] = []
+            chains[w[1]].append(w)
+
+        if len(chains) == 1 or self.batch_workers <= 1:
+            results = [self._apply_chain(c) for c in chains.values()]
+        else:
+            if self.pool is None:
+                self.pool = ThreadPoolExecutor(max_workers=self.batch_workers)
+            results = list(self.pool.map(self._apply_chain, chains.values()))
+
+        return all(results)
+
+    def _apply_chain(self, _chain):
+        """Apply writes in order, stop at the first failure."""
+
+        for (error, _, func, args, kwargs) in _chain:
+            try:
+                func(*args, **kwargs)
+            except Exception as e:
+                self.logger.error(error + str(e))
+                return False
+
+        return True
+
+    def _write(self, _error, _key, _func, *_args, **_kwargs):
+        """Apply a write to DB, or add it into the open batch."""
+
+        batch = getattr(self.local, "batch", None)
+        if batch is not None:
+            batch.append((_error, _key, _func, _args, _kwargs))
+            return True
+
+        try:
+            _func(*_args, **_kwargs)
+        except Exception as e:
+            self.logger.error(_error + str(e))
+            return False
+
+        return True
+
     def get_requests(self):
         """Get requests from valet-api."""
 
@@ -121,29 +232,18 @@ class DBHandler(object):
 
         data = {
             'request_id': _req_id,
-            'status': json.dumps(_status),
-            'result': json.dumps(_result),
+            'status': codec.dumps(_status),
+            'result': codec.dumps(_result),
             'timestamp': now()
         }
-        try:
-            self.db.insert_atom(self.keyspace, self.results_table, data)
-        except Exception as e:
-            self.logger.error("DB: while putting placement result: " + str(e))
-            return False
-
-        return True
+        return self._write("DB: while putting placement result: ", ("requests", _req_id),
+                           self.db.insert_atom, self.keyspace, self.results_table, data)
 
     def _delete_request(self, _req_id):
         """Delete finished request."""
 
-        try:
-            self.db.delete_atom(self.keyspace, self.requests_table,
-                                'request_id', _req_id)
-        except Exception as e:
-            self.logger.error("DB: while deleting handled request: " + str(e))
-            return False
-
-        return True
+        return self._write("DB: while deleting handled request: ", ("requests", _req_id),
+                           self.db.delete_atom, self.keyspace, self.requests_table, 'request_id', _req_id)
 
     def clean_expired_regions(self):
         """Delete regions from the regions table that have expired.
@@ -213,13 +313,8 @@ class DBHandler(object):
             'request_id': _req_id,
             'stack_id': _stack_id
         }
-        try:
-            self.db.insert_atom(self.keyspace, self.stack_id_map_table, data)
-        except Exception as e:
-            self.logger.error("DB: while creating request map: " + str(e))
-            return False
-
-        return True
+        return self._write("DB: while creating request map: ", ("stack_id_map", _req_id),
+                           self.db.insert_atom, self.keyspace, self.stack_id_map_table, data)
 
     def get_stack_id_map(self, _req_id):
         """Get stack id."""
@@ -245,17 +340,21 @@ class DBHandler(object):
     def delete_stack_id_map(self, _req_id):
         """Delete map of confirmed or rollbacked request."""
 
-        try:
-            self.db.delete_atom(self.keyspace, self.stack_id_map_table,
-                                'request_id', _req_id)
-        except Exception as e:
-            self.logger.error("DB: while deleting request id map: " + str(e))
-            return False
-
-        return True
+        return self._write("DB: while deleting request id map: ", ("stack_id_map", _req_id),
+                           self.db.delete_atom, self.keyspace, self.stack_id_map_table, 'request_id', _req_id)
 
     def get_group_rules(self):
-        """Get all valet group rules."""
+        """Get all valet group rules.
+
+        The returned list is shared while cached, so must not be changed.
+        """
+
+        rule_cache = self.rule_cache
+        if rule_cache is not None and time.time() - rule_cache[0] < self.rule_cache_ttl:
+            return rule_cache[1]
+
+        generation = self.rule_generation
+        read_time = time.time()
 
         rule_list = []
 
@@ -271,6 +370,10 @@ class DBHandler(object):
                     for _, dbrow in row.items():
                         rule_list.append(dbrow)
 
+        # Not cached if a rule was created while reading.
+        if self.rule_cache_ttl > 0 and generation == self.rule_generation:
+            self.rule_cache = (read_time, rule_list)
+
         return rule_list
 
     def get_group_rule(self, _id):
@@ -301,9 +404,9 @@ class DBHandler(object):
             'app_scope': _scope,
             'type': _type,
             'level': _level,
-            'members': json.dumps(_members),
+            'members': codec.dumps(_members),
             'description': _desc,
-            'groups': json.dumps([]),
+            'groups': codec.dumps([]),
             'status': "enabled"
         }
         try:
@@ -311,16 +414,23 @@ class DBHandler(object):
         except Exception as e:
             self.logger.error("DB: while creating a group rule: " + str(e))
             return False
+        finally:
+            self.rule_generation += 1
+            self.rule_cache = None
 
         return True
 
-    def get_valet_groups(self):
-        """Get all valet groups."""
+    def get_valet_groups(self, _dc_id=None):
+        """Get valet groups of the datacenter, or all if not given."""
 
         group_list = []
 
         try:
-            rows = self.db.read_all_rows(self.keyspace, self.groups_table)
+            if _dc_id is not None and self.scoped_group_reads:
+                rows = self.db.read_row(self.keyspace, self.groups_table,
+                                        "datacenter_id", _dc_id)
+            else:
+                rows = self.db.read_all_rows(self.keyspace, self.groups_table)
         except Exception as e:
             self.logger.error("DB: while reading groups: " + str(e))
             return None
@@ -333,6 +443,30 @@ class DBHandler(object):
 
         return group_list
 
+    def index_valet_groups(self):
+        """Set datacenter_id of groups stored before it was kept."""
+
+        group_list = self.get_valet_groups()
+        if group_list is None:
+            return False
+
+        for g in group_list:
+            if g.get("datacenter_id"):
+                continue
+
+            data = {
+                'id': g["id"],
+                'datacenter_id': g["id"].split(':', 1)[0]
+            }
+            try:
+                self.db.insert_atom(self.keyspace, self.groups_table, data,
+                                    name='id', value=g["id"])
+            except Exception as e:
+                self.logger.error("DB: while indexing group: " + str(e))
+                return False
+
+        return True
+
     def create_valet_group(self, _id, _g_info):
         """Create a group."""
 
@@ -343,18 +477,18 @@ class DBHandler(object):
             'level': _g_info.get("level"),
             'factory': _g_info.get("factory"),
             'rule_id': _g_info.get("rule_id"),
-            'metadata': json.dumps(_g_info.get("metadata")),
-            'server_list': json.dumps(_g_info.get("server_list")),
-            'member_hosts': json.dumps(_g_info.get("member_hosts")),
+            'metadata': codec.dumps(_g_info.get("metadata")),
+            'server_list': codec.dumps(_g_info.get("server_list")),
+            'member_hosts': codec.dumps(_g_info.get("member_hosts")),
             'status': _g_info.get("status")
         }
-        try:
-            self.db.insert_atom(self.keyspace, self.groups_table, data)
-        except Exception as e:
-            self.logger.error("DB: while creating a group: " + str(e))
-            return False
 
-        return True
+        # Only with scoped reads, since the column may not exist otherwise.
+        if self.scoped_group_reads:
+            data['datacenter_id'] = _id.split(':', 1)[0]
+
+        return self._write("DB: while creating a group: ", ("groups", _id),
+                           self.db.insert_atom, self.keyspace, self.groups_table, data)
 
     def update_valet_group(self, _id, _g_info):
         """Update group."""
@@ -366,30 +500,25 @@ class DBHandler(object):
             'level': _g_info.get("level"),
             'factory': _g_info.get("factory"),
             'rule_id': _g_info.get("rule_id"),
-            'metadata': json.dumps(_g_info.get("metadata")),
-            'server_list': json.dumps(_g_info.get("server_list")),
-            'member_hosts': json.dumps(_g_info.get("member_hosts")),
+            'metadata': codec.dumps(_g_info.get("metadata")),
+            'server_list': codec.dumps(_g_info.get("server_list")),
+            'member_hosts': codec.dumps(_g_info.get("member_hosts")),
             'status': _g_info.get("status")
         }
-        try:
-            self.db.insert_atom(self.keyspace, self.groups_table, data,
-                                name='id', value=_id)
-        except Exception as e:
-            self.logger.error("DB: while updating group: " + str(e))
-            return False
 
-        return True
+        # Only with scoped reads, since the column may not exist otherwise.
+        if self.scoped_group_reads:
+            data['datacenter_id'] = _id.split(':', 1)[0]
+
+        return self._write("DB: while updating group: ", ("groups", _id),
+                           self.db.insert_atom, self.keyspace, self.groups_table, data,
+                           name='id', value=_id)
 
     def delete_valet_group(self, _id):
         """Delete finished request."""
 
-        try:
-            self.db.delete_atom(self.keyspace, self.groups_table, 'id', _id)
-        except Exception as e:
-            self.logger.error("DB: while deleting valet group: " + str(e))
-            return False
-
-        return True
+        return self._write("DB: while deleting valet group: ", ("groups", _id),
+                           self.db.delete_atom, self.keyspace, self.groups_table, 'id', _id)
 
     def get_resource(self, _dc_id):
         """Get datacenter's resource."""
@@ -411,40 +540,129 @@ class DBHandler(object):
         else:
             return {}
 
-    def create_resource(self, _k, _url, _requests, _resource):
+    def create_resource(self, _k, _url, _requests, _resource, _version=None):
         """Create a new resource status."""
 
         data = {
             'id': _k,
             'url': _url,
-            'requests': json.dumps(_requests),
-            'resource': json.dumps(_resource)
+            'requests': codec.dumps(_requests),
+            'resource': codec.encode_resource(_resource, self.resource_encoding)
+        }
+        if _version is not None:
+            data['timestamp'] = _version
+        return self._write("DB: while inserting resource status: ", ("resources", _k),
+                           self.db.insert_atom, self.keyspace, self.resources_table, data)
+
+    def update_resource(self, _k, _url, _requests, _resource, _version=None):
+        """Update resource status."""
+
+        data = {
+            'id': _k,
+            'url': _url,
+            'requests': codec.dumps(_requests),
+            'resource': codec.encode_resource(_resource, self.resource_encoding)
+        }
+        if _version is not None:
+            data['timestamp'] = _version
+        return self._write("DB: while updating resource status: ", ("resources", _k),
+                           self.db.insert_atom, self.keyspace, self.resources_table, data,
+                           name='id', value=_k)
+
+    def update_resource_version(self, _k, _requests, _version):
+        """Update only pending requests and version of resource status."""
+
+        data = {
+            'id': _k,
+            'requests': codec.dumps(_requests),
+            'timestamp': _version
         }
+        return self._write("DB: while updating resource version: ", ("resources", _k),
+                           self.db.insert_atom, self.keyspace, self.resources_table, data,
+                           name='id', value=_k)
+
+    def get_resource_version(self, _dc_id):
+        """Get version and pending requests of datacenter's resource.
+
+        Read the whole resource if no table of versions is configured.
+        """
+
+        if self.resource_versions_table is None:
+            return self.get_resource(_dc_id)
+
         try:
-            self.db.insert_atom(self.keyspace, self.resources_table, data)
+            row = self.db.read_row(self.keyspace, self.resource_versions_table, "id", _dc_id)
         except Exception as e:
-            self.logger.error("DB: while inserting resource status: " + str(e))
-            return False
+            self.logger.error("DB: while reading resource version: " + str(e))
+            return None
 
-        return True
+        if len(row) > 0:
+            if "result" in row.keys():
+                if len(row["result"]) > 0:
+                    return row["result"][list(row["result"])[0]]
+                else:
+                    return {}
+            else:
+                return {}
+        else:
+            return {}
 
-    def update_resource(self, _k, _url, _requests, _resource):
-        """Update resource status."""
+    def store_resource_version(self, _k, _requests, _version):
+        """Store version and pending requests of resource status,
+
+        once the resource (or its patch) of the version is stored.
+        """
+
+        if self.resource_versions_table is None:
+            return True
 
         data = {
             'id': _k,
-            'url': _url,
-            'requests': json.dumps(_requests),
-            'resource': json.dumps(_resource)
+            'requests': codec.dumps(_requests),
+            'timestamp': _version
         }
+        return self._write("DB: while storing resource version: ", ("resources", _k),
+                           self.db.insert_atom, self.keyspace, self.resource_versions_table, data,
+                           name='id', value=_k)
+
+    def get_resource_patch(self, _k, _seq):
+        """Get a patch of resource status."""
+
+        patch_id = _k + ":" + str(_seq)
+
         try:
-            self.db.insert_atom(self.keyspace, self.resources_table, data,
-                                name='id', value=_k)
+            row = self.db.read_row(self.keyspace, self.resource_patches_table, "id", patch_id)
         except Exception as e:
-            self.logger.error("DB: while updating resource status: " + str(e))
-            return False
+            self.logger.error("DB: while reading resource patch: " + str(e))
+            return None
 
-        return True
+        if len(row) > 0:
+            if "result" in row.keys():
+                if len(row["result"]) > 0:
+                    return row["result"][list(row["result"])[0]]
+                else:
+                    return {}
+            else:
+                return {}
+        else:
+            return {}
+
+    def create_resource_patch(self, _k, _seq, _patch, _version):
+        """Create a patch of resource status.
+
+        Patches are applied in order of seq on top of the full resource.
+        """
+
+        patch_id = _k + ":" + str(_seq)
+
+        data = {
+            'id': patch_id,
+            'resource': codec.encode_resource(_patch, self.resource_encoding),
+            'timestamp': _version
+        }
+        return self._write("DB: while inserting resource patch: ", ("resources", _k),
+                           self.db.insert_atom, self.keyspace, self.resource_patches_table, data,
+                           name='id', value=patch_id)
 
     def get_stack(self, _id):
         """Get stack info."""
@@ -458,7 +676,7 @@ class DBHandler(object):
         if len(row) > 0:
             if "result" in row.keys():
                 if len(row["result"]) > 0:
-                    return row["result"][row["result"].keys()[0]]
+                    return row["result"][list(row["result"])[0]]
                 else:
                     return {}
             else:
@@ -479,30 +697,20 @@ class DBHandler(object):
             'stack_name': _name,
             'uuid': _uuid,
             'tenant_id': _tenant_id,
-            'metadata': json.dumps(_metadata),
-            'servers': json.dumps(_servers),
-            'prior_servers': json.dumps(_old_servers),
+            'metadata': codec.dumps(_metadata),
+            'servers': codec.dumps(_servers),
+            'prior_servers': codec.dumps(_old_servers),
             'state': _state,
             'prior_state': _old_state
         }
-        try:
-            self.db.insert_atom(self.keyspace, self.stacks_table, data)
-        except Exception as e:
-            self.logger.error("DB: while storing app: " + str(e))
-            return False
-
-        return True
+        return self._write("DB: while storing app: ", ("stacks", _id),
+                           self.db.insert_atom, self.keyspace, self.stacks_table, data)
 
     def delete_stack(self, _id):
         """Delete stack."""
 
-        try:
-            self.db.delete_atom(self.keyspace, self.stacks_table, 'id', _id)
-        except Exception as e:
-            self.logger.error("DB: while deleting app: " + str(e))
-            return False
-
-        return True
+        return self._write("DB: while deleting app: ", ("stacks", _id),
+                           self.db.delete_atom, self.keyspace, self.stacks_table, 'id', _id)
 
     def update_stack(self, _id, _status, _dc, _name, _uuid,
                      _tenant_id, _metadata,
@@ -517,17 +725,12 @@ class DBHandler(object):
             'stack_name': _name,
             'uuid': _uuid,
             'tenant_id': _tenant_id,
-            'metadata': json.dumps(_metadata),
-            'servers': json.dumps(_servers),
-            'prior_servers': json.dumps(_old_servers),
+            'metadata': codec.dumps(_metadata),
+            'servers': codec.dumps(_servers),
+            'prior_servers': codec.dumps(_old_servers),
             'state': _state,
             'prior_state': _old_state
         }
-        try:
-            self.db.insert_atom(self.keyspace, self.stacks_table, data,
-                                name='id', value=_id)
-        except Exception as e:
-            self.logger.error("DB: while updating stack: " + str(e))
-            return False
-
-        return True
+        return self._write("DB: while updating stack: ", ("stacks", _id),
+                           self.db.insert_atom, self.keyspace, self.stacks_table, data,
+                           name='id', value=_id)
@@ -0,0 +1,81 @@
+#
+# -------------------------------------------------------------------------
+#   Copyright (c) 2019 AT&T Intellectual Property
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# -------------------------------------------------------------------------
+#
+import threading
+
+
+class RequestIntake(object):
+    """Read requests from DB and wait for the next ones.
+
+    Polling interval adapts to the load. It is the shortest while requests
+    keep coming, and doubles on every idle round up to the longest.
+    The wait ends as soon as notify() is called, e.g., when a worker is
+    done or, in 'event' mode, when a request is inserted into the DB.
+
+    Only MemDB (i.e., valet-api in the same process) notifies inserts.
+    With MUSIC, valet-api runs apart and 'event' mode is the same as 'poll'.
+    """
+
+    def __init__(self, _dbh, _config, _logger):
+        self.dbh = _dbh
+
+        if _config is None:
+            _config = {}
+
+        self.min_interval = float(_config.get("min_interval", 1))
+        self.max_interval = float(_config.get("max_interval", 1))
+        if self.max_interval < self.min_interval:
+            self.max_interval = self.min_interval
+
+        self.interval = self.min_interval
+
+        self.mode = _config.get("mode", "poll")
+
+        self.event = threading.Event()
+
+        self.logger = _logger
+
+    def get_requests(self):
+        """Get requests from valet-api.
+
+        Notifications until now are covered by this reading, while ones
+        from now on end the next wait.
+        """
+
+        self.event.clear()
+
+        return self.dbh.get_requests()
+
+    def notify(self):
+        """Wake up the wait for the next round."""
+
+        self.event.set()
+
+    def wait(self, _busy):
+        """Wait for the next round of reading requests.
+
+        _busy is whether requests were handled in this round.
+        """
+
+        if _busy:
+            self.interval = self.min_interval
+        else:
+            self.interval = min(self.interval * 2, self.max_interval)
+
+        if self.event.wait(self.interval):
+            self.interval = self.min_interval
@@ -19,6 +19,7 @@
 #!/usr/bin/env python3
 
 
+from valet.engine.resource_manager.resources import fingerprint
 from valet.engine.resource_manager.resources.host import Host
 
 
@@ -58,6 +59,18 @@ class ComputeManager(object):
 
         return True
 
+    def set_hosts(self, _resource, _hosts):
+        """Check any inconsistency with hosts already collected from source."""
+
+        self.logger.info("set compute hosts...")
+
+        self.hosts.clear()
+        self.hosts.update(_hosts)
+
+        self._check_host_updated(_resource)
+
+        self._check_server_placements(_resource)
+
     def _check_host_updated(self, _resource):
         """Check if hosts and their properties are changed."""
 
@@ -79,6 +92,10 @@ class ComputeManager(object):
             host = self.hosts[hk]
             rhost = _resource.hosts[hk]
 
+            # Compare field by field only if capacities are changed.
+            if fingerprint.of_host(host) == fingerprint.of_host(rhost):
+                continue
+
             if self._is_host_resources_updated(host, rhost):
                 _resource.mark_host_updated(hk)
 
@@ -151,9 +168,29 @@ class ComputeManager(object):
         #        the server is placed as planned.
         change_of_placements = {}
 
+        # Hosts of which servers are the same as ones known to valet.
+        # Their servers are neither added, deleted, moved, nor updated,
+        # so only kept in unchanged_placements to find their hosts.
+        unchanged_hosts = set()
+        unchanged_placements = {}
         for hk, host in self.hosts.items():
             rhost = _resource.hosts[hk]
 
+            if fingerprint.of_servers(host.server_list) == fingerprint.of_servers(rhost.server_list):
+                unchanged_hosts.add(hk)
+
+                for s_info in host.server_list:
+                    if s_info["stack_id"] != "none":
+                        unchanged_placements[s_info["stack_id"] + ":" + s_info["name"]] = hk
+                    else:
+                        unchanged_placements[s_info["uuid"]] = hk
+
+        for hk, host in self.hosts.items():
+            if hk in unchanged_hosts:
+                continue
+
+            rhost = _resource.hosts[hk]
+
             for s_info in host.server_list:
                 if s_info["stack_id"] != "none":
                     sid = s_info["stack_id"] + ":" + s_info["name"]
@@ -171,7 +208,7 @@ class ComputeManager(object):
                     change_of_placements[sid]["host"] = hk
 
         for rhk, rhost in _resource.hosts.items():
-            if not rhost.is_available():
+            if not rhost.is_available() or rhk in unchanged_hosts:
                 continue
 
             host = self.hosts[rhk]
@@ -199,3 +236,4 @@ class ComputeManager(object):
                         self.logger.info("server (" + sid + ") is deleted")
 
         _resource.change_of_placements = change_of_placements
+        _resource.unchanged_placements = unchanged_placements
@@ -23,6 +23,8 @@ import json
 
 from copy import deepcopy
 
+from valet.engine.resource_manager.resources import fingerprint
+
 
 class MetadataManager(object):
     """Metadata Manager to maintain flavors and groups."""
@@ -58,6 +60,18 @@ class MetadataManager(object):
 
         return True
 
+    def set_groups(self, _resource, _groups):
+        """Set groups already collected from platform (e.g., nova)."""
+
+        self.logger.info("set metadata (groups)...")
+
+        self.groups.clear()
+        self.groups.update(_groups)
+
+        self._check_group_updated(_resource)
+
+        self._check_host_memberships_updated(_resource)
+
     def _check_group_updated(self, _resource):
         """Check any inconsistency for groups."""
 
@@ -114,12 +128,15 @@ class MetadataManager(object):
 
         updated = False
 
+        if fingerprint.get_fingerprint(_g.metadata) == fingerprint.get_fingerprint(_rg.metadata):
+            return updated
+
         for mdk in _g.metadata.keys():
             if mdk not in _rg.metadata.keys():
                 _rg.metadata[mdk] = _g.metadata[mdk]
                 updated = True
 
-        for rmdk in _rg.metadata.keys():
+        for rmdk in list(_rg.metadata.keys()):
             if rmdk not in _g.metadata.keys():
                 del _rg.metadata[rmdk]
                 updated = True
@@ -140,6 +157,15 @@ class MetadataManager(object):
 
         _rg = _resource.groups[_g.name]
 
+        # Members to be kept in resource, i.e., available hosts only
+        members = []
+        for hk in _g.member_hosts.keys():
+            if hk in _resource.hosts.keys() and _resource.hosts[hk].is_available():
+                members.append(hk)
+
+        if fingerprint.of_names(members) == fingerprint.of_names(_rg.member_hosts.keys()):
+            return updated
+
         for hk in _g.member_hosts.keys():
             if hk not in _rg.member_hosts.keys():
                 if hk in _resource.hosts.keys():
@@ -148,7 +174,7 @@ class MetadataManager(object):
                         updated = True
             # else not needed
 
-        for rhk in _rg.member_hosts.keys():
+        for rhk in list(_rg.member_hosts.keys()):
             if rhk not in _resource.hosts.keys() or \
                not _resource.hosts[rhk].is_available() or \
                rhk not in _g.member_hosts.keys():
@@ -162,6 +188,10 @@ class MetadataManager(object):
 
         updated = False
 
+        uuids = fingerprint.of_names(s_info.get("uuid") for s_info in _g.server_list)
+        if uuids == fingerprint.of_names(rs_info.get("uuid") for rs_info in _rg.server_list):
+            return updated
+
         for s_info in _g.server_list:
             exist = False
             for rs_info in _rg.server_list:
@@ -171,6 +201,7 @@ class MetadataManager(object):
 
             if not exist:
                 _rg.server_list.append(s_info)
+                _rg.server_index.invalidate()
                 updated = True
 
         return updated
@@ -191,7 +222,7 @@ class MetadataManager(object):
 
         for hk, host in _resource.hosts.items():
             if host.is_available():
-                for gk in host.memberships.keys():
+                for gk in list(host.memberships.keys()):
                     if gk in _resource.groups.keys():
                         g = _resource.groups[gk]
                         if g.factory != "valet":
@@ -366,6 +397,16 @@ class MetadataManager(object):
 
         return True
 
+    def set_flavors(self, _resource, _flavors):
+        """Set flavors already collected from nova."""
+
+        self.logger.info("set metadata (flavors)...")
+
+        self.flavors.clear()
+        self.flavors.update(_flavors)
+
+        self._check_flavor_update(_resource, False)
+
     def _check_flavor_update(self, _resource, _detailed):
         """Check flavor info consistency."""
 
@@ -388,6 +429,11 @@ class MetadataManager(object):
             for fk in self.flavors.keys():
                 f = self.flavors[fk]
                 rf = _resource.flavors[fk]
+
+                # Compare spec by spec only if the content is changed.
+                if fingerprint.of_flavor(f) == fingerprint.of_flavor(rf):
+                    continue
+
                 if self._is_flavor_spec_updated(f, rf):
                     rf.updated = True
 
@@ -409,7 +455,7 @@ class MetadataManager(object):
                 _rf.extra_specs[sk] = _f.extra_specs[sk]
                 spec_updated = True
 
-        for rsk in _rf.extra_specs.keys():
+        for rsk in list(_rf.extra_specs.keys()):
             if rsk not in _f.extra_specs.keys():
                 del _rf.extra_specs[rsk]
                 spec_updated = True
@@ -19,12 +19,24 @@
 #!/usr/bin/env python3
 
 
-import copy
 import re
 
+from collections import OrderedDict
+
+from valet.engine.resource_manager.resources.host import Host
 from valet.engine.resource_manager.resources.host_group import HostGroup
 
 
+# Number of host names of which layouts are kept
+CACHE_SIZE = 10000
+
+DIGIT = re.compile("[0-9]")
+
+
+def isdigit(char):
+    return "0" <= char <= "9"
+
+
 class Naming(object):
     """Using cannonical naming convention to capture datacenter layout."""
 
@@ -34,8 +46,14 @@ class Naming(object):
         self.rack_code_list = _config.get("rack_codes")
         self.host_code_list = _config.get("host_codes")
 
-    def isdigit(char):
-        return "0" <= char <= "9"
+        # Codes are tried in the configured order, so compiled one by one.
+        self.rack_codes = [(rc, re.compile(rc)) for rc in self.rack_code_list]
+        self.host_codes = [(hc, re.compile(hc)) for hc in self.host_code_list]
+
+        # Layouts of host names seen, key = host name,
+        # value = (rack_name, parsing_status) in least recently used order
+        self.cache_size = int(_config.get("cache_size", CACHE_SIZE))
+        self.layouts = OrderedDict()
 
     def get_topology(self, _datacenter, _host_groups, _hosts, _rhosts):
         """Set datacenter resource structure (racks, hosts)."""
@@ -43,7 +61,11 @@ class Naming(object):
         status = "ok"
 
         for rhk, rhost in _rhosts.items():
-            h = copy.deepcopy(rhost)
+            # Only the name and status are needed for the layout,
+            # not to copy servers and memberships of the host.
+            h = Host(rhk)
+            h.status = rhost.status
+            h.state = rhost.state
 
             (rack_name, parsing_status) = self._set_layout_by_name(rhk)
             if parsing_status != "ok":
@@ -75,6 +97,22 @@ class Naming(object):
         return status
 
     def _set_layout_by_name(self, _host_name):
+        """Get the rack name of host, memoized per host name."""
+
+        layout = self.layouts.get(_host_name)
+
+        if layout is None:
+            layout = self._parse_layout(_host_name)
+
+            self.layouts[_host_name] = layout
+            if len(self.layouts) > self.cache_size:
+                self.layouts.popitem(last=False)
+        else:
+            self.layouts.move_to_end(_host_name)
+
+        return layout
+
+    def _parse_layout(self, _host_name):
         """Set the rack-host layout, use host nameing convention.
 
         Naming convention includes
@@ -92,23 +130,20 @@ class Naming(object):
         host_name = None
 
         # To check if zone name follows the rule
-        index = 0
-        for c in _host_name:
-            if isdigit(c):
-                break
-            index += 1
-        zone_indicator = _host_name[index:]
-        if len(zone_indicator) == 0:
+        digit = DIGIT.search(_host_name)
+        if digit is None:
             return 'none', "no numberical digit in name"
+        index = digit.start()
+        zone_indicator = _host_name[index:]
 
         # To extract rack indicator
-        for rack_code in self.rack_code_list:
-            rack_index_list = [rc.start() for rc in re.finditer(rack_code, zone_indicator)]
+        for (rack_code, rack_pattern) in self.rack_codes:
+            rack_index_list = [rc.start() for rc in rack_pattern.finditer(zone_indicator)]
 
             start_of_rack_index = -1
             for rack_index in rack_index_list:
                 rack_prefix = rack_index + len(rack_code)
-                if rack_prefix > len(zone_indicator):
+                if rack_prefix >= len(zone_indicator):
                     continue
 
                 # Once rack name follows the rule
@@ -116,13 +151,13 @@ class Naming(object):
                     rack_indicator = zone_indicator[rack_prefix:]
 
                     # To extract host indicator
-                    for host_code in self.host_code_list:
-                        host_index_list = [hc.start() for hc in re.finditer(host_code, rack_indicator)]
+                    for (host_code, host_pattern) in self.host_codes:
+                        host_index_list = [hc.start() for hc in host_pattern.finditer(rack_indicator)]
 
                         start_of_host_index = -1
                         for host_index in host_index_list:
                             host_prefix = host_index + len(host_code)
-                            if host_prefix > len(rack_indicator):
+                            if host_prefix >= len(rack_indicator):
                                 continue
 
                             if isdigit(rack_indicator[host_prefix]):
@@ -20,6 +20,8 @@ import json
 import time
 import traceback
 
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
 from novaclient import client as nova_client
 
 from valet.engine.resource_manager.resources.flavor import Flavor
@@ -31,6 +33,16 @@ from valet.utils.decryption import decrypt
 # Nova API version
 VERSION = 2
 
+# Number of calls to Nova issued in parallel
+SYNC_WORKERS = 8
+
+# Number of servers listed per call
+SERVER_PAGE_SIZE = 1000
+
+# Servers changed this many seconds before the last listing are listed
+# again in changes-since mode, against clock skew between valet and Nova
+CHANGES_SINCE_MARGIN = 60
+
 
 # noinspection PyBroadException
 class NovaCompute(object):
@@ -59,6 +71,25 @@ class NovaCompute(object):
         self.admin_password = pw
         self.project = _config["nova"]["project_name"]
 
+        self._init_sync(_config.get("compute", {}))
+
+    def _init_sync(self, _compute_config):
+        """Set how resource status is collected from Nova."""
+
+        self.sync_workers = int(_compute_config.get("sync_workers", SYNC_WORKERS))
+        self.server_page_size = int(_compute_config.get("server_page_size", SERVER_PAGE_SIZE))
+        self.changes_since = _compute_config.get("server_changes_since", "false") == "true"
+
+        # Created on first sync
+        self.pool = None
+
+        # Auth url of the current nova client
+        self.auth_url = None
+
+        # Servers of the last listing in changes-since mode,
+        # key = auth url, value = (listing time, server infos keyed by uuid)
+        self.server_caches = {}
+
     def set_client(self, _auth_url):
         """Set nova client."""
 
@@ -73,6 +104,10 @@ class NovaCompute(object):
             self.last_activate_urls[_auth_url] = time.time()
 
             self.nova = self.novas[_auth_url]
+            self.auth_url = _auth_url
+
+            # List all servers again with the new client.
+            self.server_caches.pop(_auth_url, None)
             return True
         except Exception:
             self.logger.error(traceback.format_exc())
@@ -93,9 +128,103 @@ class NovaCompute(object):
             return False
 
         self.nova = self.novas[_auth_url]
+        self.auth_url = _auth_url
 
         return True
 
+    def get_resource_status(self, _flavors, _hosts, _groups):
+        """Get flavors, hosts with servers, and groups from OpenStack Nova.
+
+        The calls are independent of each other, so issued in parallel.
+        Then, results are set in the same order as calling one by one.
+        """
+
+        nova = self.nova
+        auth_url = self.auth_url
+
+        calls = {
+            "flavors": lambda: nova.flavors.list(detailed=False),
+            "private flavors": lambda: nova.flavors.list(detailed=False, is_public=False),
+            "hosts": lambda: nova.hosts.list(),
+            "hypervisors": lambda: nova.hypervisors.list(detailed=True),
+            "servers": lambda: self._get_server_infos(nova, auth_url),
+            "availability-zones": lambda: nova.availability_zones.list(detailed=True),
+            "host-aggregates": lambda: nova.aggregates.list(),
+            "server-groups": lambda: nova.server_groups.list()
+        }
+
+        (status, results) = self._call_in_parallel(calls)
+        if status != "ok":
+            return status
+
+        status = self._get_flavors(_flavors, False,
+                                   _flavor_list=results["flavors"],
+                                   _private_flavor_list=results["private flavors"])
+        if status != "ok":
+            return status
+
+        status = self._get_hosts(_hosts, _host_list=results["hosts"])
+        if status != "ok":
+            return status
+
+        status = self._get_host_details(_hosts, _host_list=results["hypervisors"])
+        if status != "ok":
+            return status
+
+        status = self.get_servers_in_hosts(_hosts, _server_infos=results["servers"])
+        if status != "ok":
+            return status
+
+        status = self._get_availability_zones(_groups, _az_list=results["availability-zones"])
+        if status != "ok":
+            return status
+
+        status = self.get_aggregates(_groups, _aggregate_list=results["host-aggregates"])
+        if status != "ok":
+            return status
+
+        status = self._get_server_groups(_groups, _server_group_list=results["server-groups"])
+        if status != "ok":
+            return status
+
+        return "ok"
+
+    def _call_in_parallel(self, _calls):
+        """Issue calls through the bounded thread pool and wait for all."""
+
+        if self.pool is None:
+            self.pool = ThreadPoolExecutor(max_workers=self.sync_workers)
+
+        futures = {}
+        for ck, call in _calls.items():
+            futures[ck] = self.pool.submit(self._call_with_retry, ck, call)
+
+        status = "ok"
+        results = {}
+
+        for ck, f in futures.items():
+            (ok, results[ck]) = f.result()
+            if not ok and status == "ok":
+                status = "error while getting " + ck + " from Nova"
+
+        return status, results
+
+    def _call_with_retry(self, _name, _call):
+        """Call up to 3 times, return (success, result)."""
+
+        count = 0
+        while True:
+            try:
+                return True, _call()
+            except Exception:
+                count += 1
+                if count == 3:
+                    self.logger.error(traceback.format_exc())
+                    return False, None
+
+                self.logger.warning("fail to get " + _name + " from Nova: try again")
+                time.sleep(1)
+
     def get_groups(self, _groups):
         """Get server-groups, availability-zones and host-aggregates
 
@@ -119,15 +248,16 @@ class NovaCompute(object):
 
         return "ok"
 
-    def _get_availability_zones(self, _groups):
+    def _get_availability_zones(self, _groups, _az_list=None):
         """Set AZs."""
 
         try:
             # TODO: try hosts_list = self.nova.hosts.list()?
 
-            az_list = self.nova.availability_zones.list(detailed=True)
+            if _az_list is None:
+                _az_list = self.nova.availability_zones.list(detailed=True)
 
-            for a in az_list:
+            for a in _az_list:
                 if a.zoneState["available"]:
                     # NOTE(Gueyoung): add 'az:' to avoid conflict with
                     # Host-Aggregate name.
@@ -155,13 +285,14 @@ class NovaCompute(object):
 
         return "ok"
 
-    def get_aggregates(self, _groups):
+    def get_aggregates(self, _groups, _aggregate_list=None):
         """Set host-aggregates and corresponding hosts."""
 
         try:
-            aggregate_list = self.nova.aggregates.list()
+            if _aggregate_list is None:
+                _aggregate_list = self.nova.aggregates.list()
 
-            for a in aggregate_list:
+            for a in _aggregate_list:
                 if not a.deleted:
                     aggregate = Group(a.name)
 
@@ -248,14 +379,15 @@ class NovaCompute(object):
 
         return "ok"
 
-    def _get_server_groups(self, _groups):
+    def _get_server_groups(self, _groups, _server_group_list=None):
         """Set host-aggregates and corresponding hosts."""
 
         try:
             # NOTE(Gueyoung): novaclient v2.18.0 does not have 'all_projects=True' param.
-            server_group_list = self.nova.server_groups.list()
+            if _server_group_list is None:
+                _server_group_list = self.nova.server_groups.list()
 
-            for g in server_group_list:
+            for g in _server_group_list:
                 server_group = Group(g.name)
 
                 server_group.uuid = g.id
@@ -316,13 +448,14 @@ class NovaCompute(object):
         return "ok"
 
     # TODO: Deprecated as of version 2.43
-    def _get_hosts(self, _hosts):
+    def _get_hosts(self, _hosts, _host_list=None):
         """Init hosts."""
 
         try:
-            host_list = self.nova.hosts.list()
+            if _host_list is None:
+                _host_list = self.nova.hosts.list()
 
-            for h in host_list:
+            for h in _host_list:
                 if h.service == "compute":
                     host = Host(h.host_name)
                     _hosts[host.name] = host
@@ -332,15 +465,16 @@ class NovaCompute(object):
 
         return "ok"
 
-    def _get_host_details(self, _hosts):
+    def _get_host_details(self, _hosts, _host_list=None):
         """Get each host's resource status."""
 
         try:
             # TODO: marker: the last UUID of return, limit: the number of hosts returned.
             # with_servers=True
-            host_list = self.nova.hypervisors.list(detailed=True)
+            if _host_list is None:
+                _host_list = self.nova.hypervisors.list(detailed=True)
 
-            for hv in host_list:
+            for hv in _host_list:
                 if hv.service['host'] in _hosts.keys():
                     if hv.status != "enabled" or hv.state != "up":
                         del _hosts[hv.service['host']]
@@ -367,65 +501,132 @@ class NovaCompute(object):
 
         return "ok"
 
-    def get_servers_in_hosts(self, _hosts):
+    def get_servers_in_hosts(self, _hosts, _server_infos=None):
         """Set servers in hosts."""
 
-        (status, server_list) = self.get_server_detail()
-        if status != "ok":
-            self.logger.error(status)
-            return status
+        if _server_infos is None:
+            try:
+                _server_infos = self._get_server_infos(self.nova, self.auth_url)
+            except Exception:
+                self.logger.error(traceback.format_exc())
+                return "error while getting server detail from nova"
+
+        for _, s_info in _server_infos.items():
+            if s_info["host"] in _hosts.keys():
+                host = _hosts[s_info["host"]]
 
-        for s in server_list:
-            s_info = {}
+                # Copied not to change the cached ones of changes-since mode
+                host.server_list.append(dict(s_info))
 
-            if "stack-id" in s.metadata.keys():
-                s_info["stack_id"] = s.metadata["stack-id"]
-            else:
-                s_info["stack_id"] = "none"
-            s_info["stack_name"] = "none"
+        return "ok"
 
-            s_info["uuid"] = s.id
+    def _get_server_infos(self, _nova, _auth_url):
+        """Get the info of all servers in the region, key = uuid.
 
-            s_info["orch_id"] = "none"
-            s_info["name"] = s.name
+        Servers are listed page by page, and each page is turned into
+        server infos before the next one, not to hold all of them at once.
+        In changes-since mode, only servers changed since the last listing
+        (including deleted ones) are listed and applied to it.
+        """
 
-            s_info["flavor_id"] = s.flavor["id"]
+        options = {"all_tenants": 1}
 
-            if "vcpus" in s.flavor.keys():
-                s_info["vcpus"] = s.flavor["vcpus"]
-                s_info["mem"] = s.flavor["ram"]
-                s_info["disk"] = s.flavor["disk"]
-                s_info["disk"] += s.flavor["ephemeral"]
-                s_info["disk"] += s.flavor["swap"] / float(1024)
-            else:
-                s_info["vcpus"] = -1
-                s_info["mem"] = -1
-                s_info["disk"] = -1
+        cache = None
+        if self.changes_since:
+            cache = self.server_caches.get(_auth_url)
 
-            s_info["numa"] = "none"
+        begin_time = datetime.utcnow()
 
-            try:
-                s_info["image_id"] = s.image["id"]
-            except TypeError:
-                self.logger.warning("In get_servers_in_hosts, expected s.image to have id tag, but it's actually " + s.image)
-                s_info["image_id"] = s.image
+        if cache is None:
+            server_infos = {}
+        else:
+            (last_time, last_infos) = cache
 
-            s_info["tenant_id"] = s.tenant_id
+            # Applied to a copy, so that a failed listing leaves the cache.
+            server_infos = dict(last_infos)
 
-            s_info["state"] = "created"
-            s_info["status"] = "valid"
+            since = last_time - timedelta(seconds=CHANGES_SINCE_MARGIN)
+            options["changes-since"] = since.isoformat()
 
-            s_info["host"] = s.__getattr__("OS-EXT-SRV-ATTR:host")
+        # Page by marker and limit (python-novaclient 2.18.0 does not page by
+        # itself). Nova may return fewer servers than the limit per page
+        # (osapi_max_limit), so it is done only when a page is empty.
+        count = 0
+        marker = None
+        while True:
+            page = _nova.servers.list(detailed=True, search_opts=options,
+                                      marker=marker, limit=self.server_page_size)
 
-            # s_info["power_state"] = s.__getattr__("OS-EXT-STS:power_state")
-            # s_info["vm_state"] = s.__getattr__("OS-EXT-STS:vm_state")
-            # s_info["task_state"] = s.__getattr__("OS-EXT-STS:task_state")
+            if len(page) == 0:
+                break
 
-            if s_info["host"] in _hosts.keys():
-                host = _hosts[s_info["host"]]
-                host.server_list.append(s_info)
+            for s in page:
+                if getattr(s, "status", None) == "DELETED":
+                    server_infos.pop(s.id, None)
+                else:
+                    server_infos[s.id] = self._get_server_info(s)
 
-        return "ok"
+            count += len(page)
+
+            marker = page[-1].id
+
+        if self.changes_since:
+            self.server_caches[_auth_url] = (begin_time, server_infos)
+
+            if cache is not None:
+                self.logger.debug(str(count) + " servers changed since the last listing")
+
+        return server_infos
+
+    def _get_server_info(self, _s):
+        """Get server info from server listed by Nova."""
+
+        s_info = {}
+
+        if "stack-id" in _s.metadata.keys():
+            s_info["stack_id"] = _s.metadata["stack-id"]
+        else:
+            s_info["stack_id"] = "none"
+        s_info["stack_name"] = "none"
+
+        s_info["uuid"] = _s.id
+
+        s_info["orch_id"] = "none"
+        s_info["name"] = _s.name
+
+        s_info["flavor_id"] = _s.flavor["id"]
+
+        if "vcpus" in _s.flavor.keys():
+            s_info["vcpus"] = _s.flavor["vcpus"]
+            s_info["mem"] = _s.flavor["ram"]
+            s_info["disk"] = _s.flavor["disk"]
+            s_info["disk"] += _s.flavor["ephemeral"]
+            s_info["disk"] += _s.flavor["swap"] / float(1024)
+        else:
+            s_info["vcpus"] = -1
+            s_info["mem"] = -1
+            s_info["disk"] = -1
+
+        s_info["numa"] = "none"
+
+        try:
+            s_info["image_id"] = _s.image["id"]
+        except TypeError:
+            self.logger.warning("In get_servers_in_hosts, expected s.image to have id tag, but it's actually " + _s.image)
+            s_info["image_id"] = _s.image
+
+        s_info["tenant_id"] = _s.tenant_id
+
+        s_info["state"] = "created"
+        s_info["status"] = "valid"
+
+        s_info["host"] = _s.__getattr__("OS-EXT-SRV-ATTR:host")
+
+        # s_info["power_state"] = _s.__getattr__("OS-EXT-STS:power_state")
+        # s_info["vm_state"] = _s.__getattr__("OS-EXT-STS:vm_state")
+        # s_info["task_state"] = _s.__getattr__("OS-EXT-STS:task_state")
+
+        return s_info
 
     def get_server_detail(self, project_id=None, host_name=None, server_name=None, uuid=None):
         """Get the detail of server with search by option."""
@@ -472,13 +673,14 @@ class NovaCompute(object):
 
         return result_status
 
-    def _get_flavors(self, _flavors, _detailed):
+    def _get_flavors(self, _flavors, _detailed, _flavor_list=None, _private_flavor_list=None):
         """Get a list of all flavors."""
 
         try:
-            flavor_list = self.nova.flavors.list(detailed=_detailed)
+            if _flavor_list is None:
+                _flavor_list = self.nova.flavors.list(detailed=_detailed)
 
-            for f in flavor_list:
+            for f in _flavor_list:
                 flavor = self._set_flavor(f, _detailed)
                 _flavors[flavor.name] = flavor
         except Exception:
@@ -487,9 +689,10 @@ class NovaCompute(object):
 
         # To get non-public flavors.
         try:
-            flavor_list = self.nova.flavors.list(detailed=_detailed, is_public=False)
+            if _private_flavor_list is None:
+                _private_flavor_list = self.nova.flavors.list(detailed=_detailed, is_public=False)
 
-            for f in flavor_list:
+            for f in _private_flavor_list:
                 if f.name not in _flavors.keys():
                     flavor = self._set_flavor(f, _detailed)
                     _flavors[flavor.name] = flavor
@@ -21,12 +21,15 @@ import six
 import time
 
 from valet.engine.app_manager.group import LEVEL
+from valet.engine.db_connect.locks import now
 from valet.engine.resource_manager.resources.datacenter import Datacenter
 from valet.engine.resource_manager.resources.flavor import Flavor
 from valet.engine.resource_manager.resources.group import Group
 from valet.engine.resource_manager.resources.host import Host
 from valet.engine.resource_manager.resources.host_group import HostGroup
 from valet.engine.resource_manager.resources.numa import NUMA
+from valet.engine.resource_manager.resources.server_index import get_keys
+from valet.utils import codec
 
 
 class Resource(object):
@@ -50,6 +53,11 @@ class Resource(object):
 
         self.change_of_placements = {}
 
+        # Servers of hosts unchanged in the last sync, which are left out
+        # of change_of_placements.
+        # key = server id as in change_of_placements, value = host name
+        self.unchanged_placements = {}
+
         self.groups = {}
         self.flavors = {}
 
@@ -67,6 +75,21 @@ class Resource(object):
         # If exist, do NOT sync with platform for the next request.
         self.pending_requests = []
 
+        # Version (timestamp) of the resource record this status is based on.
+        # Kept resident across requests only while stored is True.
+        self.version = None
+        self.stored = False
+
+        # Number of patches stored on top of the full resource,
+        # keys of stored resources to find deleted ones, and keys of
+        # resources changed after stored (e.g., pruned) to be in next patch.
+        self.patch_seq = 0
+        self.stored_keys = None
+        self.unstored_keys = None
+
+        # When the last sync with platform began (in seconds), 0 if never.
+        self.sync_time = 0
+
         self.logger = _logger
 
     def set_config(self, _cpu_ratio, _ram_ratio, _disk_ratio):
@@ -77,6 +100,29 @@ class Resource(object):
     def set_group_rules(self, _rules):
         self.group_rules = _rules
 
+        # Re-link valet groups to the latest rule objects.
+        for _, g in self.groups.items():
+            if g.factory == "valet" and g.rule is not None:
+                if g.rule.rule_id in _rules.keys():
+                    g.rule = _rules[g.rule.rule_id]
+
+    def is_current(self, _dcr):
+        """Check if this status is same with the resource record in DB."""
+
+        if not self.stored or self.version is None:
+            return False
+
+        if _dcr is None or len(_dcr) == 0:
+            return False
+
+        if _dcr.get("timestamp") != self.version:
+            return False
+
+        if codec.loads(_dcr["requests"]) != self.pending_requests:
+            return False
+
+        return True
+
     def load_resource_from_db(self):
         """Load datacenter's resource info from DB.
 
@@ -86,7 +132,7 @@ class Resource(object):
         self.logger.info("load datacenter resource info from DB")
 
         # Load Valet groups first.
-        valet_group_list = self.dbh.get_valet_groups()
+        valet_group_list = self.dbh.get_valet_groups(self.datacenter_id)
         if valet_group_list is None:
             return None
 
@@ -97,9 +143,9 @@ class Resource(object):
 
             if dc_id[0] == self.datacenter_id:
                 if vg["rule_id"] in self.group_rules.keys():
-                    vg["metadata"] = json.loads(vg["metadata"])
-                    vg["server_list"] = json.loads(vg["server_list"])
-                    vg["member_hosts"] = json.loads(vg["member_hosts"])
+                    vg["metadata"] = codec.loads(vg["metadata"])
+                    vg["server_list"] = codec.loads(vg["server_list"])
+                    vg["member_hosts"] = codec.loads(vg["member_hosts"])
                     vg["group_type"] = vg["type"]
 
                     valet_groups[vgk] = vg
@@ -116,11 +162,16 @@ class Resource(object):
         if self.datacenter_url == "none":
             self.datacenter_url = dcr["url"]
 
-        pending_requests = json.loads(dcr["requests"])
+        self.version = dcr.get("timestamp")
+
+        pending_requests = codec.loads(dcr["requests"])
         for req in pending_requests:
             self.pending_requests.append(req)
 
-        resource = json.loads(dcr["resource"])
+        resource = codec.decode_resource(dcr["resource"])
+
+        if self._apply_patches(resource) is None:
+            return None
 
         groups = resource.get("groups")
         if groups:
@@ -185,7 +236,7 @@ class Resource(object):
                     host.host_group = self.host_groups[pk]
 
         for _, g in self.groups.items():
-            for hk in g.member_hosts.keys():
+            for hk in list(g.member_hosts.keys()):
                 if hk not in self.hosts.keys() and \
                    hk not in self.host_groups.keys():
                     del g.member_hosts[hk]
@@ -194,6 +245,39 @@ class Resource(object):
 
         return "ok"
 
+    def _apply_patches(self, _resource):
+        """Apply stored patches in order on top of the full resource."""
+
+        self.patch_seq = 0
+        if self.version is not None and ":" in self.version:
+            self.patch_seq = int(self.version.split(":")[1])
+
+        for seq in range(1, self.patch_seq + 1):
+            pr = self.dbh.get_resource_patch(self.datacenter_id, seq)
+            if pr is None:
+                return None
+            elif len(pr) == 0:
+                self.logger.error("no resource patch " + str(seq) + " for datacenter = " + self.datacenter_id)
+                return None
+
+            patch = codec.decode_resource(pr["resource"])
+
+            for rt in ("flavors", "groups", "hosts", "host_groups"):
+                if _resource.get(rt) is None:
+                    _resource[rt] = {}
+
+                for rk, r in patch.get(rt, {}).items():
+                    _resource[rt][rk] = r
+
+                for rk in patch["deleted"].get(rt, []):
+                    if rk in _resource[rt].keys():
+                        del _resource[rt][rk]
+
+            if "datacenter" in patch.keys():
+                _resource["datacenter"] = patch["datacenter"]
+
+        return "ok"
+
     def _load_groups(self, _groups):
         """Take JSON group data as defined in /resources/group and
            create Group instance.
@@ -515,7 +599,7 @@ class Resource(object):
 
         host = None
 
-        if len(self.change_of_placements) > 0:
+        if len(self.change_of_placements) > 0 or len(self.unchanged_placements) > 0:
             if _s_info["stack_id"] != "none":
                 sid = _s_info["stack_id"] + ":" + _s_info["name"]
             else:
@@ -530,6 +614,8 @@ class Resource(object):
 
                 if host_name is not None:
                     host = self.hosts[host_name]
+            elif sid in self.unchanged_placements.keys():
+                host = self.hosts[self.unchanged_placements[sid]]
         else:
             for _, h in self.hosts.items():
                 if h.has_server(_s_info):
@@ -590,7 +676,13 @@ class Resource(object):
                 old_host.remove_server(old_info)
 
                 new_host.add_server(old_info)
+
+                keys = get_keys(old_info)
                 new_host.update_server(s_info)
+                if get_keys(old_info) != keys:
+                    # Groups of old host still hold it until regrouped.
+                    self._invalidate_server_indexes(old_host)
+                    self._invalidate_server_indexes(new_host)
 
                 self.mark_host_updated(change.get("new_host"))
                 self.mark_host_updated(change.get("old_host"))
@@ -688,13 +780,38 @@ class Resource(object):
                                 cell = host.NUMA.deduct_server_resources(s_info)
                                 s_info["numa"] = cell
 
+                old_info = host.get_server_info(s_info)
+                keys = None
+                if old_info is not None:
+                    keys = get_keys(old_info)
+
                 new_info = host.update_server(s_info)
 
                 if new_info is not None:
+                    if get_keys(new_info) != keys:
+                        self._invalidate_server_indexes(host)
+
                     self.mark_host_updated(change.get("host"))
 
         return True
 
+    def _invalidate_server_indexes(self, _host):
+        """Rebuild lookups of servers in the groups of the host on next use.
+
+        Called when the identity of a server in the host is changed,
+        since its info is shared by the groups.
+        """
+
+        for gk in _host.memberships.keys():
+            if gk in self.groups.keys():
+                self.groups[gk].server_index.invalidate()
+
+        if isinstance(_host, Host) and _host.host_group is not None:
+            self._invalidate_server_indexes(_host.host_group)
+        elif isinstance(_host, HostGroup) and _host.parent_resource is not None:
+            if isinstance(_host.parent_resource, HostGroup):
+                self._invalidate_server_indexes(_host.parent_resource)
+
     def update_server_grouping(self, change_of_placements=None, new_groups=None):
         """Update group member_hosts and hosts' memberships
 
@@ -834,7 +951,7 @@ class Resource(object):
     def get_groups_of_server(self, _host, _s_info, _group_list):
         """Get groups where the server is assigned."""
 
-        for gk in _host.memberships.keys():
+        for gk in list(_host.memberships.keys()):
             if gk not in self.groups.keys() or self.groups[gk].status != "enabled":
                 del _host.memberships[gk]
                 if isinstance(_host, Host):
@@ -912,7 +1029,7 @@ class Resource(object):
     def _remove_server_from_groups(self, _host, _s_info):
         """Remove server from related groups."""
 
-        for gk in _host.memberships.keys():
+        for gk in list(_host.memberships.keys()):
             if gk not in self.groups.keys() or self.groups[gk].status != "enabled":
                 del _host.memberships[gk]
 
@@ -969,7 +1086,7 @@ class Resource(object):
     def _update_server_in_groups(self, _host, _s_info):
         """Update server info in groups."""
 
-        for gk in _host.memberships.keys():
+        for gk in list(_host.memberships.keys()):
             if gk not in self.groups.keys() or self.groups[gk].status != "enabled":
                 del _host.memberships[gk]
                 if isinstance(_host, Host):
@@ -1079,7 +1196,7 @@ class Resource(object):
     def _manage_dynamic_host_aggregates(self):
         """Create, delete, or update Host-Aggregates after placement decisions."""
 
-        for gk in self.groups.keys():
+        for gk in list(self.groups.keys()):
             g = self.groups[gk]
             if g.group_type == "exclusivity" and g.status == "enabled":
                 aggr_name = "valet:" + g.name
@@ -1100,7 +1217,7 @@ class Resource(object):
                             if status != "ok":
                                 self.logger.warning("error while updating dynamic host-aggregate")
 
-        for gk in self.groups.keys():
+        for gk in list(self.groups.keys()):
             g = self.groups[gk]
             if g.group_type == "aggr" and g.status == "enabled":
                 if g.name.startswith("valet:"):
@@ -1116,7 +1233,7 @@ class Resource(object):
                                 self.logger.warning("error while removing dynamic host-aggregate")
                         else:
                             ex_group = self.groups[ex_group_name]
-                            for hk in g.member_hosts.keys():
+                            for hk in list(g.member_hosts.keys()):
                                 if hk not in ex_group.member_hosts.keys():
                                     # Remove host from Host-Aggregate.
                                     status = self._remove_host_from_exclusivity_aggregate(g,
@@ -1271,7 +1388,7 @@ class Resource(object):
     def _remove_exclusivity_aggregate(self, _group):
         """Remove dynamic Host-Aggregate."""
 
-        for hk in _group.member_hosts.keys():
+        for hk in list(_group.member_hosts.keys()):
             host = self.hosts[hk]
 
             status = self._remove_host_from_exclusivity_aggregate(_group, host)
@@ -1328,17 +1445,29 @@ class Resource(object):
         return status
 
     def sync_with_platform(self, store=False):
-        """Communicate with platform (e.g., nova) to get resource status.
-
-        Due to dependencies between resource types,
-        keep the following order of process.
-        """
+        """Communicate with platform (e.g., nova) to get resource status."""
 
         if len(self.pending_requests) > 0:
             return True
 
+        status = self.get_platform_status()
+        if status is None:
+            return False
+
+        return self.set_platform_status(status, store=store)
+
+    def get_platform_status(self):
+        """Get resource status from platform (e.g., nova).
+
+        Only the platform is accessed, so that this resource is
+        not changed until set_platform_status().
+        Return (begin time, flavors, hosts, groups) or None if failed.
+        """
+
         self.logger.info("load data from platform (e.g., nova)")
 
+        begin_time = time.time()
+
         # Set the platorm client lib (e.g., novaclient).
         if not self.metadata.source.valid_client(self.datacenter_url):
             count = 0
@@ -1351,52 +1480,43 @@ class Resource(object):
                     break
             if count == 3:
                 self.logger.error("fail to set novaclient")
-                return False
+                return None
+
+        # Get flavors, hosts with servers, and groups at once.
+        # Calls to platform are made in parallel, each retried on failure.
+        flavors = {}
+        hosts = {}
+        groups = {}
+        status = self.metadata.source.get_resource_status(flavors, hosts, groups)
+        if status != "ok":
+            self.logger.error(status)
+            return None
 
-        count = 0
-        while count < 3:
-            # Set each flavor and its metadata.
-            if not self.metadata.get_flavors(self):
-                self.logger.warning("fail to get flavors: try again")
-                count += 1
-                time.sleep(1)
-            else:
-                break
-        if count == 3:
-            self.logger.error("fail to get flavors")
-            return False
+        return (begin_time, flavors, hosts, groups)
 
-        count = 0
-        while count < 3:
-            # Set each compute host and servers information.
-            if not self.compute.get_hosts(self):
-                self.logger.warning("fail to get hosts: try again")
-                count += 1
-                time.sleep(1)
-            else:
-                break
-        if count == 3:
-            self.logger.error("fail to get hosts")
-            return False
+    def set_platform_status(self, _status, store=False):
+        """Set resource status got from platform.
+
+        Due to dependencies between resource types,
+        keep the following order of process.
+        """
+
+        (begin_time, flavors, hosts, groups) = _status
+
+        # Set each flavor and its metadata.
+        self.metadata.set_flavors(self, flavors)
+
+        # Set each compute host and servers information.
+        self.compute.set_hosts(self, hosts)
 
         # TODO(Gueyoung): need to every time?
         # Set the layout between each compute host and rack.
         if not self.topology.get_topology(self):
             return False
 
-        count = 0
-        while count < 3:
-            # Set the availability-zone, host-aggregate, and server-group
-            # of each compute host.
-            if not self.metadata.get_groups(self):
-                self.logger.warning("fail to get groups: try again")
-                count += 1
-                time.sleep(1)
-            else:
-                break
-        if count == 3:
-            self.logger.error("fail to get groups")
-            return False
+        # Set the availability-zone, host-aggregate, and server-group
+        # of each compute host.
+        self.metadata.set_groups(self, groups)
 
         # Update total capacities of each host.
         # Triggered by overcommit ratio update or newly added.
@@ -1422,6 +1542,8 @@ class Resource(object):
         # Update racks (and clusters) and datacenter based on host change.
         self.update_resource()
 
+        self.sync_time = begin_time
+
         # TODO: If peoridic batches to collect data from platform is activated,
         # should check if there is any update before storing data into DB.
         if store:
@@ -1481,32 +1603,6 @@ class Resource(object):
     def store_resource(self, opt=None, req_id=None):
         """Store resource status into DB."""
 
-        flavor_updates = {}
-        group_updates = {}
-        host_updates = {}
-        host_group_updates = {}
-
-        # Do not store disbaled resources.
-
-        for fk, flavor in self.flavors.items():
-            # TODO(Gueyoung): store disabled flavor?
-            flavor_updates[fk] = flavor.get_json_info()
-
-        for gk, group in self.groups.items():
-            if group.status == "enabled":
-                if group.factory != "valet":
-                    group_updates[gk] = group.get_json_info()
-
-        for hk, host in self.hosts.items():
-            if host.is_available():
-                host_updates[hk] = host.get_json_info()
-
-        for hgk, host_group in self.host_groups.items():
-            if host_group.is_available():
-                host_group_updates[hgk] = host_group.get_json_info()
-
-        datacenter_update = self.datacenter.get_json_info()
-
         # If there is pending requests (i.e., not confirmed nor rollbacked),
         # do NOT sync with platform when dealing with new request.
         # Here, add/remove request from/to pending list
@@ -1520,36 +1616,75 @@ class Resource(object):
                         self.pending_requests.remove(rid)
                         break
 
-        json_update = {'flavors': flavor_updates, 'groups': group_updates, 'hosts': host_updates,
-                       'host_groups': host_group_updates, 'datacenter': datacenter_update}
+        self.stored = False
 
-        if self.new:
-            if not self.dbh.create_resource(self.datacenter_id,
-                                            self.datacenter_url,
-                                            self.pending_requests,
-                                            json_update):
-                return False
+        stored_keys = self._get_stored_keys()
+
+        patch_limit = self.dbh.resource_patch_limit
+        if self.new or self.stored_keys is None or self.patch_seq >= patch_limit:
+            # Store the full resource, which drops all prior patches.
+            json_update = self.get_json_update()
+
+            patch_seq = 0
+            version = str(now()) + ":" + str(patch_seq)
+
+            if self.new:
+                if not self.dbh.create_resource(self.datacenter_id,
+                                                self.datacenter_url,
+                                                self.pending_requests,
+                                                json_update,
+                                                version):
+                    return False
+            else:
+                if not self.dbh.update_resource(self.datacenter_id,
+                                                self.datacenter_url,
+                                                self.pending_requests,
+                                                json_update,
+                                                version):
+                    return False
         else:
-            if not self.dbh.update_resource(self.datacenter_id,
-                                            self.datacenter_url,
-                                            self.pending_requests,
-                                            json_update):
+            # Store only changed resources as the next patch.
+            patch = self._get_patch(stored_keys)
+
+            json_update = patch
+            if patch is None:
+                json_update = {}
+
+            patch_seq = self.patch_seq
+            if patch is not None:
+                patch_seq += 1
+            version = str(now()) + ":" + str(patch_seq)
+
+            if patch is not None:
+                if not self.dbh.create_resource_patch(self.datacenter_id, patch_seq, patch, version):
+                    return False
+
+            if not self.dbh.update_resource_version(self.datacenter_id,
+                                                    self.pending_requests,
+                                                    version):
                 return False
 
+        if not self.dbh.store_resource_version(self.datacenter_id, self.pending_requests, version):
+            return False
+
         if self.new:
             self.logger.debug("new datacenter = " + self.datacenter_id)
             self.logger.debug("    url = " + self.datacenter_url)
         else:
             self.logger.debug("updated datacenter = " + self.datacenter_id)
             self.logger.debug("        url = " + self.datacenter_url)
-        self.logger.debug("region = " + json.dumps(json_update['datacenter'], indent=4))
-        self.logger.debug("racks = " + json.dumps(json_update['host_groups'], indent=4))
-        self.logger.debug("hosts = " + json.dumps(json_update['hosts'], indent=4))
-        self.logger.debug("groups = " + json.dumps(json_update['groups'], indent=4))
-        self.logger.debug("flavors = ")
-        for fk, f_info in json_update['flavors'].items():
-            if f_info["vCPUs"] > 0:
-                self.logger.debug(json.dumps(f_info, indent=4))
+
+        # Dump the whole resource only if enabled, since it is large.
+        log_payload = self.logger.is_payload_enabled()
+        if log_payload:
+            self.logger.debug("region = " + json.dumps(json_update.get('datacenter', {}), indent=4))
+            self.logger.debug("racks = " + json.dumps(json_update.get('host_groups', {}), indent=4))
+            self.logger.debug("hosts = " + json.dumps(json_update.get('hosts', {}), indent=4))
+            self.logger.debug("groups = " + json.dumps(json_update.get('groups', {}), indent=4))
+            self.logger.debug("flavors = ")
+            for fk, f_info in json_update.get('flavors', {}).items():
+                if f_info["vCPUs"] > 0:
+                    self.logger.debug(json.dumps(f_info, indent=4))
 
         updated_valet_groups = {}
         new_valet_groups = {}
@@ -1570,20 +1705,204 @@ class Resource(object):
                 return False
 
             self.logger.debug("new valet group = " + gk)
-            self.logger.debug("info = " + json.dumps(g_info, indent=4))
+            if log_payload:
+                self.logger.debug("info = " + json.dumps(g_info, indent=4))
 
         for gk, g_info in updated_valet_groups.items():
             if not self.dbh.update_valet_group(gk, g_info):
                 return False
 
             self.logger.debug("updated valet group = " + gk)
-            self.logger.debug("info = " + json.dumps(g_info, indent=4))
+            if log_payload:
+                self.logger.debug("info = " + json.dumps(g_info, indent=4))
 
         for gk, g_info in deleted_valet_groups.items():
             if not self.dbh.delete_valet_group(gk):
                 return False
 
             self.logger.debug("deleted valet group = " + gk)
-            self.logger.debug("info = " + json.dumps(g_info, indent=4))
+            if log_payload:
+                self.logger.debug("info = " + json.dumps(g_info, indent=4))
+
+        self.patch_seq = patch_seq
+        self.stored_keys = stored_keys
+
+        self._set_stored(version)
 
         return True
+
+    def get_json_update(self):
+        """Get all resources to be stored as JSON."""
+
+        flavor_updates = {}
+        group_updates = {}
+        host_updates = {}
+        host_group_updates = {}
+
+        # Do not store disbaled resources.
+
+        for fk, flavor in self.flavors.items():
+            # TODO(Gueyoung): store disabled flavor?
+            flavor_updates[fk] = flavor.get_json_info()
+
+        for gk, group in self.groups.items():
+            if group.status == "enabled":
+                if group.factory != "valet":
+                    group_updates[gk] = group.get_json_info()
+
+        for hk, host in self.hosts.items():
+            if host.is_available():
+                host_updates[hk] = host.get_json_info()
+
+        for hgk, host_group in self.host_groups.items():
+            if host_group.is_available():
+                host_group_updates[hgk] = host_group.get_json_info()
+
+        datacenter_update = self.datacenter.get_json_info()
+
+        return {'flavors': flavor_updates, 'groups': group_updates, 'hosts': host_updates,
+                'host_groups': host_group_updates, 'datacenter': datacenter_update}
+
+    def _get_stored_keys(self):
+        """Get keys of resources to be stored (see get_json_update)."""
+
+        return {"flavors": set(self.flavors.keys()),
+                "groups": set(gk for gk, g in self.groups.items()
+                              if g.status == "enabled" and g.factory != "valet"),
+                "hosts": set(hk for hk, h in self.hosts.items() if h.is_available()),
+                "host_groups": set(hgk for hgk, hg in self.host_groups.items()
+                                   if hg.is_available())}
+
+    def _get_patch(self, _keys):
+        """Get changed and deleted resources since the last store.
+
+        Changed resources are the ones marked as updated (or new) and the
+        ones not stored before, so that only these are turned into JSON.
+        Return None if nothing changed.
+        """
+
+        changed = False
+
+        patch = {"deleted": {}}
+
+        resources = {"flavors": self.flavors, "groups": self.groups,
+                     "hosts": self.hosts, "host_groups": self.host_groups}
+
+        for rt, rs in resources.items():
+            patch[rt] = {}
+            patch["deleted"][rt] = []
+
+            prior_keys = self.stored_keys[rt]
+            unstored_keys = self.unstored_keys[rt]
+
+            for rk in _keys[rt]:
+                r = rs[rk]
+                if r.updated or rk not in prior_keys or rk in unstored_keys or \
+                   (rt == "groups" and r.new):
+                    patch[rt][rk] = r.get_json_info()
+                    changed = True
+
+            for rk in prior_keys:
+                if rk not in _keys[rt]:
+                    patch["deleted"][rt].append(rk)
+                    changed = True
+
+        if self.datacenter.updated or self.unstored_keys["datacenter"]:
+            patch["datacenter"] = self.datacenter.get_json_info()
+            changed = True
+
+        if not changed:
+            return None
+
+        return patch
+
+    def _set_stored(self, _version):
+        """Make this status same as the one loaded from the stored record.
+
+        Drop what is not stored (disabled or unavailable resources) and
+        clear all update marks, so that it can be reused by next request.
+        Resources changed by dropping are kept to be in next patch.
+        """
+
+        unstored_keys = {"flavors": set(), "groups": set(), "hosts": set(),
+                         "host_groups": set(), "datacenter": False}
+
+        for gk in list(self.groups.keys()):
+            if self.groups[gk].status != "enabled":
+                del self.groups[gk]
+
+        for hk in list(self.hosts.keys()):
+            if not self.hosts[hk].is_available():
+                del self.hosts[hk]
+
+        for hgk in list(self.host_groups.keys()):
+            if not self.host_groups[hgk].is_available():
+                del self.host_groups[hgk]
+
+        for rk in list(self.datacenter.resources.keys()):
+            if rk not in self.hosts.keys() and rk not in self.host_groups.keys():
+                del self.datacenter.resources[rk]
+                unstored_keys["datacenter"] = True
+
+        for _, hg in self.host_groups.items():
+            hg.updated = False
+
+            if hg.parent_resource is not None and \
+               isinstance(hg.parent_resource, HostGroup) and \
+               hg.parent_resource.name not in self.host_groups.keys():
+                hg.parent_resource = None
+                unstored_keys["host_groups"].add(hg.name)
+
+            for ck in list(hg.child_resources.keys()):
+                if ck not in self.hosts.keys() and ck not in self.host_groups.keys():
+                    del hg.child_resources[ck]
+                    unstored_keys["host_groups"].add(hg.name)
+
+            for gk in list(hg.memberships.keys()):
+                if gk not in self.groups.keys():
+                    del hg.memberships[gk]
+                    unstored_keys["host_groups"].add(hg.name)
+
+        for _, host in self.hosts.items():
+            host.updated = False
+
+            if host.host_group is not None and \
+               isinstance(host.host_group, HostGroup) and \
+               host.host_group.name not in self.host_groups.keys():
+                host.host_group = None
+                unstored_keys["hosts"].add(host.name)
+
+            for gk in list(host.memberships.keys()):
+                if gk not in self.groups.keys():
+                    del host.memberships[gk]
+                    unstored_keys["hosts"].add(host.name)
+
+        for _, g in self.groups.items():
+            g.updated = False
+            g.new = False
+
+            for hk in list(g.member_hosts.keys()):
+                if hk not in self.hosts.keys() and \
+                   hk not in self.host_groups.keys():
+                    del g.member_hosts[hk]
+                    unstored_keys["groups"].add(g.name)
+
+        for _, f in self.flavors.items():
+            f.updated = False
+
+        self.datacenter.updated = False
+        for gk in list(self.datacenter.memberships.keys()):
+            if gk not in self.groups.keys():
+                del self.datacenter.memberships[gk]
+                unstored_keys["datacenter"] = True
+
+        self.unstored_keys = unstored_keys
+
+        self.change_of_placements = {}
+        self.unchanged_placements = {}
+
+        self._update_compute_avail()
+
+        self.new = False
+        self.version = _version
+        self.stored = True
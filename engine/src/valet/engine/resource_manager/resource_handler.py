@@ -17,6 +17,8 @@
 # -------------------------------------------------------------------------
 #
 import json
+import threading
+import time
 
 from valet.engine.resource_manager.resource import Resource
 from valet.engine.resource_manager.resources.group_rule import GroupRule
@@ -41,9 +43,29 @@ class ResourceHandler:
         self.default_disk_allocation_ratio = _config.get("default_disk_allocation_ratio")
         self.batch_sync_interval = _config.get("batch_sync_interval")
 
+        # Skip sync with platform for a request if the resource was synced
+        # within this bound (in seconds). 0 means sync for every request.
+        self.sync_staleness = float(_config.get("sync_staleness", 0))
+
+        # Held while a request or the sync thread deals with resources.
+        self.resource_lock = threading.Lock()
+
+        # Held while syncing with platform, since the platform clients
+        # (e.g., Nova) are shared by requests and the sync thread.
+        # Never wait for resource_lock while holding it.
+        self.platform_lock = threading.Lock()
+
         self.group_rules = {}
         self.resource_list = []
 
+        # Rules built from the rule list last read from DB
+        self.rule_list = None
+        self.all_group_rules = {}
+
+        # Resident resource status of each datacenter kept across requests.
+        # key = datacenter id, value = Resource
+        self.resources = {}
+
         self.logger = _logger
 
     def load_group_rules_from_db(self):
@@ -52,13 +74,18 @@ class ResourceHandler:
         Note that rules are applied to all datacenters.
         """
 
-        # Init first
-        self.group_rules = {}
-
         rule_list = self.dbh.get_group_rules()
         if rule_list is None:
             return None
 
+        # Not rebuilt while the rule list is cached in DB handler.
+        if rule_list is self.rule_list:
+            self.group_rules = self.all_group_rules
+            return "ok"
+
+        # Init first
+        self.group_rules = {}
+
         for r in rule_list:
             rule = GroupRule(r.get("id"))
 
@@ -72,6 +99,9 @@ class ResourceHandler:
 
             self.group_rules[rule.rule_id] = rule
 
+        self.rule_list = rule_list
+        self.all_group_rules = self.group_rules
+
         return "ok"
 
     def load_group_rule_from_db(self, _id):
@@ -251,6 +281,11 @@ class ResourceHandler:
         # Init first
         del self.resource_list[:]
 
+        resource = self._get_resident_resource(_datacenter)
+        if resource is not None:
+            self.resource_list.append(resource)
+            return True
+
         resource = Resource(_datacenter, self.dbh,
                             self.compute, self.metadata, self.topology,
                             self.logger)
@@ -268,10 +303,150 @@ class ResourceHandler:
             self.logger.warning(status)
             resource.new = True
 
+        self.resources[resource.datacenter_id] = resource
         self.resource_list.append(resource)
 
         return True
 
+    def _get_resident_resource(self, _datacenter):
+        """Return the resident resource if it is still same as in DB."""
+
+        dc_id = _datacenter.get("id")
+
+        resource = self.resources.get(dc_id)
+        if resource is None:
+            return None
+
+        # Take it out until it is stored again.
+        del self.resources[dc_id]
+
+        if set(resource.group_rules.keys()) != set(self.group_rules.keys()):
+            return None
+
+        dcr = self.dbh.get_resource_version(dc_id)
+        if not resource.is_current(dcr):
+            self.logger.info("resource of " + dc_id + " changed, reload from DB")
+            return None
+
+        if _datacenter.get("url", "none") != "none":
+            resource.datacenter_url = _datacenter.get("url")
+
+        resource.set_group_rules(self.group_rules)
+        resource.stored = False
+
+        self.resources[dc_id] = resource
+
+        self.logger.info("reuse resident resource of " + dc_id)
+
+        return resource
+
+    def sync_resource(self, _resource):
+        """Sync resource status with platform,
+
+        unless it was synced within the staleness bound.
+        """
+
+        if self.sync_staleness > 0:
+            age = time.time() - _resource.sync_time
+            if age < self.sync_staleness:
+                self.logger.info("skip sync with platform, synced %.1f sec ago" % age)
+                return True
+
+        with self.platform_lock:
+            return _resource.sync_with_platform()
+
+    def sync_resources(self, _lock):
+        """Sync resident resources with platform and store them.
+
+        Called by the sync thread. Skip the datacenter having pending
+        requests or being dealt with by the other valet.
+        Return False if DB error.
+
+        Requests are not held while the status is got from platform.
+        It is set and stored only if the resource is still the resident
+        one and same as in DB, i.e., no request has dealt with it meanwhile.
+        """
+
+        if not _lock.set_regions():
+            return False
+
+        for dc_id in list(self.resources.keys()):
+            with self.resource_lock:
+                resource = self._get_syncable_resource(dc_id)
+                if resource is None:
+                    continue
+
+                version = resource.version
+
+            with self.platform_lock:
+                platform_status = resource.get_platform_status()
+
+            if platform_status is None:
+                self.logger.warning("fail to sync resource of " + dc_id)
+                continue
+
+            lock_status = _lock.is_my_turn(dc_id)
+            if lock_status is None:
+                return False
+            elif lock_status == "no":
+                continue
+
+            with self.resource_lock:
+                status = self._sync_resident_resource(resource, version, platform_status)
+
+            if _lock.done_with_my_turn() is None:
+                return False
+
+            if status is None:
+                return False
+
+        return True
+
+    def _get_syncable_resource(self, _dc_id):
+        """Get the resident resource to be synced if it is same as in DB."""
+
+        resource = self.resources.get(_dc_id)
+        if resource is None or not resource.stored:
+            return None
+
+        if len(resource.pending_requests) > 0 or resource.datacenter_url == "none":
+            return None
+
+        dcr = self.dbh.get_resource_version(_dc_id)
+        if not resource.is_current(dcr):
+            # Reloaded from DB by next request.
+            return None
+
+        return resource
+
+    def _sync_resident_resource(self, _resource, _version, _platform_status):
+        """Set the status got from platform and store the resource,
+
+        if it is still syncable and of the version the status was got for.
+        """
+
+        dc_id = _resource.datacenter_id
+
+        if self._get_syncable_resource(dc_id) is not _resource or \
+           _resource.version != _version:
+            self.logger.info("resource of " + dc_id + " changed while syncing, skip it")
+            return "ok"
+
+        if not _resource.set_platform_status(_platform_status):
+            self.logger.warning("fail to sync resource of " + dc_id)
+
+            # Drop what is partially synced.
+            _resource.stored = False
+            return "ok"
+
+        if not _resource.store_resource():
+            _resource.stored = False
+            return None
+
+        self.logger.info("resource of " + dc_id + " synced in background")
+
+        return "ok"
+
     def load_resource_with_rule(self, _datacenter):
         """Create and return a resource with valet group rule."""
 
@@ -0,0 +1,85 @@
+#
+# -------------------------------------------------------------------------
+#   Copyright (c) 2019 AT&T Intellectual Property
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# -------------------------------------------------------------------------
+#
+
+
+# Server states of which placements are confirmed
+CONFIRMED_STATES = ("created", "migrated", "rebuilt")
+
+# Server properties reported by platform and reconciled with resource.
+# Sizes (vcpus, mem, disk) are left out, since platform reports them as -1
+# when the flavor is not embedded (e.g., nova API v2), while resource keeps
+# those resolved from the flavor. They follow flavor_id anyway.
+SERVER_KEYS = ("uuid", "stack_id", "name", "flavor_id", "image_id", "state")
+
+
+def _freeze(_value):
+    """Get hashable value with the same content, regardless of order."""
+
+    if isinstance(_value, dict):
+        return frozenset((k, _freeze(v)) for k, v in _value.items())
+    elif isinstance(_value, (list, tuple)):
+        return tuple(_freeze(v) for v in _value)
+    elif isinstance(_value, (set, frozenset)):
+        return frozenset(_freeze(v) for v in _value)
+
+    return _value
+
+
+def get_fingerprint(*_values):
+    """Get hashable value with the content of values.
+
+    The same content, whether collected from platform (e.g., nova) or kept
+    in resource, has the same fingerprint, and equal fingerprints mean
+    equal contents. So it is also used as a key.
+    """
+
+    return _freeze(_values)
+
+
+def of_host(_host):
+    """Get fingerprint of host capacities reported by platform."""
+
+    return get_fingerprint(_host.original_vCPUs, _host.vCPUs_used,
+                           _host.original_mem_cap, _host.free_mem_mb,
+                           _host.original_local_disk_cap, _host.free_disk_gb,
+                           _host.disk_available_least)
+
+
+def of_servers(_server_list):
+    """Get fingerprint of confirmed server placements."""
+
+    servers = []
+    for s_info in _server_list:
+        if s_info["state"] in CONFIRMED_STATES:
+            servers.append(tuple(s_info.get(k) for k in SERVER_KEYS))
+
+    return frozenset(servers)
+
+
+def of_flavor(_flavor):
+    """Get fingerprint of flavor spec."""
+
+    return get_fingerprint(_flavor.vCPUs, _flavor.mem_cap, _flavor.disk_cap,
+                           _flavor.extra_specs)
+
+
+def of_names(_names):
+    """Get fingerprint of a set of names (e.g., member hosts)."""
+
+    return frozenset(_names)
@@ -16,6 +16,9 @@
 #
 # -------------------------------------------------------------------------
 #
+from valet.engine.resource_manager.resources.server_index import ServerIndex
+
+
 class Group(object):
     """Container for groups."""
 
@@ -54,6 +57,9 @@ class Group(object):
         # Value is a list of server infos.
         self.server_list = []
 
+        # Lookup of server_list by uuid or stack and name
+        self.server_index = ServerIndex()
+
         self.updated = False
 
         self.new = False
@@ -61,25 +67,7 @@ class Group(object):
     def has_server(self, _s_info):
         """Check if the server exists in this group."""
 
-        for s_info in self.server_list:
-            if _s_info["uuid"] != "none":
-                if s_info["uuid"] != "none" and \
-                   s_info["uuid"] == _s_info["uuid"]:
-                    return True
-
-            if _s_info["stack_id"] != "none":
-                if (s_info["stack_id"] != "none" and \
-                    s_info["stack_id"] == _s_info["stack_id"]) and \
-                   s_info["name"] == _s_info["name"]:
-                    return True
-
-            if _s_info["stack_name"] != "none":
-                if (s_info["stack_name"] != "none" and \
-                    s_info["stack_name"] == _s_info["stack_name"]) and \
-                   s_info["name"] == _s_info["name"]:
-                    return True
-
-        return False
+        return self.server_index.find(self.server_list, _s_info) is not None
 
     def has_server_uuid(self, _uuid):
         """Check if the server exists in this group with uuid."""
@@ -119,25 +107,7 @@ class Group(object):
     def get_server_info(self, _s_info):
         """Get server info."""
 
-        for s_info in self.server_list:
-            if _s_info["uuid"] != "none":
-                if s_info["uuid"] != "none" and \
-                   s_info["uuid"] == _s_info["uuid"]:
-                    return s_info
-
-            if _s_info["stack_id"] != "none":
-                if (s_info["stack_id"] != "none" and \
-                    s_info["stack_id"] == _s_info["stack_id"]) and \
-                   s_info["name"] == _s_info["name"]:
-                    return s_info
-
-            if _s_info["stack_name"] != "none":
-                if (s_info["stack_name"] != "none" and \
-                    s_info["stack_name"] == _s_info["stack_name"]) and \
-                   s_info["name"] == _s_info["name"]:
-                    return s_info
-
-        return None
+        return self.server_index.find(self.server_list, _s_info)
 
     def get_server_info_in_host(self, _host_name, _s_info):
         """Get server info."""
@@ -175,6 +145,7 @@ class Group(object):
             return False
 
         self.server_list.append(_s_info)
+        self.server_index.add(self.server_list, _s_info)
 
         if self.factory in ("valet", "server-group"):
             if _host_name not in self.member_hosts.keys():
@@ -187,28 +158,15 @@ class Group(object):
     def remove_server(self, _s_info):
         """Remove server from this group's server_list."""
 
-        for s_info in self.server_list:
-            if _s_info["uuid"] != "none":
-                if s_info["uuid"] != "none" and \
-                   s_info["uuid"] == _s_info["uuid"]:
-                    self.server_list.remove(s_info)
-                    return True
-
-            if _s_info["stack_id"] != "none":
-                if (s_info["stack_id"] != "none" and \
-                    s_info["stack_id"] == _s_info["stack_id"]) and \
-                   s_info["name"] == _s_info["name"]:
-                    self.server_list.remove(s_info)
-                    return True
-
-            if _s_info["stack_name"] != "none":
-                if (s_info["stack_name"] != "none" and \
-                    s_info["stack_name"] == _s_info["stack_name"]) and \
-                   s_info["name"] == _s_info["name"]:
-                    self.server_list.remove(s_info)
-                    return True
+        s_info = self.server_index.find(self.server_list, _s_info)
 
-        return False
+        if s_info is None:
+            return False
+
+        self.server_list.remove(s_info)
+        self.server_index.remove(self.server_list, s_info)
+
+        return True
 
     def remove_server_from_host(self, _host_name, _s_info):
         """Remove server from the host of this group."""
@@ -261,6 +219,7 @@ class Group(object):
         for s_info in self.server_list:
             if s_info["uuid"] == _uuid and s_info["name"] == "none":
                 self.server_list.remove(s_info)
+                self.server_index.remove(self.server_list, s_info)
                 break
 
         if _host_name in self.member_hosts.keys():
@@ -287,11 +246,13 @@ class Group(object):
             if _s_info["stack_id"] != "none" and \
                _s_info["stack_id"] != s_info["stack_id"]:
                 s_info["stack_id"] = _s_info["stack_id"]
+                self.server_index.invalidate()
                 updated = True
 
             if _s_info["uuid"] != "none" and \
                _s_info["uuid"] != s_info["uuid"]:
                 s_info["uuid"] = _s_info["uuid"]
+                self.server_index.invalidate()
                 updated = True
 
             if _s_info["flavor_id"] != "none" and \
@@ -346,10 +307,12 @@ class Group(object):
                 if _s_info["stack_id"] != "none" and \
                    _s_info["stack_id"] != s_info["stack_id"]:
                     s_info["stack_id"] = _s_info["stack_id"]
+                    self.server_index.invalidate()
 
                 if _s_info["uuid"] != "none" and \
                    _s_info["uuid"] != s_info["uuid"]:
                     s_info["uuid"] = _s_info["uuid"]
+                    self.server_index.invalidate()
 
                 if _s_info["flavor_id"] != "none" and \
                    _s_info["flavor_id"] != s_info["flavor_id"]:
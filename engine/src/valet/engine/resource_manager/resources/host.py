@@ -17,6 +17,7 @@
 # -------------------------------------------------------------------------
 #
 from valet.engine.resource_manager.resources.numa import NUMA
+from valet.engine.resource_manager.resources.server_index import ServerIndex
 
 
 class Host(object):
@@ -65,6 +66,9 @@ class Host(object):
         #                              state, status}
         self.server_list = []
 
+        # Lookup of server_list by uuid or stack and name
+        self.server_index = ServerIndex()
+
         # If this host is not defined yet (unknown host).
         self.candidate_host_types = {}
 
@@ -81,79 +85,41 @@ class Host(object):
     def has_server(self, _s_info):
         """Check if server is located in this host."""
 
-        for s_info in self.server_list:
-            if _s_info["uuid"] != "none":
-                if s_info["uuid"] != "none" and \
-                   s_info["uuid"] == _s_info["uuid"]:
-                    return True
-
-            if _s_info["stack_id"] != "none":
-                if (s_info["stack_id"] != "none" and \
-                    s_info["stack_id"] == _s_info["stack_id"]) and \
-                   s_info["name"] == _s_info["name"]:
-                    return True
-
-            if _s_info["stack_name"] != "none":
-                if (s_info["stack_name"] != "none" and \
-                    s_info["stack_name"] == _s_info["stack_name"]) and \
-                   s_info["name"] == _s_info["name"]:
-                    return True
-
-        return False
+        return self.server_index.find(self.server_list, _s_info) is not None
 
     def get_server_info(self, _s_info):
         """Get server info."""
 
-        for s_info in self.server_list:
-            if _s_info["uuid"] != "none":
-                if s_info["uuid"] != "none" and \
-                   s_info["uuid"] == _s_info["uuid"]:
-                    return s_info
-
-            if _s_info["stack_id"] != "none":
-                if (s_info["stack_id"] != "none" and \
-                    s_info["stack_id"] == _s_info["stack_id"]) and \
-                   s_info["name"] == _s_info["name"]:
-                    return s_info
-
-            if _s_info["stack_name"] != "none":
-                if (s_info["stack_name"] != "none" and \
-                    s_info["stack_name"] == _s_info["stack_name"]) and \
-                   s_info["name"] == _s_info["name"]:
-                    return s_info
-
-        return None
+        return self.server_index.find(self.server_list, _s_info)
 
     def add_server(self, _s_info):
         """Add new server to this host."""
 
         self.server_list.append(_s_info)
+        self.server_index.add(self.server_list, _s_info)
 
     def remove_server(self, _s_info):
         """Remove server from this host."""
 
-        for s_info in self.server_list:
-            if _s_info["uuid"] != "none":
-                if s_info["uuid"] != "none" and \
-                   s_info["uuid"] == _s_info["uuid"]:
-                    self.server_list.remove(s_info)
-                    return True
-
-            if _s_info["stack_id"] != "none":
-                if (s_info["stack_id"] != "none" and \
-                    s_info["stack_id"] == _s_info["stack_id"]) and \
-                   s_info["name"] == _s_info["name"]:
-                    self.server_list.remove(s_info)
-                    return True
-
-            if _s_info["stack_name"] != "none":
-                if (s_info["stack_name"] != "none" and \
-                    s_info["stack_name"] == _s_info["stack_name"]) and \
-                   s_info["name"] == _s_info["name"]:
-                    self.server_list.remove(s_info)
-                    return True
+        s_info = self.server_index.find(self.server_list, _s_info)
 
-        return False
+        if s_info is None:
+            return False
+
+        self.server_list.remove(s_info)
+        self.server_index.remove(self.server_list, s_info)
+
+        return True
+
+    def invalidate_server_indexes(self):
+        """Rebuild lookups of servers in this host and its NUMA cells,
+
+        which share server infos, on next use.
+        """
+
+        self.server_index.invalidate()
+        for _, index in self.NUMA.server_indexes.items():
+            index.invalidate()
 
     def update_server(self, _s_info):
         """Update server with info from given info.
@@ -169,11 +135,13 @@ class Host(object):
             if _s_info["stack_id"] != "none" and \
                _s_info["stack_id"] != s_info["stack_id"]:
                 s_info["stack_id"] = _s_info["stack_id"]
+                self.invalidate_server_indexes()
                 updated = s_info
 
             if _s_info["uuid"] != "none" and \
                _s_info["uuid"] != s_info["uuid"]:
                 s_info["uuid"] = _s_info["uuid"]
+                self.invalidate_server_indexes()
                 updated = s_info
 
             if _s_info["flavor_id"] != "none" and \
@@ -66,7 +66,7 @@ class HostGroup(object):
         self.avail_local_disk_cap = 0
 
     def init_memberships(self):
-        for gk in self.memberships.keys():
+        for gk in list(self.memberships.keys()):
             g = self.memberships[gk]
 
             if g.factory == "valet":
@@ -16,6 +16,9 @@
 #
 # -------------------------------------------------------------------------
 #
+from valet.engine.resource_manager.resources.server_index import ServerIndex
+
+
 class NUMA(object):
     """Container for NUMA cells."""
 
@@ -43,6 +46,9 @@ class NUMA(object):
         # A list of server infos
         self.cell_1["server_list"] = []
 
+        # Lookup of server_list in each cell
+        self.server_indexes = {"cell_0": ServerIndex(), "cell_1": ServerIndex()}
+
         if numa is not None:
             self.cell_0["cpus"] = numa["cell_0"]["cpus"]
             self.cell_0["mem"] = numa["cell_0"]["mem"]
@@ -126,61 +132,16 @@ class NUMA(object):
     def pop_cell_of_server(self, _s_info):
         """Get which cell server is placed."""
 
-        cell = None
-
-        for s_info in self.cell_0["server_list"]:
-            if _s_info["uuid"] != "none":
-                if s_info["uuid"] != "none" and \
-                   s_info["uuid"] == _s_info["uuid"]:
-                    cell = "cell_0"
-                    self.cell_0["server_list"].remove(s_info)
-                    break
-
-            if _s_info["stack_id"] != "none":
-                if (s_info["stack_id"] != "none" and \
-                    s_info["stack_id"] == _s_info["stack_id"]) and \
-                   s_info["name"] == _s_info["name"]:
-                    cell = "cell_0"
-                    self.cell_0["server_list"].remove(s_info)
-                    break
-
-            if _s_info["stack_name"] != "none":
-                if (s_info["stack_name"] != "none" and \
-                    s_info["stack_name"] == _s_info["stack_name"]) and \
-                   s_info["name"] == _s_info["name"]:
-                    cell = "cell_0"
-                    self.cell_0["server_list"].remove(s_info)
-                    break
-
-        if cell is None:
-            for s_info in self.cell_1["server_list"]:
-                if _s_info["uuid"] != "none":
-                    if s_info["uuid"] != "none" and \
-                       s_info["uuid"] == _s_info["uuid"]:
-                        cell = "cell_1"
-                        self.cell_1["server_list"].remove(s_info)
-                        break
-
-                if _s_info["stack_id"] != "none":
-                    if (s_info["stack_id"] != "none" and \
-                        s_info["stack_id"] == _s_info["stack_id"]) and \
-                       s_info["name"] == _s_info["name"]:
-                        cell = "cell_1"
-                        self.cell_1["server_list"].remove(s_info)
-                        break
-
-                if _s_info["stack_name"] != "none":
-                    if (s_info["stack_name"] != "none" and \
-                        s_info["stack_name"] == _s_info["stack_name"]) and \
-                       s_info["name"] == _s_info["name"]:
-                        cell = "cell_1"
-                        self.cell_1["server_list"].remove(s_info)
-                        break
-
-        if cell is None:
-            return "none"
-        else:
-            return cell
+        for cell in ("cell_0", "cell_1"):
+            server_list = getattr(self, cell)["server_list"]
+
+            s_info = self.server_indexes[cell].find(server_list, _s_info)
+            if s_info is not None:
+                server_list.remove(s_info)
+                self.server_indexes[cell].remove(server_list, s_info)
+                return cell
+
+        return "none"
 
     def deduct_server_resources(self, _s_info):
         """Reduce the available resources in a cell by adding a server."""
@@ -191,11 +152,13 @@ class NUMA(object):
             self.cell_0["cpus"] -= _s_info.get("vcpus")
             self.cell_0["mem"] -= _s_info.get("mem")
             self.cell_0["server_list"].append(_s_info)
+            self.server_indexes["cell_0"].add(self.cell_0["server_list"], _s_info)
             return "cell_0"
         else:
             self.cell_1["cpus"] -= _s_info.get("vcpus")
             self.cell_1["mem"] -= _s_info.get("mem")
             self.cell_1["server_list"].append(_s_info)
+            self.server_indexes["cell_1"].add(self.cell_1["server_list"], _s_info)
             return "cell_1"
 
     def rollback_server_resources(self, _s_info):
@@ -220,8 +183,10 @@ class NUMA(object):
 
         if _s_info["numa"] == "cell_0":
             self.cell_0["server_list"].append(_s_info)
+            self.server_indexes["cell_0"].add(self.cell_0["server_list"], _s_info)
         elif _s_info["numa"] == "cell_1":
             self.cell_1["server_list"].append(_s_info)
+            self.server_indexes["cell_1"].add(self.cell_1["server_list"], _s_info)
 
     def apply_unknown_cpus(self, _diff):
         """Apply unknown cpus fairly across cells."""
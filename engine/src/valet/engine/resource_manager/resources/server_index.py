@@ -0,0 +1,139 @@
+#
+# -------------------------------------------------------------------------
+#   Copyright (c) 2019 AT&T Intellectual Property
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# -------------------------------------------------------------------------
+#
+
+
+def get_keys(_s_info):
+    """Get the keys a server info can be matched with."""
+
+    keys = []
+
+    if _s_info["uuid"] != "none":
+        keys.append(("uuid", _s_info["uuid"]))
+
+    if _s_info["stack_id"] != "none":
+        keys.append(("stack_id", _s_info["stack_id"], _s_info["name"]))
+
+    if _s_info["stack_name"] != "none":
+        keys.append(("stack_name", _s_info["stack_name"], _s_info["name"]))
+
+    return keys
+
+
+class ServerIndex(object):
+    """Hash index over a list of server infos.
+
+    Match the same server info as scanning the list does, i.e., the first
+    one in the list having the same uuid, or the same name in the same stack.
+    The list may be appended directly (e.g., while loading), then the
+    index is rebuilt on next lookup. Any other direct change of the list
+    or of the identity (uuid, stack_id) of a server info in it must be
+    followed by invalidate().
+    """
+
+    def __init__(self):
+        self.server_list = None
+        self.size = -1
+
+        # Insertion order of server infos, same as the list order
+        self.seq = 0
+
+        # key = match key, value = list of [seq, server_info] in list order
+        self.buckets = {}
+
+    def __copy__(self):
+        """Not shared by copies, rebuilt on next lookup instead."""
+
+        return ServerIndex()
+
+    def __deepcopy__(self, _memo):
+        return ServerIndex()
+
+    def invalidate(self):
+        """Rebuild on next lookup."""
+
+        self.server_list = None
+
+    def _is_valid(self, _server_list, _size):
+        return self.server_list is _server_list and self.size == _size
+
+    def _insert(self, _s_info):
+        entry = [self.seq, _s_info]
+        self.seq += 1
+
+        for k in get_keys(_s_info):
+            if k not in self.buckets.keys():
+                self.buckets[k] = []
+            self.buckets[k].append(entry)
+
+    def _rebuild(self, _server_list):
+        self.server_list = _server_list
+        self.size = len(_server_list)
+
+        self.seq = 0
+        self.buckets = {}
+
+        for s_info in _server_list:
+            self._insert(s_info)
+
+    def find(self, _server_list, _s_info):
+        """Get the first server info matched with the given info."""
+
+        if not self._is_valid(_server_list, len(_server_list)):
+            self._rebuild(_server_list)
+
+        first = None
+
+        for k in get_keys(_s_info):
+            bucket = self.buckets.get(k)
+            if bucket:
+                if first is None or bucket[0][0] < first[0]:
+                    first = bucket[0]
+
+        if first is None:
+            return None
+
+        return first[1]
+
+    def add(self, _server_list, _s_info):
+        """Reflect the server info just appended into the list."""
+
+        if self._is_valid(_server_list, len(_server_list) - 1):
+            self.size += 1
+            self._insert(_s_info)
+
+    def remove(self, _server_list, _s_info):
+        """Reflect the server info just removed from the list."""
+
+        if not self._is_valid(_server_list, len(_server_list) + 1):
+            return
+
+        self.size -= 1
+
+        for k in get_keys(_s_info):
+            bucket = self.buckets.get(k)
+            if bucket is None:
+                continue
+
+            for i, entry in enumerate(bucket):
+                if entry[1] is _s_info:
+                    del bucket[i]
+                    break
+
+            if len(bucket) == 0:
+                del self.buckets[k]
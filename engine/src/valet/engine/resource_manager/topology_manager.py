@@ -19,6 +19,7 @@
 #!/usr/bin/env python3
 
 
+from valet.engine.resource_manager.resources import fingerprint
 from valet.engine.resource_manager.resources.datacenter import Datacenter
 from valet.engine.resource_manager.resources.host_group import HostGroup
 
@@ -121,6 +122,10 @@ class TopologyManager(object):
 
         _rdatacenter = _resource.datacenter
 
+        resources = self._get_available_resources(self.datacenter.resources.keys(), _resource)
+        if fingerprint.of_names(resources) == fingerprint.of_names(_rdatacenter.resources.keys()):
+            return updated
+
         for rk in self.datacenter.resources.keys():
 
             h = None
@@ -136,7 +141,7 @@ class TopologyManager(object):
 
                     self.logger.info("datacenter updated (new resource)")
 
-        for rk in _rdatacenter.resources.keys():
+        for rk in list(_rdatacenter.resources.keys()):
 
             h = None
             if rk in _resource.host_groups.keys():
@@ -180,6 +185,10 @@ class TopologyManager(object):
             if updated:
                 self.logger.info("host_group (" + _rhg.name + ") updated (parent host_group)")
 
+        children = self._get_available_resources(_hg.child_resources.keys(), _resource)
+        if fingerprint.of_names(children) == fingerprint.of_names(_rhg.child_resources.keys()):
+            return updated
+
         for rk in _hg.child_resources.keys():
 
             h = None
@@ -195,7 +204,7 @@ class TopologyManager(object):
 
                     self.logger.info("host_group (" + _rhg.name + ") updated (new child host)")
 
-        for rk in _rhg.child_resources.keys():
+        for rk in list(_rhg.child_resources.keys()):
 
             h = None
             if rk in _resource.hosts.keys():
@@ -213,6 +222,28 @@ class TopologyManager(object):
 
         return updated
 
+    @staticmethod
+    def _get_available_resources(_names, _resource):
+        """Get names of available hosts and host_groups in resource.
+
+        Child resources updated are already marked up to datacenter,
+        so the layout is changed only if these names are changed.
+        """
+
+        names = []
+
+        for rk in _names:
+            h = None
+            if rk in _resource.hosts.keys():
+                h = _resource.hosts[rk]
+            elif rk in _resource.host_groups.keys():
+                h = _resource.host_groups[rk]
+
+            if h is not None and h.is_available():
+                names.append(rk)
+
+        return names
+
     def _is_host_updated(self, _host, _resource):
         """Check if host's parent (e.g., rack) is changed."""
 
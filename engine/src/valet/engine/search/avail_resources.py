@@ -28,11 +28,15 @@ class AvailResources(object):
     of each level (host or rack) for search.
     """
 
-    def __init__(self, _level):
+    def __init__(self, _level, _racks=None):
         self.level = _level
         self.avail_hosts = {}
         self.candidates = {}
 
+        # Index of avail_hosts by rack
+        # key = rack name, value = list of hosts in the rack
+        self.racks = _racks
+
     def set_next_level(self):
         """Get the next level to search."""
 
@@ -44,21 +48,33 @@ class AvailResources(object):
         else:
             self.level = LEVEL[next_level_index]
 
-    def set_next_avail_hosts(self, _avail_hosts, _resource_of_level):
-        """Set the next level of available hosting resources."""
+    def set_next_avail_hosts(self, _avail_hosts, _resource_of_level, _racks=None):
+        """Set the next level of available hosting resources.
+
+        _racks is the index of _avail_hosts by rack if any.
+        """
 
-        for hk, h in _avail_hosts.items():
-            if self.level == "rack":
-                if h.rack_name == _resource_of_level:
-                    self.avail_hosts[hk] = h
-            elif self.level == "host":
-                if h.host_name == _resource_of_level:
-                    self.avail_hosts[hk] = h
+        if self.level == "rack":
+            if _racks is not None:
+                for h in _racks.get(_resource_of_level, []):
+                    self.avail_hosts[h.host_name] = h
+            else:
+                for hk, h in _avail_hosts.items():
+                    if h.rack_name == _resource_of_level:
+                        self.avail_hosts[hk] = h
+        elif self.level == "host":
+            if _resource_of_level in _avail_hosts.keys():
+                self.avail_hosts[_resource_of_level] = _avail_hosts[_resource_of_level]
 
     def set_candidates(self):
         if self.level == "rack":
-            for _, h in self.avail_hosts.items():
-                self.candidates[h.rack_name] = h
+            if self.racks is not None:
+                # The last host of each rack, as when scanning all hosts
+                for rk, hosts in self.racks.items():
+                    self.candidates[rk] = hosts[-1]
+            else:
+                for _, h in self.avail_hosts.items():
+                    self.candidates[h.rack_name] = h
         elif self.level == "host":
             self.candidates = self.avail_hosts
 
@@ -66,9 +82,13 @@ class AvailResources(object):
         candidate = None
 
         if self.level == "rack":
-            for _, h in self.avail_hosts.items():
-                if h.rack_name == _resource.rack_name:
-                    candidate = h
+            if self.racks is not None:
+                if _resource.rack_name in self.racks.keys():
+                    candidate = self.racks[_resource.rack_name][-1]
+            else:
+                for _, h in self.avail_hosts.items():
+                    if h.rack_name == _resource.rack_name:
+                        candidate = h
         elif self.level == "host":
             if _resource.host_name in self.avail_hosts.keys():
                 candidate = self.avail_hosts[_resource.host_name]
@@ -0,0 +1,234 @@
+#
+# -------------------------------------------------------------------------
+#   Copyright (c) 2019 AT&T Intellectual Property
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# -------------------------------------------------------------------------
+#
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+# Columns kept per level, key = resource type used by filters
+HOST_COLUMNS = {"vcpus": "host_vcpus", "mem": "host_mem", "disk": "host_disk"}
+RACK_COLUMNS = {"vcpus": "rack_vcpus", "mem": "rack_mem", "disk": "rack_disk"}
+
+
+def is_supported():
+    """Check if the array backend is installed."""
+
+    return np is not None
+
+
+class CapacityIndex(object):
+    """Columnar snapshot of host and rack capacity of search.
+
+    One row per HostResource. Rows are built once per search and refreshed
+    only for the hosts whose capacity is changed while searching.
+    """
+
+    def __init__(self, _avail_hosts):
+        # key = host name, value = row
+        self.position = {}
+
+        # key = rack name, value = list of rows
+        self.rack_rows = {}
+
+        self.hosts = []
+
+        for hk, hr in _avail_hosts.items():
+            row = len(self.hosts)
+
+            self.position[hk] = row
+            self.hosts.append(hr)
+
+            if hr.rack_name != "any":
+                if hr.rack_name not in self.rack_rows.keys():
+                    self.rack_rows[hr.rack_name] = []
+                self.rack_rows[hr.rack_name].append(row)
+
+        size = len(self.hosts)
+
+        self.host_vcpus = np.zeros(size, dtype=np.float64)
+        self.host_mem = np.zeros(size, dtype=np.float64)
+        self.host_disk = np.zeros(size, dtype=np.float64)
+
+        self.rack_vcpus = np.zeros(size, dtype=np.float64)
+        self.rack_mem = np.zeros(size, dtype=np.float64)
+        self.rack_disk = np.zeros(size, dtype=np.float64)
+
+        self.cell_0_cpus = np.zeros(size, dtype=np.float64)
+        self.cell_0_mem = np.zeros(size, dtype=np.float64)
+        self.cell_1_cpus = np.zeros(size, dtype=np.float64)
+        self.cell_1_mem = np.zeros(size, dtype=np.float64)
+
+        # Best-fit score of host, kept once weights are set
+        self.score_weights = None
+        self.score_totals = None
+        self.host_score = None
+
+        for row in range(size):
+            self._set_row(row)
+
+    def set_score_weights(self, _weights, _totals):
+        """Set weights and datacenter totals of (cpu, mem, disk) to score hosts.
+
+        Scores are the same as Search._set_compute_sort_base at host level.
+        """
+
+        if 0 in _totals:
+            return
+
+        self.score_weights = tuple(float(w) for w in _weights)
+        self.score_totals = tuple(float(t) for t in _totals)
+        self.host_score = np.zeros(len(self.hosts), dtype=np.float64)
+
+        for row in range(len(self.hosts)):
+            self._set_score(row)
+
+    def _set_score(self, _row):
+        hr = self.hosts[_row]
+
+        (cpu_weight, mem_weight, disk_weight) = self.score_weights
+        (cpu_total, mem_total, disk_total) = self.score_totals
+
+        self.host_score[_row] = (1.0 - cpu_weight) * (float(hr.host_avail_vCPUs) / cpu_total) + \
+                                (1.0 - mem_weight) * (float(hr.host_avail_mem) / mem_total) + \
+                                (1.0 - disk_weight) * (float(hr.host_avail_local_disk) / disk_total)
+
+    def _set_row(self, _row):
+        """Copy the current capacity of host into the row."""
+
+        hr = self.hosts[_row]
+
+        self.host_vcpus[_row] = hr.host_avail_vCPUs
+        self.host_mem[_row] = hr.host_avail_mem
+        self.host_disk[_row] = hr.host_avail_local_disk
+
+        self.rack_vcpus[_row] = hr.rack_avail_vCPUs
+        self.rack_mem[_row] = hr.rack_avail_mem
+        self.rack_disk[_row] = hr.rack_avail_local_disk
+
+        if hr.NUMA is not None:
+            self.cell_0_cpus[_row] = hr.NUMA.cell_0["cpus"]
+            self.cell_0_mem[_row] = hr.NUMA.cell_0["mem"]
+            self.cell_1_cpus[_row] = hr.NUMA.cell_1["cpus"]
+            self.cell_1_mem[_row] = hr.NUMA.cell_1["mem"]
+
+        if self.host_score is not None:
+            self._set_score(_row)
+
+    def refresh(self, _host_name):
+        """Refresh the host and all hosts in the same rack."""
+
+        if _host_name not in self.position.keys():
+            return
+
+        row = self.position[_host_name]
+        self._set_row(row)
+
+        rack_name = self.hosts[row].rack_name
+        if rack_name in self.rack_rows.keys():
+            for r in self.rack_rows[rack_name]:
+                if r != row:
+                    self._set_row(r)
+
+    def _get_rows(self, _candidate_list):
+        """Get rows of candidates or None if any candidate is not indexed."""
+
+        rows = []
+
+        for c in _candidate_list:
+            row = self.position.get(c.host_name)
+            if row is None or self.hosts[row] is not c:
+                return None
+            rows.append(row)
+
+        return np.array(rows, dtype=np.intp)
+
+    def _select(self, _candidate_list, _mask):
+        return [c for c, ok in zip(_candidate_list, _mask.tolist()) if ok]
+
+    def filter_capacity(self, _level, _type, _demand, _candidate_list):
+        """Return candidates having enough resource of the given type.
+
+        Return None when the index cannot answer for these candidates.
+        """
+
+        if _level == "host":
+            column = getattr(self, HOST_COLUMNS[_type])
+        elif _level == "rack":
+            column = getattr(self, RACK_COLUMNS[_type])
+        else:
+            return None
+
+        rows = self._get_rows(_candidate_list)
+        if rows is None:
+            return None
+
+        return self._select(_candidate_list, column[rows] >= _demand)
+
+    def filter_capacities(self, _level, _demands, _candidate_list):
+        """Return candidates having enough resource of all the given types.
+
+        The demands are (type, amount) pairs checked in one pass over rows.
+        Return None when the index cannot answer for these candidates.
+        """
+
+        if _level == "host":
+            columns = HOST_COLUMNS
+        elif _level == "rack":
+            columns = RACK_COLUMNS
+        else:
+            return None
+
+        rows = self._get_rows(_candidate_list)
+        if rows is None:
+            return None
+
+        mask = None
+        for (t, demand) in _demands:
+            ok = getattr(self, columns[t])[rows] >= demand
+            mask = ok if mask is None else mask & ok
+
+        return self._select(_candidate_list, mask)
+
+    def get_best_fit(self, _candidate_list):
+        """Return the candidate host of the lowest score, the first one if tied.
+
+        Return None when the index cannot answer for these candidates.
+        """
+
+        if self.host_score is None:
+            return None
+
+        rows = self._get_rows(_candidate_list)
+        if rows is None:
+            return None
+
+        return _candidate_list[int(np.argmin(self.host_score[rows]))]
+
+    def filter_numa(self, _vcpus, _mem, _candidate_list):
+        """Return candidate hosts having any NUMA cell with enough resources."""
+
+        rows = self._get_rows(_candidate_list)
+        if rows is None:
+            return None
+
+        mask = ((self.cell_0_cpus[rows] >= _vcpus) & (self.cell_0_mem[rows] >= _mem)) | \
+               ((self.cell_1_cpus[rows] >= _vcpus) & (self.cell_1_mem[rows] >= _mem))
+
+        return self._select(_candidate_list, mask)
@@ -16,9 +16,14 @@
 #
 # -------------------------------------------------------------------------
 #
+import time
+
+from valet.engine.app_manager.server import Server
+from valet.engine.resource_manager.resources.fingerprint import get_fingerprint
 from valet.engine.search.filters.affinity_filter import AffinityFilter
 from valet.engine.search.filters.aggregate_instance_filter import AggregateInstanceExtraSpecsFilter
 from valet.engine.search.filters.az_filter import AvailabilityZoneFilter
+from valet.engine.search.filters.capacity_filter import CapacityFilter
 from valet.engine.search.filters.cpu_filter import CPUFilter
 from valet.engine.search.filters.disk_filter import DiskFilter
 from valet.engine.search.filters.diversity_filter import DiversityFilter
@@ -30,43 +35,129 @@ from valet.engine.search.filters.numa_filter import NUMAFilter
 from valet.engine.search.filters.quorum_diversity_filter import QuorumDiversityFilter
 
 
+# Halve the stats of a filter once it has been applied this many times,
+# so that the order follows recent workloads.
+STATS_DECAY_CALLS = 10000
+
+
+class FilterStats(object):
+    """Runtime selectivity and cost of filters, kept per datacenter."""
+
+    def __init__(self):
+        # key = filter name,
+        # value = [calls, candidates in, candidates out, elapsed seconds]
+        self.stats = {}
+
+    def add(self, _name, _in, _out, _elapsed):
+        s = self.stats.get(_name)
+        if s is None:
+            s = [0, 0, 0, 0.0]
+            self.stats[_name] = s
+
+        s[0] += 1
+        s[1] += _in
+        s[2] += _out
+        s[3] += _elapsed
+
+        if s[0] >= STATS_DECAY_CALLS:
+            self.stats[_name] = [s[0] // 2, s[1] // 2, s[2] // 2, s[3] / 2.0]
+
+    def get_rank(self, _name):
+        """Get the expected cost of a filter per candidate it removes.
+
+        The lower, the earlier applied. Unknown filters get 0 to be
+        measured first.
+        """
+
+        s = self.stats.get(_name)
+        if s is None or s[1] == 0:
+            return 0.0
+
+        removed = s[1] - s[2]
+        if removed == 0:
+            return float("inf")
+
+        return s[3] / removed
+
+    def get_info(self):
+        """Get stats of filters as dict."""
+
+        info = {}
+        for name, (calls, n_in, n_out, elapsed) in self.stats.items():
+            info[name] = {"calls": calls,
+                          "candidates_in": n_in,
+                          "candidates_out": n_out,
+                          "selectivity": float(n_out) / n_in if n_in > 0 else 1.0,
+                          "cost_us": elapsed * 1000000.0 / n_in if n_in > 0 else 0.0}
+
+        return info
+
+
 class ConstraintSolver(object):
     """Constraint solver to filter out candidate hosts."""
 
-    def __init__(self, _logger):
+    def __init__(self, _logger, _capacity_index=None, _stats=None):
         """Define fileters and application order."""
 
         self.logger = _logger
 
-        self.filter_list = []
-
         # TODO(Gueyoung): add soft-affinity and soft-diversity filters
 
-        # TODO(Gueyoung): the order of applying filters?
-
         # Apply platform filters first
-        self.filter_list.append(AvailabilityZoneFilter())
-        self.filter_list.append(AggregateInstanceExtraSpecsFilter())
-        self.filter_list.append(CPUFilter())
-        self.filter_list.append(MemFilter())
-        self.filter_list.append(DiskFilter())
-        self.filter_list.append(NUMAFilter())
+        az = AvailabilityZoneFilter()
+        aggregate = AggregateInstanceExtraSpecsFilter()
+        numa = NUMAFilter(_capacity_index)
 
         # Apply Valet filters next
-        self.filter_list.append(DiversityFilter())
-        self.filter_list.append(QuorumDiversityFilter())
-        self.filter_list.append(ExclusivityFilter())
-        self.filter_list.append(NoExclusivityFilter())
-        self.filter_list.append(AffinityFilter())
+        diversity = DiversityFilter()
+        quorum_diversity = QuorumDiversityFilter()
+        exclusivity = ExclusivityFilter()
+        no_exclusivity = NoExclusivityFilter()
+        affinity = AffinityFilter()
 
         # Apply dynamic aggregate filter to determine the host's aggregate
         # in a lazy way.
-        self.filter_list.append(DynamicAggregateFilter())
+        dynamic_aggregate = DynamicAggregateFilter(_capacity_index)
+
+        # The original order of filters
+        self.filter_list = [az, aggregate,
+                            CPUFilter(_capacity_index), MemFilter(_capacity_index),
+                            DiskFilter(_capacity_index), numa,
+                            diversity, quorum_diversity,
+                            exclusivity, no_exclusivity, affinity,
+                            dynamic_aggregate]
+
+        # The same filters in stages, where CPU, memory, and disk filters are
+        # fused into one. Filters within a stage keep or remove each candidate
+        # on its own, so they are applied cheapest and most selective first.
+        # Stages are applied in order, since quorum-diversity depends on the
+        # whole candidate list and dynamic aggregate changes candidates.
+        self.stages = [[az, aggregate, CapacityFilter(_capacity_index), numa, diversity],
+                       [quorum_diversity],
+                       [exclusivity, no_exclusivity, affinity],
+                       [dynamic_aggregate]]
+
+        # Filters of which results only depend on the shape of server (or
+        # group) and the static state of candidate (see get_static_state),
+        # so reused across servers of the same shape in the search.
+        self.static_filters = (az, aggregate)
+
+        # key = (filter name, shape, level),
+        # value = dict of static state of candidate to the result
+        self.static_results = {}
+
+        # Shape of each server (or group) of search
+        self.shapes = {}
+
+        # Stats shared by all searches of the datacenter
+        self.stats = _stats
+        if self.stats is None:
+            self.stats = FilterStats()
 
         self.status = "ok"
 
     def get_candidate_list(self, _n, _avail_resources, _avail_hosts, _avail_groups):
-        """Filter candidate hosts using a list of filters."""
+        """Filter candidate hosts using stages of filters."""
 
         level = _avail_resources.level
 
@@ -86,32 +177,140 @@ class ConstraintSolver(object):
             self.logger.warning(self.status)
             return []
 
+        all_candidates = list(candidate_list)
+
+        for stage in self.stages:
+            if len(stage) > 1:
+                order = sorted(range(len(stage)),
+                               key=lambda i: (self.stats.get_rank(stage[i].name), i))
+                filter_list = [stage[i] for i in order]
+            else:
+                filter_list = stage
+
+            for f in filter_list:
+                f.init_condition()
+
+                if not f.check_pre_condition(level, _n, _avail_hosts, _avail_groups):
+                    if f.status is not None:
+                        break
+
+                    self.logger.debug("skip " + f.name + " constraint for node = " + _n.vid)
+                    continue
+
+                num_of_candidates = len(candidate_list)
+                begin = time.perf_counter()
+
+                if f in self.static_filters:
+                    candidate_list = self._filter_static(f, level, _n, candidate_list)
+                else:
+                    candidate_list = f.filter_candidates(level, _n, candidate_list)
+
+                self.stats.add(f.name, num_of_candidates, len(candidate_list),
+                               time.perf_counter() - begin)
+
+                if ghost_candidate and ghost_candidate not in candidate_list:
+                    candidate_list.append(ghost_candidate)
+
+                if len(candidate_list) == 0:
+                    break
+
+                str_num = str(len(candidate_list))
+                self.logger.debug("pass " + f.name + " constraint for node = " + _n.vid + " with " + str_num)
+            else:
+                continue
+
+            if len(stage) > 1:
+                # Rerun in the original order to report the same violation.
+                return self._get_candidate_list_in_order(_n, level, all_candidates, ghost_candidate,
+                                                         _avail_hosts, _avail_groups)
+
+            self._set_violation(_n, level, f, len(candidate_list) > 0)
+            return []
+
+        return candidate_list
+
+    def _filter_static(self, _f, _level, _v, _candidate_list):
+        """Filter candidates reusing the results of the same shape.
+
+        Only candidates of which static state was changed (e.g., host type
+        determined while placing others) or not seen yet are checked again.
+        """
+
+        shape = self.shapes.get(_v)
+        if shape is None:
+            if isinstance(_v, Server):
+                shape = get_fingerprint("server", _v.availability_zone, _v.extra_specs_list)
+            else:
+                shape = get_fingerprint("group", _v.availability_zone_list, _v.extra_specs_list)
+            self.shapes[_v] = shape
+
+        results = self.static_results.get((_f.name, shape, _level))
+        if results is None:
+            results = {}
+            self.static_results[(_f.name, shape, _level)] = results
+
+        candidate_list = []
+
+        for c in _candidate_list:
+            state = c.get_static_state(_level)
+            if state is None:
+                ok = _f._check_candidate(_level, _v, c)
+            else:
+                ok = results.get(state)
+                if ok is None:
+                    ok = _f._check_candidate(_level, _v, c)
+                    results[state] = ok
+
+            if ok:
+                candidate_list.append(c)
+
+        return candidate_list
+
+    def _get_candidate_list_in_order(self, _n, _level, _candidate_list, _ghost_candidate,
+                                     _avail_hosts, _avail_groups):
+        """Filter candidate hosts applying filters in the original order."""
+
+        candidate_list = _candidate_list
+
         for f in self.filter_list:
             f.init_condition()
 
-            if not f.check_pre_condition(level, _n, _avail_hosts, _avail_groups):
+            if not f.check_pre_condition(_level, _n, _avail_hosts, _avail_groups):
                 if f.status is not None:
-                    self.status = f.status
-                    self.logger.error(self.status)
+                    self._set_violation(_n, _level, f, True)
                     return []
                 else:
                     self.logger.debug("skip " + f.name + " constraint for node = " + _n.vid)
 
                 continue
 
-            candidate_list = f.filter_candidates(level, _n, candidate_list)
+            candidate_list = f.filter_candidates(_level, _n, candidate_list)
 
-            if ghost_candidate and ghost_candidate not in candidate_list:
-                candidate_list.append(ghost_candidate)
+            if _ghost_candidate and _ghost_candidate not in candidate_list:
+                candidate_list.append(_ghost_candidate)
 
             if len(candidate_list) == 0:
-                self.status = "violate " + level + " " + f.name + " constraint for node = " + _n.vid
-                if f.status is not None:
-                    self.status += " detail: " + f.status
-                self.logger.debug(self.status)
+                self._set_violation(_n, _level, f, False)
                 return []
             elif len(candidate_list) > 0:
                 str_num = str(len(candidate_list))
                 self.logger.debug("pass " + f.name + " constraint for node = " + _n.vid + " with " + str_num)
 
         return candidate_list
+
+    def _set_violation(self, _n, _level, _f, _pre_condition):
+        """Set status when the filter fails its pre-condition or all candidates."""
+
+        if _pre_condition:
+            self.status = _f.status
+            self.logger.error(self.status)
+        else:
+            self.status = "violate " + _level + " " + _f.name + " constraint for node = " + _n.vid
+            if _f.status is not None:
+                self.status += " detail: " + _f.status
+            self.logger.debug(self.status)
+
+    def get_stats(self):
+        """Get runtime stats of filters."""
+
+        return self.stats.get_info()
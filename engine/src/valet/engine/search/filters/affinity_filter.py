@@ -52,18 +52,20 @@ class AffinityFilter(object):
 
         candidate_list = []
 
+        index = None
+        mask = 0
+
         for c in _candidate_list:
-            if self._check_candidate(_level, c):
+            if c.group_index is not index:
+                index = c.group_index
+                mask = index.get_group_mask(self.affinity_id, "affinity")
+
+            if self._check_candidate(_level, c, mask):
                 candidate_list.append(c)
 
         return candidate_list
 
-    def _check_candidate(self, _level, _candidate):
+    def _check_candidate(self, _level, _candidate, _mask):
         """Filter based on named affinity group."""
 
-        memberships = _candidate.get_all_memberships(_level)
-        for gk, gr in memberships.items():
-            if gr.group_type == "affinity" and gk == self.affinity_id:
-                return True
-
-        return False
+        return _candidate.get_all_membership_bits(_level) & _mask != 0
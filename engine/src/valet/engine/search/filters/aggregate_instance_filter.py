@@ -17,7 +17,6 @@
 # -------------------------------------------------------------------------
 #
 from . import filter_utils
-import six
 
 
 _SCOPE = 'aggregate_instance_extra_specs'
@@ -31,6 +30,10 @@ class AggregateInstanceExtraSpecsFilter(object):
         self.avail_hosts = {}
         self.status = None
 
+        # Compiled extra specs of each server (or group) of search,
+        # key = server, value = list of list of (key, Requirement)
+        self.requirements = {}
+
     def init_condition(self):
         self.avail_hosts = {}
         self.status = None
@@ -61,46 +64,46 @@ class AggregateInstanceExtraSpecsFilter(object):
         else:
             # In rack level, if any host's host_type in the rack is not determined,
             # skip the filter
-            for _, rh in self.avail_hosts.items():
-                if rh.rack_name == _candidate.rack_name:
-                    if len(rh.candidate_host_types) > 0:
-                        return True
+            for rh in _candidate.rack_hosts:
+                if len(rh.candidate_host_types) > 0:
+                    return True
 
         metadatas = filter_utils.aggregate_metadata_get_by_host(_level, _candidate)
 
-        for extra_specs in _v.extra_specs_list:
+        for requirements in self._get_requirements(_v):
             for gk, metadata in metadatas.items():
-                if self._match_metadata(gk, extra_specs, metadata):
+                if self._match_metadata(gk, requirements, metadata):
                     break
             else:
                 return False
 
         return True
 
-    def _match_metadata(self, _g_name, _extra_specs, _metadata):
+    def _get_requirements(self, _v):
+        """Get extra specs of server compiled once per search."""
+
+        requirements_list = self.requirements.get(_v)
+        if requirements_list is None:
+            requirements_list = []
+            for extra_specs in _v.extra_specs_list:
+                requirements_list.append(filter_utils.compile_extra_specs(extra_specs, _SCOPE))
+            self.requirements[_v] = requirements_list
+
+        return requirements_list
+
+    def _match_metadata(self, _g_name, _requirements, _metadata):
         """Match conditions
            - No extra_specs
            - Different SCOPE of extra_specs keys
            - key of extra_specs exists in metadata & any value matches
         """
 
-        for key, req in six.iteritems(_extra_specs):
-            scope = key.split(':', 1)
-            if len(scope) > 1:
-                if scope[0] != _SCOPE:
-                    continue
-                else:
-                    del scope[0]
-            key = scope[0]
-
+        for key, req in _requirements:
             aggregate_vals = _metadata.get(key, None)
             if not aggregate_vals:
                 return False
 
-            for aggregate_val in aggregate_vals:
-                if filter_utils.match(aggregate_val, req):
-                    break
-            else:
+            if not req.match_any(aggregate_vals):
                 return False
 
         return True
@@ -0,0 +1,59 @@
+#
+# -------------------------------------------------------------------------
+#   Copyright (c) 2019 AT&T Intellectual Property
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# -------------------------------------------------------------------------
+#
+
+
+class CapacityFilter(object):
+    """Check CPU, memory, and local disk of candidates in one pass.
+
+    Keep the same candidates as CPUFilter, MemFilter, and DiskFilter
+    applied one after another.
+    """
+
+    def __init__(self, _capacity_index=None):
+        self.name = "capacity"
+
+        self.status = None
+
+        # Optional array-backed capacity of search
+        self.capacity_index = _capacity_index
+
+    def init_condition(self):
+        self.status = None
+
+    def check_pre_condition(self, _level, _v, _avail_hosts, _avail_groups):
+        return True
+
+    def filter_candidates(self, _level, _v, _candidate_list):
+        vcpus = _v.vCPUs
+        mem = _v.mem
+        disk = _v.local_volume_size
+
+        if self.capacity_index is not None:
+            candidate_list = self.capacity_index.filter_capacities(_level,
+                                                                   (("vcpus", vcpus),
+                                                                    ("mem", mem),
+                                                                    ("disk", disk)),
+                                                                   _candidate_list)
+            if candidate_list is not None:
+                return candidate_list
+
+        return [c for c in _candidate_list
+                if c.get_vcpus(_level) >= vcpus and
+                c.get_mem(_level) >= mem and
+                c.get_local_disk(_level) >= disk]
@@ -18,11 +18,14 @@
 #
 class DiskFilter(object):
 
-    def __init__(self):
+    def __init__(self, _capacity_index=None):
         self.name = "disk"
 
         self.status = None
 
+        # Optional array-backed capacity of search
+        self.capacity_index = _capacity_index
+
     def init_condition(self):
         self.status = None
 
@@ -30,6 +33,11 @@ class DiskFilter(object):
         return True
 
     def filter_candidates(self, _level, _v, _candidate_list):
+        if self.capacity_index is not None:
+            candidate_list = self.capacity_index.filter_capacity(_level, "disk", _v.local_volume_size, _candidate_list)
+            if candidate_list is not None:
+                return candidate_list
+
         candidate_list = []
 
         for c in _candidate_list:
@@ -43,20 +43,29 @@ class DiversityFilter(object):
     def filter_candidates(self, _level, _v, _candidate_list):
         candidate_list = []
 
+        index = None
+        mask = 0
+
         for c in _candidate_list:
-            if self._check_candidate(_level, c):
+            if c.group_index is not index:
+                index = c.group_index
+                mask = self._get_mask(index)
+
+            if self._check_candidate(_level, c, mask):
                 candidate_list.append(c)
 
         return candidate_list
 
-    def _check_candidate(self, _level, _candidate):
-        """Filter based on named diversity groups."""
-
-        memberships = _candidate.get_memberships(_level)
+    def _get_mask(self, _index):
+        """Get bits of diversity groups."""
 
+        mask = 0
         for diversity_id in self.diversity_list:
-            for gk, gr in memberships.items():
-                if gr.group_type == "diversity" and gk == diversity_id:
-                    return False
+            mask |= _index.get_group_mask(diversity_id, "diversity")
+
+        return mask
+
+    def _check_candidate(self, _level, _candidate, _mask):
+        """Filter based on named diversity groups."""
 
-        return True
+        return _candidate.get_membership_bits(_level) & _mask == 0
@@ -16,8 +16,6 @@
 #
 # -------------------------------------------------------------------------
 #
-import copy
-
 from valet.engine.app_manager.server import Server
 from valet.engine.search.filters.aggregate_instance_filter import AggregateInstanceExtraSpecsFilter
 from valet.engine.search.filters.cpu_filter import CPUFilter
@@ -28,7 +26,7 @@ from valet.engine.search.filters.numa_filter import NUMAFilter
 
 class DynamicAggregateFilter(object):
 
-    def __init__(self):
+    def __init__(self, _capacity_index=None):
         self.name = "dynamic-aggregate"
 
         self.avail_hosts = {}
@@ -42,6 +40,9 @@ class DynamicAggregateFilter(object):
 
         self.status = None
 
+        # Optional array-backed capacity of search
+        self.capacity_index = _capacity_index
+
     def init_condition(self):
         self.avail_hosts = {}
         self.avail_groups = {}
@@ -85,17 +86,20 @@ class DynamicAggregateFilter(object):
         candidate.adjust_avail_resources(ha)
 
         # Change all others in the same rack.
-        for hrk, hr in self.avail_hosts.items():
-            if hrk != candidate.host_name:
-                if hr.rack_name == candidate.rack_name:
-                    hr.adjust_avail_rack_resources(ha, 
-                                                   candidate.rack_avail_vCPUs,
-                                                   candidate.rack_avail_mem,
-                                                   candidate.rack_avail_local_disk)
+        for hr in candidate.rack_hosts:
+            if hr is not candidate:
+                hr.adjust_avail_rack_resources(ha,
+                                               candidate.rack_avail_vCPUs,
+                                               candidate.rack_avail_mem,
+                                               candidate.rack_avail_local_disk)
 
         # Once the host type (ha) is determined, remove candidate_host_types
-        candidate.old_candidate_host_types = copy.deepcopy(candidate.candidate_host_types)
-        candidate.candidate_host_types.clear()
+        # Host types are not changed while searching, so keep them as they are.
+        candidate.old_candidate_host_types = candidate.candidate_host_types
+        candidate.candidate_host_types = {}
+
+        if self.capacity_index is not None:
+            self.capacity_index.refresh(candidate.host_name)
 
         # Filter against host-aggregate, cpu, mem, disk, numa
 
@@ -127,15 +131,17 @@ class DynamicAggregateFilter(object):
         else:
             # Rollback
             candidate.rollback_avail_resources(ha)
-            candidate.candidate_host_types = copy.deepcopy(candidate.old_candidate_host_types)
-            candidate.old_candidate_host_types.clear()
-
-            for hrk, hr in self.avail_hosts.items():
-                if hrk != candidate.host_name:
-                    if hr.rack_name == candidate.rack_name:
-                        hr.rollback_avail_rack_resources(ha,
-                                                         candidate.rack_avail_vCPUs,
-                                                         candidate.rack_avail_mem,
-                                                         candidate.rack_avail_local_disk)
+            candidate.candidate_host_types = candidate.old_candidate_host_types
+            candidate.old_candidate_host_types = {}
+
+            for hr in candidate.rack_hosts:
+                if hr is not candidate:
+                    hr.rollback_avail_rack_resources(ha,
+                                                     candidate.rack_avail_vCPUs,
+                                                     candidate.rack_avail_mem,
+                                                     candidate.rack_avail_local_disk)
+
+            if self.capacity_index is not None:
+                self.capacity_index.refresh(candidate.host_name)
 
             return []
@@ -56,21 +56,22 @@ class ExclusivityFilter(object):
     def _get_candidates(self, _level, _candidate_list):
         candidate_list = []
 
+        index = None
+        mask = 0
+
         for c in _candidate_list:
-            if self._check_exclusive_candidate(_level, c) is True or \
+            if c.group_index is not index:
+                index = c.group_index
+                mask = index.get_group_mask(self.exclusivity_id, "exclusivity")
+
+            if self._check_exclusive_candidate(_level, c, mask) is True or \
                self._check_empty(_level, c) is True:
                 candidate_list.append(c)
 
         return candidate_list
 
-    def _check_exclusive_candidate(self, _level, _candidate):
-        memberships = _candidate.get_memberships(_level)
-
-        for gk, gr in memberships.items():
-            if gr.group_type == "exclusivity" and gk == self.exclusivity_id:
-                return True
-
-        return False
+    def _check_exclusive_candidate(self, _level, _candidate, _mask):
+        return _candidate.get_membership_bits(_level) & _mask != 0
 
     def _check_empty(self, _level, _candidate):
         num_of_placed_servers = _candidate.get_num_of_placed_servers(_level)
@@ -40,44 +40,122 @@ op_methods = {'=': lambda x, y: float(x) >= float(y),
               's>=': operator.ge}
 
 
-def match(value, req):
-    words = req.split()
+class Requirement(object):
+    """Extra spec requirement (e.g., '<in> ssd') parsed once,
+    then matched with metadata values as many times as needed.
+    """
 
-    op = method = None
-    if words:
-        op = words.pop(0)
-        method = op_methods.get(op)
+    def __init__(self, _req):
+        self.req = _req
+
+        self.words = _req.split()
+
+        self.op = self.method = None
+        if self.words:
+            self.op = self.words.pop(0)
+            self.method = op_methods.get(self.op)
+
+        # Values any of which matches, if matched by equality only.
+        self.values = None
+        if self.op != '<or>' and not self.method:
+            self.values = frozenset([_req])
+        elif self.op == '<or>':
+            if self.words:
+                # Ex: <or> v1 <or> v2 <or> v3
+                self.values = frozenset(self.words[0::2])
+        elif self.op == 's==' and self.words:
+            self.values = frozenset([self.words[0]])
+
+    def match(self, _value):
+        if self.op != '<or>' and not self.method:
+            return _value == self.req
+
+        if _value is None:
+            return False
+
+        if self.op == '<or>':
+            if not self.words:
+                raise IndexError("no value of <or> in " + self.req)
+            return _value in self.values
+
+        if self.words:
+            if self.op == '<all-in>':  # requires a list not a string
+                return self.method(_value, self.words)
+            return self.method(_value, self.words[0])
+        return False
 
-    if op != '<or>' and not method:
-        return value == req
+    def match_any(self, _values):
+        """Check if any of values (a set) matches."""
 
-    if value is None:
-        return False
+        if self.values is not None:
+            return not self.values.isdisjoint(_values)
 
-    if op == '<or>':  # Ex: <or> v1 <or> v2 <or> v3
-        while True:
-            if words.pop(0) == value:
+        for v in _values:
+            if self.match(v):
                 return True
-            if not words:
-                break
-            words.pop(0)  # remove a keyword <or>
-            if not words:
-                break
         return False
 
-    if words:
-        if op == '<all-in>':  # requires a list not a string
-            return method(value, words)
-        return method(value, words[0])
-    return False
+
+def match(value, req):
+    return Requirement(req).match(value)
+
+
+def compile_extra_specs(_extra_specs, _scope):
+    """Get the list of (metadata key, Requirement) of extra specs.
+
+    Keys of other scopes than the given are skipped.
+    """
+
+    requirements = []
+
+    for key, req in _extra_specs.items():
+        scope = key.split(':', 1)
+        if len(scope) > 1:
+            if scope[0] != _scope:
+                continue
+            else:
+                del scope[0]
+
+        requirements.append((scope[0], Requirement(req)))
+
+    return requirements
+
+
+def _get_aggregate_metadata(_g):
+    """Get metadata of host-aggregate with values split by comma.
+
+    Computed once per group of search.
+    """
+
+    if _g.aggregate_metadata is not None:
+        return _g.aggregate_metadata
+
+    metadata = collections.defaultdict(set)
+    for k, v in _g.metadata.items():
+        if k != "prior_metadata":
+            metadata[k].update(x.strip() for x in v.split(','))
+        else:
+            # metadata[k] = v
+            if isinstance(_g.metadata["prior_metadata"], dict):
+                for ik, iv in _g.metadata["prior_metadata"].items():
+                    metadata[ik].update(y.strip() for y in iv.split(','))
+
+    _g.aggregate_metadata = metadata
+    return metadata
 
 
 def aggregate_metadata_get_by_host(_level, _host, _key=None):
     """Returns a dict of all metadata based on a metadata key for a specific host.
 
-    If the key is not provided, returns a dict of all metadata.
+    If the key is not provided, returns a dict of all metadata, kept in
+    the host until its memberships are changed. Do not change it.
     """
 
+    if _key is None:
+        metadatas = _host.aggregate_metadatas.get(_level)
+        if metadatas is not None:
+            return metadatas
+
     metadatas = {}
 
     groups = _host.get_memberships(_level)
@@ -85,16 +163,10 @@ def aggregate_metadata_get_by_host(_level, _host, _key=None):
     for gk, g in groups.items():
         if g.group_type == "aggr":
             if _key is None or _key in g.metadata:
-                metadata = collections.defaultdict(set)
-                for k, v in g.metadata.items():
-                    if k != "prior_metadata":
-                        metadata[k].update(x.strip() for x in v.split(','))
-                    else:
-                        # metadata[k] = v
-                        if isinstance(g.metadata["prior_metadata"], dict):
-                            for ik, iv in g.metadata["prior_metadata"].items():
-                                metadata[ik].update(y.strip() for y in iv.split(','))
-                metadatas[gk] = metadata
+                metadatas[gk] = _get_aggregate_metadata(g)
+
+    if _key is None:
+        _host.aggregate_metadatas[_level] = metadatas
 
     return metadatas
 
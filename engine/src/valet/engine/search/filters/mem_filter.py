@@ -18,11 +18,14 @@
 #
 class MemFilter(object):
 
-    def __init__(self):
+    def __init__(self, _capacity_index=None):
         self.name = "mem"
 
         self.status = None
 
+        # Optional array-backed capacity of search
+        self.capacity_index = _capacity_index
+
     def init_condition(self):
         self.status = None
 
@@ -30,6 +33,11 @@ class MemFilter(object):
         return True
 
     def filter_candidates(self, _level, _v, _candidate_list):
+        if self.capacity_index is not None:
+            candidate_list = self.capacity_index.filter_capacity(_level, "mem", _v.mem, _candidate_list)
+            if candidate_list is not None:
+                return candidate_list
+
         candidate_list = []
 
         for c in _candidate_list:
@@ -37,17 +37,20 @@ class NoExclusivityFilter(object):
     def filter_candidates(self, _level, _v, _candidate_list):
         candidate_list = []
 
+        index = None
+        mask = 0
+
         for c in _candidate_list:
-            if self._check_candidate(_level, c):
+            if c.group_index is not index:
+                index = c.group_index
+                mask = index.get_type_mask("exclusivity", _level)
+
+            if self._check_candidate(_level, c, mask):
                 candidate_list.append(c)
 
         return candidate_list
 
-    def _check_candidate(self, _level, _candidate):
-        memberships = _candidate.get_memberships(_level)
-
-        for _, g in memberships.items():
-            if g.group_type == "exclusivity" and g.level == _level:
-                return False
+    def _check_candidate(self, _level, _candidate, _mask):
+        """Filter out candidate having any exclusivity group of this level."""
 
-        return True
+        return _candidate.get_membership_bits(_level) & _mask == 0
@@ -25,13 +25,16 @@ _SCOPE = 'hw'
 class NUMAFilter(object):
     """Check NUMA alignment request in Flavor."""
 
-    def __init__(self):
+    def __init__(self, _capacity_index=None):
         """Define filter name and status."""
 
         self.name = "numa"
 
         self.status = None
 
+        # Optional array-backed capacity of search
+        self.capacity_index = _capacity_index
+
     def init_condition(self):
         """Init variable."""
 
@@ -49,6 +52,11 @@ class NUMAFilter(object):
     def filter_candidates(self, _level, _v, _candidate_list):
         """Check and filter one candidate at a time."""
 
+        if self.capacity_index is not None:
+            candidate_list = self.capacity_index.filter_numa(_v.vCPUs, _v.mem, _candidate_list)
+            if candidate_list is not None:
+                return candidate_list
+
         candidate_list = []
 
         for c in _candidate_list:
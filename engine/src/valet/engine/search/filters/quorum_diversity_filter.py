@@ -48,8 +48,15 @@ class QuorumDiversityFilter(object):
 
         # First, try diversity rule.
 
+        index = None
+        mask = 0
+
         for c in _candidate_list:
-            if self._check_diversity_candidate(_level, c):
+            if c.group_index is not index:
+                index = c.group_index
+                mask = self._get_mask(index)
+
+            if self._check_diversity_candidate(_level, c, mask):
                 candidate_list.append(c)
 
         if len(candidate_list) > 0:
@@ -63,17 +70,19 @@ class QuorumDiversityFilter(object):
 
         return candidate_list
 
-    def _check_diversity_candidate(self, _level, _candidate):
-        """Filter based on named diversity groups."""
-
-        memberships = _candidate.get_memberships(_level)
+    def _get_mask(self, _index):
+        """Get bits of quorum-diversity groups."""
 
+        mask = 0
         for qdiv in self.quorum_diversity_group_list:
-            for gk, gr in memberships.items():
-                if gr.group_type == "quorum-diversity" and gk == qdiv.vid:
-                    return False
+            mask |= _index.get_group_mask(qdiv.vid, "quorum-diversity")
 
-        return True
+        return mask
+
+    def _check_diversity_candidate(self, _level, _candidate, _mask):
+        """Filter based on named diversity groups."""
+
+        return _candidate.get_membership_bits(_level) & _mask == 0
 
     def _check_quorum_candidate(self, _level, _candidate):
         """Filter based on quorum-diversity rule."""
@@ -87,15 +96,13 @@ class QuorumDiversityFilter(object):
 
             num_of_placed_servers_in_candidate = -1
 
-            for gk, gr in memberships.items():
-                if gr.group_type == "quorum-diversity" and gk == qdiv.vid:
-                    # Total num of servers under this rule
-                    total_num_of_servers += gr.original_num_of_placed_servers
-
-                    if hk in gr.num_of_placed_servers_of_host.keys():
-                        num_of_placed_servers_in_candidate = gr.num_of_placed_servers_of_host[hk]
+            gr = memberships.get(qdiv.vid)
+            if gr is not None and gr.group_type == "quorum-diversity":
+                # Total num of servers under this rule
+                total_num_of_servers += gr.original_num_of_placed_servers
 
-                    break
+                if hk in gr.num_of_placed_servers_of_host.keys():
+                    num_of_placed_servers_in_candidate = gr.num_of_placed_servers_of_host[hk]
 
             # Allowed maximum num of servers per host
             quorum = max(math.ceil(float(total_num_of_servers) / 2.0 - 1.0), 1.0)
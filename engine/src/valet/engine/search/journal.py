@@ -0,0 +1,79 @@
+#
+# -------------------------------------------------------------------------
+#   Copyright (c) 2019 AT&T Intellectual Property
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# -------------------------------------------------------------------------
+#
+
+
+# Kinds of journal entries
+ATTR = 0
+ITEM = 1
+CALL = 2
+
+# Old value of dict item that did not exist
+MISSING = object()
+
+
+class Journal(object):
+    """Undo log of changes made to search state.
+
+    Every change is recorded with its old value. Undo to a mark reverts
+    exactly the changes made after the mark, in the reverse order.
+    """
+
+    def __init__(self):
+        self.entries = []
+
+    def mark(self):
+        """Get the current position to undo to."""
+
+        return len(self.entries)
+
+    def set_attr(self, _obj, _name, _value):
+        """Set attribute of object."""
+
+        self.entries.append((ATTR, _obj, _name, getattr(_obj, _name)))
+        setattr(_obj, _name, _value)
+
+    def set_item(self, _dict, _key, _value):
+        """Set item of dict."""
+
+        self.entries.append((ITEM, _dict, _key, _dict.get(_key, MISSING)))
+        _dict[_key] = _value
+
+    def add_undo(self, _func, *_args):
+        """Call the function with args when undone."""
+
+        self.entries.append((CALL, _func, _args, None))
+
+    def undo(self, _mark):
+        """Revert all changes made after the mark."""
+
+        while len(self.entries) > _mark:
+            (kind, target, key, old) = self.entries.pop()
+
+            if kind == ATTR:
+                setattr(target, key, old)
+            elif kind == ITEM:
+                if old is MISSING:
+                    del target[key]
+                else:
+                    target[key] = old
+            else:
+                target(*key)
+
+    def clear(self):
+        del self.entries[:]
@@ -24,10 +24,10 @@ from valet.engine.search.search import Search
 class Optimizer(object):
     """Optimizer to compute the optimal placements."""
 
-    def __init__(self, _logger):
+    def __init__(self, _logger, _use_capacity_index=False):
         self.logger = _logger
 
-        self.search = Search(self.logger)
+        self.search = Search(self.logger, _use_capacity_index)
 
     def place(self, _app):
         """Scheduling placements given app."""
@@ -203,7 +203,7 @@ class Optimizer(object):
         # Convert/set host's type to one as specified in VM.
         for v, p in self.search.node_placements.items():
             if isinstance(v, Server):
-                # The host object p was deep copied, so use original object.
+                # p is the placement record, so use the host object.
                 rh = self.search.avail_hosts[p.host_name]
 
                 if rh.old_candidate_host_types is not None and len(rh.old_candidate_host_types) > 0:
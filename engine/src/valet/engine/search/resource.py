@@ -19,6 +19,82 @@
 from valet.engine.resource_manager.resources.numa import NUMA
 
 
+def get_numa(_numa):
+    """Get NUMA of the host type without sharing its server lists.
+
+    So that placements in search do not change the host types kept for rollback.
+    """
+
+    numa = NUMA(numa=_numa)
+    numa.cell_0["server_list"] = list(numa.cell_0["server_list"])
+    numa.cell_1["server_list"] = list(numa.cell_1["server_list"])
+
+    return numa
+
+
+class GroupIndex(object):
+    """Integer ids of groups in memberships of search.
+
+    Each group gets a bit when first added into memberships, so that
+    memberships are also kept as a bitset and checked with bitwise AND.
+    """
+
+    def __init__(self):
+        # key = group name, value = bit
+        self.bits = {}
+
+        # key = (group type, level), value = bits of groups
+        self.type_masks = {}
+
+    def get_bit(self, _name, _gr):
+        bit = self.bits.get(_name)
+
+        if bit is None:
+            bit = 1 << len(self.bits)
+            self.bits[_name] = bit
+
+            tk = (_gr.group_type, _gr.level)
+            self.type_masks[tk] = self.type_masks.get(tk, 0) | bit
+
+        return bit
+
+    def get_type_mask(self, _group_type, _level=None):
+        """Get bits of groups of the type (and level, if given)."""
+
+        mask = 0
+        for (group_type, level), bits in self.type_masks.items():
+            if group_type == _group_type and (_level is None or level == _level):
+                mask |= bits
+
+        return mask
+
+    def get_group_mask(self, _name, _group_type):
+        """Get the bit of the group if it is of the type, otherwise 0."""
+
+        return self.bits.get(_name, 0) & self.get_type_mask(_group_type)
+
+
+class Memberships(dict):
+    """Groups of host (or rack), key = group name, value = GroupResource.
+
+    Keep the bitset of groups in sync while items are set or deleted.
+    """
+
+    def __init__(self, _index):
+        dict.__init__(self)
+
+        self.index = _index
+        self.bits = 0
+
+    def __setitem__(self, _name, _gr):
+        dict.__setitem__(self, _name, _gr)
+        self.bits |= self.index.get_bit(_name, _gr)
+
+    def __delitem__(self, _name):
+        dict.__delitem__(self, _name)
+        self.bits &= ~self.index.bits[_name]
+
+
 class GroupResource(object):
     """Container for all resource group includes
 
@@ -34,6 +110,9 @@ class GroupResource(object):
 
         self.metadata = {}
 
+        # Metadata values split by comma, set by filters when used
+        self.aggregate_metadata = None
+
         self.original_num_of_placed_servers = 0
         self.num_of_placed_servers = 0
 
@@ -44,11 +123,16 @@ class GroupResource(object):
 class HostResource(object):
     """Container for hosting resource (host, rack)."""
 
-    def __init__(self):
+    def __init__(self, _group_index=None):
+        # Group ids shared by all hosts of search
+        if _group_index is None:
+            _group_index = GroupIndex()
+        self.group_index = _group_index
+
         # Host info
         self.host_name = None
 
-        self.host_memberships = {}              # all mapped groups to host
+        self.host_memberships = Memberships(_group_index)    # all mapped groups to host
 
         self.host_avail_vCPUs = 0               # remaining vCPUs after overcommit
         self.host_avail_mem = 0                 # remaining mem cap after
@@ -69,7 +153,7 @@ class HostResource(object):
         # Rack info
         self.rack_name = None                   # where this host is located
 
-        self.rack_memberships = {}
+        self.rack_memberships = Memberships(_group_index)
 
         self.rack_avail_vCPUs = 0
         self.rack_avail_mem = 0
@@ -77,6 +161,9 @@ class HostResource(object):
 
         self.rack_num_of_placed_servers = 0
 
+        # All hosts in the same rack including this one
+        self.rack_hosts = []
+
         # To track newly added host types.
         self.new_rack_aggregate_list = []
 
@@ -84,6 +171,10 @@ class HostResource(object):
 
         self.sort_base = 0    # order to place
 
+        # Metadata of host-aggregates of memberships, key = level.
+        # Set by filters when used, reset when host-aggregates are changed.
+        self.aggregate_metadatas = {}
+
     def get_host_type(self, _ha, _host_types):
         """Take host-aggregate group and
         return default host type of the host-aggregate.
@@ -115,6 +206,7 @@ class HostResource(object):
         if _ha.name not in self.rack_memberships.keys():
             self.rack_memberships[_ha.name] = _ha
             self.new_rack_aggregate_list.append(_ha.name)
+        self.aggregate_metadatas = {}
 
         host_type = self.get_host_type(_ha, self.candidate_host_types)
 
@@ -122,7 +214,7 @@ class HostResource(object):
         self.host_avail_mem = host_type["avail_mem"]
         self.host_avail_local_disk = host_type["avail_local_disk"]
 
-        self.NUMA = NUMA(numa=host_type["NUMA"])
+        self.NUMA = get_numa(host_type["NUMA"])
 
         if self.candidate_host_types is not None:
             for htk, htl in self.candidate_host_types.items():
@@ -146,6 +238,7 @@ class HostResource(object):
         if _ha.name not in self.rack_memberships.keys():
             self.rack_memberships[_ha.name] = _ha
             self.new_rack_aggregate_list.append(_ha.name)
+        self.aggregate_metadatas = {}
 
         self.rack_avail_vCPUs = _cpus
         self.rack_avail_mem = _mem
@@ -158,6 +251,7 @@ class HostResource(object):
         if _ha.name in self.new_rack_aggregate_list:
             del self.rack_memberships[_ha.name]
             self.new_rack_aggregate_list.remove(_ha.name)
+        self.aggregate_metadatas = {}
 
         host_type = self.get_host_type(_ha, self.old_candidate_host_types)
 
@@ -168,7 +262,7 @@ class HostResource(object):
                     self.host_avail_mem = htl[0]["avail_mem"]
                     self.host_avail_local_disk = htl[0]["avail_local_disk"]
 
-                    self.NUMA = NUMA(numa=htl[0]["NUMA"])
+                    self.NUMA = get_numa(htl[0]["NUMA"])
 
                     self.rack_avail_vCPUs -= host_type["avail_vCPUs"]
                     self.rack_avail_mem -= host_type["avail_mem"]
@@ -184,6 +278,7 @@ class HostResource(object):
         if _ha.name in self.new_rack_aggregate_list:
             del self.rack_memberships[_ha.name]
             self.new_rack_aggregate_list.remove(_ha.name)
+        self.aggregate_metadatas = {}
 
         self.rack_avail_vCPUs = _cpus
         self.rack_avail_mem = _mem
@@ -239,6 +334,40 @@ class HostResource(object):
 
         return memberships
 
+    def get_membership_bits(self, _level):
+        """Get the bitset of get_memberships()."""
+
+        return self.get_memberships(_level).bits
+
+    def get_all_membership_bits(self, _level):
+        """Get the bitset of get_all_memberships()."""
+
+        if _level == "rack":
+            return self.rack_memberships.bits | self.host_memberships.bits
+        elif _level == "host":
+            return self.host_memberships.bits
+
+        return 0
+
+    def get_static_state(self, _level):
+        """Get the state of candidate checked by availability-zone and
+        aggregate-instance-extra-specs filters, or None if unknown.
+
+        I.e., memberships and whether any host type is not determined yet.
+        """
+
+        if _level == "rack":
+            undetermined = False
+            for rh in self.rack_hosts:
+                if len(rh.candidate_host_types) > 0:
+                    undetermined = True
+                    break
+            return (self.rack_memberships.bits, undetermined)
+        elif _level == "host":
+            return (self.host_memberships.bits, len(self.candidate_host_types) > 0)
+
+        return None
+
     def get_all_memberships(self, _level):
         memberships = {}
 
@@ -262,3 +391,27 @@ class HostResource(object):
             num_of_servers = self.host_num_of_placed_servers
 
         return num_of_servers
+
+
+class Placement(object):
+    """Placement decision of server or group.
+
+    Keep only what is used after search instead of copying the whole host.
+    """
+
+    __slots__ = ("host_name", "rack_name", "level")
+
+    def __init__(self, _host, _level):
+        self.host_name = _host.host_name
+        self.rack_name = _host.rack_name
+        self.level = _level
+
+    def get_resource_name(self, _level):
+        name = "unknown"
+
+        if _level == "rack":
+            name = self.rack_name
+        elif _level == "host":
+            name = self.host_name
+
+        return name
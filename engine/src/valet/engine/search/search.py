@@ -16,23 +16,31 @@
 #
 # -------------------------------------------------------------------------
 #
-import copy
+import heapq
 import operator
 
 from valet.engine.app_manager.server import Server
 from valet.engine.resource_manager.resources.datacenter import Datacenter
 from valet.engine.search.avail_resources import AvailResources
-from valet.engine.search.constraint_solver import ConstraintSolver
-from valet.engine.search.resource import GroupResource, HostResource
+from valet.engine.search.capacity_index import CapacityIndex, is_supported
+from valet.engine.search.constraint_solver import ConstraintSolver, FilterStats
+from valet.engine.search.journal import Journal
+from valet.engine.search.resource import GroupIndex, GroupResource, HostResource, Placement
 from valet.engine.search.search_helper import *
 
 
 class Search(object):
     """Bin-packing approach in the hierachical datacenter layout."""
 
-    def __init__(self, _logger):
+    def __init__(self, _logger, _use_capacity_index=False):
         self.logger = _logger
 
+        # Use array-backed capacity filtering if available
+        self.use_capacity_index = _use_capacity_index
+        if self.use_capacity_index and not is_supported():
+            self.logger.warning("numpy not installed, capacity index disabled")
+            self.use_capacity_index = False
+
         # Search inputs
         self.app = None
         self.resource = None
@@ -41,18 +49,42 @@ class Search(object):
         self.avail_hosts = {}
         self.avail_groups = {}
 
+        # Group ids of memberships of avail_hosts
+        self.group_index = None
+
+        # Index of avail_hosts by rack
+        # key = rack name, value = list of hosts in the rack
+        self.racks = {}
+
         # Search results
         self.node_placements = {}
         self.prior_placements = {}    # TODO
         self.num_of_hosts = 0
 
+        # Undo log of search state for backtracking
+        self.journal = Journal()
+
         # Optimization criteria
         self.CPU_weight = -1
         self.mem_weight = -1
         self.local_disk_weight = -1
 
+        self.capacity_index = None
         self.constraint_solver = None
 
+        # Runtime stats of filters to order them, kept across searches
+        # key = datacenter id, value = FilterStats
+        self.filter_stats = {}
+
+    def get_filter_stats(self):
+        """Get runtime stats of filters per datacenter."""
+
+        filter_stats = {}
+        for dc_id, stats in self.filter_stats.items():
+            filter_stats[dc_id] = stats.get_info()
+
+        return filter_stats
+
     def _init_search(self, _app):
         """Init the search information and the output results."""
 
@@ -61,26 +93,44 @@ class Search(object):
 
         self.avail_hosts.clear()
         self.avail_groups.clear()
+        self.group_index = GroupIndex()
+        self.racks = {}
 
         self.node_placements.clear()
         self.prior_placements.clear()    # TODO
         self.num_of_hosts = 0
 
+        self.journal.clear()
+
         self.CPU_weight = -1
         self.mem_weight = -1
         self.local_disk_weight = -1
 
-        self.constraint_solver = ConstraintSolver(self.logger)
-
         self._create_avail_groups()
         self._create_avail_hosts()
 
+        self.capacity_index = None
+        if self.use_capacity_index:
+            self.capacity_index = CapacityIndex(self.avail_hosts)
+
+        stats = self.filter_stats.get(self.resource.datacenter_id)
+        if stats is None:
+            stats = FilterStats()
+            self.filter_stats[self.resource.datacenter_id] = stats
+
+        self.constraint_solver = ConstraintSolver(self.logger, self.capacity_index, stats)
+
         # TODO
         # if len(self.app.old_vm_map) > 0:
         #     self._adjust_resources()
 
         self._set_resource_weights()
 
+        if self.capacity_index is not None:
+            self.capacity_index.set_score_weights((self.CPU_weight, self.mem_weight, self.local_disk_weight),
+                                                  (self.resource.CPU_avail, self.resource.mem_avail,
+                                                   self.resource.local_disk_avail))
+
     def _create_avail_groups(self):
         """Collect all available resource groups.
 
@@ -123,7 +173,7 @@ class Search(object):
                 self.logger.warning("host (" + host.name + ") not available at this time")
                 continue
 
-            hr = HostResource()
+            hr = HostResource(self.group_index)
             hr.host_name = hk
 
             for mk in host.memberships.keys():
@@ -133,7 +183,7 @@ class Search(object):
             # Not used by Valet, only capacity planning
             try:
                 for htk, ht in host.candidate_host_types.items():
-                    hr.candidate_host_types[htk] = copy.deepcopy(ht)
+                    hr.candidate_host_types[htk] = list(ht)
             except AttributeError:
                 hr.candidate_host_types = {}
 
@@ -169,6 +219,11 @@ class Search(object):
 
             self.avail_hosts[hk] = hr
 
+            if hr.rack_name not in self.racks.keys():
+                self.racks[hr.rack_name] = []
+            self.racks[hr.rack_name].append(hr)
+            hr.rack_hosts = self.racks[hr.rack_name]
+
     def _set_resource_weights(self):
         """Compute weight of each resource type.
 
@@ -196,7 +251,7 @@ class Search(object):
 
         open_node_list = self._open_list(self.app.servers, self.app.groups)
 
-        avail_resources = AvailResources(LEVEL[len(LEVEL) - 1])
+        avail_resources = AvailResources(LEVEL[len(LEVEL) - 1], self.racks)
         avail_resources.avail_hosts = self.avail_hosts
         avail_resources.set_next_level()   # NOTE(Gueyoung): skip 'cluster' level
 
@@ -300,22 +355,43 @@ class Search(object):
                     self.app.status = "fail while getting candidate hosts"
             return None
 
-        if len(candidate_list) > 1:
-            self._set_compute_sort_base(_avail_resources.level, candidate_list)
-            candidate_list.sort(key=operator.attrgetter("sort_base"))
-
-        for c in candidate_list:
-            rn = c.get_resource_name(_avail_resources.level)
-            avail_cpus = c.get_vcpus(_avail_resources.level)
-            self.logger.debug("candidate = " + rn + " cpus = " + str(avail_cpus) + " sort = " + str(c.sort_base))
-
         best_resource = None
         if _avail_resources.level == "host" and isinstance(_n, Server):
-            best_resource = copy.deepcopy(candidate_list[0])
-            best_resource.level = "host"
+            # Only the best fit is used, so select it without sorting.
+            best = None
+            if len(candidate_list) > 1 and self.capacity_index is not None:
+                best = self.capacity_index.get_best_fit(candidate_list)
+
+            if best is None:
+                # Without the index, every candidate is scored again, since
+                # only the index tracks which hosts changed since the last.
+                if len(candidate_list) > 1:
+                    self._set_compute_sort_base(_avail_resources.level, candidate_list)
+
+                # The first one of the lowest sort_base, as the stable sort gives
+                best = min(candidate_list, key=operator.attrgetter("sort_base"))
+
+            rn = best.get_resource_name(_avail_resources.level)
+            avail_cpus = best.get_vcpus(_avail_resources.level)
+            self.logger.debug("best candidate = " + rn + " cpus = " + str(avail_cpus) +
+                              " among " + str(len(candidate_list)))
+
+            best_resource = Placement(best, "host")
         else:
+            if len(candidate_list) > 1:
+                self._set_compute_sort_base(_avail_resources.level, candidate_list)
+
+            # Candidates in the order of sort_base (and of the list if tied),
+            # taken one by one only as backtracking needs.
+            candidate_list = [(c.sort_base, i, c) for i, c in enumerate(candidate_list)]
+            heapq.heapify(candidate_list)
+
             while len(candidate_list) > 0:
-                cr = candidate_list.pop(0)
+                (sort_base, _, cr) = heapq.heappop(candidate_list)
+
+                rn = cr.get_resource_name(_avail_resources.level)
+                avail_cpus = cr.get_vcpus(_avail_resources.level)
+                self.logger.debug("candidate = " + rn + " cpus = " + str(avail_cpus) + " sort = " + str(sort_base))
 
                 (servers, groups) = get_next_placements(_n, _avail_resources.level)
                 open_node_list = self._open_list(servers, groups)
@@ -323,20 +399,23 @@ class Search(object):
                 avail_resources = AvailResources(_avail_resources.level)
                 resource_name = cr.get_resource_name(_avail_resources.level)
 
-                avail_resources.set_next_avail_hosts(_avail_resources.avail_hosts, resource_name)
+                avail_resources.set_next_avail_hosts(_avail_resources.avail_hosts,
+                                                     resource_name,
+                                                     _avail_resources.racks)
                 avail_resources.set_next_level()
 
+                mark = self.journal.mark()
+
                 # Recursive call
                 if self._run_greedy(open_node_list, avail_resources, _mode):
-                    best_resource = copy.deepcopy(cr)
-                    best_resource.level = _avail_resources.level
+                    best_resource = Placement(cr, _avail_resources.level)
                     break
                 else:
                     if prior_resource is None:
                         self.logger.warning("rollback candidate = " + resource_name)
 
-                        self._rollback_resources(_n)
-                        self._rollback_node_placement(_n)
+                        # Revert all placements made while trying this candidate.
+                        self.journal.undo(mark)
 
                         # TODO(Gueyoung): how to track the original error status?
                         if len(candidate_list) > 0 and self.app.status != "ok":
@@ -396,7 +475,7 @@ class Search(object):
 
         exclusivities = _n.get_exclusivities(_level)
         if len(exclusivities) == 1:
-            exclusivity_group = exclusivities[exclusivities.keys()[0]]
+            exclusivity_group = list(exclusivities.values())[0]
             self._add_exclusivity(_best, exclusivity_group)
 
         if isinstance(_n, Group):
@@ -423,32 +502,18 @@ class Search(object):
             gr.group_type = "exclusivity"
             gr.factory = "valet"
             gr.level = _group.level
-            self.avail_groups[gr.name] = gr
+            self.journal.set_item(self.avail_groups, gr.name, gr)
 
             self.logger.info("find exclusivity (" + _group.vid + ")")
         else:
             gr = self.avail_groups[_group.vid]
 
-        gr.num_of_placed_servers += 1
-
-        host_name = _best.get_resource_name(_group.level)
-        if host_name not in gr.num_of_placed_servers_of_host.keys():
-            gr.num_of_placed_servers_of_host[host_name] = 0
-        gr.num_of_placed_servers_of_host[host_name] += 1
+        self._add_placed_server(gr, _best.get_resource_name(_group.level))
 
         chosen_host = self.avail_hosts[_best.host_name]
         if _group.level == "host":
-            if _group.vid not in chosen_host.host_memberships.keys():
-                chosen_host.host_memberships[_group.vid] = gr
-            for _, np in self.avail_hosts.items():
-                if chosen_host.rack_name != "any" and np.rack_name == chosen_host.rack_name:
-                    if _group.vid not in np.rack_memberships.keys():
-                        np.rack_memberships[_group.vid] = gr
-        else:    # Rack level
-            for _, np in self.avail_hosts.items():
-                if chosen_host.rack_name != "any" and np.rack_name == chosen_host.rack_name:
-                    if _group.vid not in np.rack_memberships.keys():
-                        np.rack_memberships[_group.vid] = gr
+            self._add_membership(chosen_host.host_memberships, gr)
+        self._add_rack_membership(chosen_host, gr)
 
     def _add_group(self, _level, _best, _group):
         """Add new valet group."""
@@ -459,33 +524,38 @@ class Search(object):
             gr.group_type = _group.group_type
             gr.factory = _group.factory
             gr.level = _group.level
-            self.avail_groups[gr.name] = gr
+            self.journal.set_item(self.avail_groups, gr.name, gr)
 
             self.logger.info("find " + _group.group_type + " (" + _group.vid + ")")
         else:
             gr = self.avail_groups[_group.vid]
 
         if _group.level == _level:
-            gr.num_of_placed_servers += 1
-
-            host_name = _best.get_resource_name(_level)
-            if host_name not in gr.num_of_placed_servers_of_host.keys():
-                gr.num_of_placed_servers_of_host[host_name] = 0
-            gr.num_of_placed_servers_of_host[host_name] += 1
+            self._add_placed_server(gr, _best.get_resource_name(_level))
 
             chosen_host = self.avail_hosts[_best.host_name]
             if _level == "host":
-                if _group.vid not in chosen_host.host_memberships.keys():
-                    chosen_host.host_memberships[_group.vid] = gr
-                for _, np in self.avail_hosts.items():
-                    if chosen_host.rack_name != "any" and np.rack_name == chosen_host.rack_name:
-                        if _group.vid not in np.rack_memberships.keys():
-                            np.rack_memberships[_group.vid] = gr
-            else:    # Rack level
-                for _, np in self.avail_hosts.items():
-                    if chosen_host.rack_name != "any" and np.rack_name == chosen_host.rack_name:
-                        if _group.vid not in np.rack_memberships.keys():
-                            np.rack_memberships[_group.vid] = gr
+                self._add_membership(chosen_host.host_memberships, gr)
+            self._add_rack_membership(chosen_host, gr)
+
+    def _add_placed_server(self, _gr, _host_name):
+        """Count a server placed in the group and host (or rack)."""
+
+        self.journal.set_attr(_gr, "num_of_placed_servers", _gr.num_of_placed_servers + 1)
+
+        num_of_servers = _gr.num_of_placed_servers_of_host.get(_host_name, 0)
+        self.journal.set_item(_gr.num_of_placed_servers_of_host, _host_name, num_of_servers + 1)
+
+    def _add_membership(self, _memberships, _gr):
+        if _gr.name not in _memberships.keys():
+            self.journal.set_item(_memberships, _gr.name, _gr)
+
+    def _add_rack_membership(self, _chosen_host, _gr):
+        """Add group into the rack memberships of all hosts in the same rack."""
+
+        if _chosen_host.rack_name != "any":
+            for np in _chosen_host.rack_hosts:
+                self._add_membership(np.rack_memberships, _gr)
 
     def _deduct_server_resources(self, _best, _n):
         """Apply the reduced amount of resources to the chosen host.
@@ -495,9 +565,15 @@ class Search(object):
 
         chosen_host = self.avail_hosts[_best.host_name]
 
-        chosen_host.host_avail_vCPUs -= _n.vCPUs
-        chosen_host.host_avail_mem -= _n.mem
-        chosen_host.host_avail_local_disk -= _n.local_volume_size
+        # Undone last, once all others are reverted.
+        if self.capacity_index is not None:
+            self.journal.add_undo(self.capacity_index.refresh, chosen_host.host_name)
+        self.journal.add_undo(self._rollback_host_type, chosen_host, _n)
+
+        self.journal.set_attr(chosen_host, "host_avail_vCPUs", chosen_host.host_avail_vCPUs - _n.vCPUs)
+        self.journal.set_attr(chosen_host, "host_avail_mem", chosen_host.host_avail_mem - _n.mem)
+        self.journal.set_attr(chosen_host, "host_avail_local_disk",
+                              chosen_host.host_avail_local_disk - _n.local_volume_size)
 
         # Apply placement decision into NUMA
         if _n.need_numa_alignment():
@@ -510,6 +586,7 @@ class Search(object):
             s_info["mem"] = _n.mem
 
             chosen_host.NUMA.deduct_server_resources(s_info)
+            self.journal.add_undo(chosen_host.NUMA.rollback_server_resources, s_info)
 
         # TODO: need non_NUMA server?
         # else:
@@ -517,24 +594,53 @@ class Search(object):
         #     chosen_host.NUMA.apply_mem_fairly(_n.mem)
 
         if chosen_host.host_num_of_placed_servers == 0:
-            self.num_of_hosts += 1
+            self.journal.set_attr(self, "num_of_hosts", self.num_of_hosts + 1)
+
+        self.journal.set_attr(chosen_host, "host_num_of_placed_servers",
+                              chosen_host.host_num_of_placed_servers + 1)
+
+        if chosen_host.rack_name != "any":
+            for np in chosen_host.rack_hosts:
+                self.journal.set_attr(np, "rack_avail_vCPUs", np.rack_avail_vCPUs - _n.vCPUs)
+                self.journal.set_attr(np, "rack_avail_mem", np.rack_avail_mem - _n.mem)
+                self.journal.set_attr(np, "rack_avail_local_disk",
+                                      np.rack_avail_local_disk - _n.local_volume_size)
 
-        chosen_host.host_num_of_placed_servers += 1
+                self.journal.set_attr(np, "rack_num_of_placed_servers", np.rack_num_of_placed_servers + 1)
 
-        for _, np in self.avail_hosts.items():
-            if chosen_host.rack_name != "any" and np.rack_name == chosen_host.rack_name:
-                np.rack_avail_vCPUs -= _n.vCPUs
-                np.rack_avail_mem -= _n.mem
-                np.rack_avail_local_disk -= _n.local_volume_size
+        if self.capacity_index is not None:
+            self.capacity_index.refresh(chosen_host.host_name)
 
-                np.rack_num_of_placed_servers += 1
+    def _rollback_host_type(self, _chosen_host, _v):
+        """Return the host to unknown host type if it has no more servers.
+
+        The host type was determined by DynamicAggregateFilter.
+        """
+
+        if _chosen_host.host_num_of_placed_servers > 0:
+            return
+
+        if _chosen_host.old_candidate_host_types is not None and len(_chosen_host.old_candidate_host_types) > 0:
+            flavor_type_list = _v.get_flavor_types()
+            ha = self.avail_groups[flavor_type_list[0]]
+
+            _chosen_host.rollback_avail_resources(ha)
+            _chosen_host.candidate_host_types = _chosen_host.old_candidate_host_types
+            _chosen_host.old_candidate_host_types = {}
+
+            for hr in _chosen_host.rack_hosts:
+                if hr is not _chosen_host:
+                    hr.rollback_avail_rack_resources(ha,
+                                                     _chosen_host.rack_avail_vCPUs,
+                                                     _chosen_host.rack_avail_mem,
+                                                     _chosen_host.rack_avail_local_disk)
 
     def _close_node_placement(self, _level, _best, _v):
         """Record the final placement decision."""
 
         if _v not in self.node_placements.keys() and _v not in self.prior_placements.keys():
             if _level == "host" or isinstance(_v, Group):
-                self.node_placements[_v] = _best
+                self.journal.set_item(self.node_placements, _v, _best)
 
     def _close_prior_placement(self, _level, _best, _v):
         """Set the decision for placed server or group."""
@@ -542,167 +648,3 @@ class Search(object):
         if _v not in self.prior_placements.keys():
             if _level == "host" or isinstance(_v, Group):
                 self.prior_placements[_v] = _best
-
-    def _rollback_resources(self, _v):
-        """Rollback the placement."""
-
-        if isinstance(_v, Server):
-            self._rollback_server_resources(_v)
-        elif isinstance(_v, Group):
-            for _, v in _v.subgroups.items():
-                self._rollback_resources(v)
-
-        if _v in self.node_placements.keys():
-            chosen_host = self.avail_hosts[self.node_placements[_v].host_name]
-            level = self.node_placements[_v].level
-
-            if isinstance(_v, Group):
-                self._remove_group(chosen_host, _v, level)
-
-            exclusivities = _v.get_exclusivities(level)
-            if len(exclusivities) == 1:
-                ex_group = exclusivities[exclusivities.keys()[0]]
-                self._remove_exclusivity(chosen_host, ex_group)
-
-            if len(_v.diversity_groups) > 0:
-                for _, div_group in _v.diversity_groups.items():
-                    self._remove_group(chosen_host, div_group, level)
-
-            if len(_v.quorum_diversity_groups) > 0:
-                for _, div_group in _v.quorum_diversity_groups.items():
-                    self._remove_group(chosen_host, div_group, level)
-
-    def _remove_exclusivity(self, _chosen_host, _group):
-        """Remove the exclusivity group."""
-
-        gr = self.avail_groups[_group.vid]
-
-        host_name = _chosen_host.get_resource_name(_group.level)
-
-        gr.num_of_placed_servers -= 1
-        gr.num_of_placed_servers_of_host[host_name] -= 1
-
-        if gr.num_of_placed_servers_of_host[host_name] == 0:
-            del gr.num_of_placed_servers_of_host[host_name]
-
-        if gr.num_of_placed_servers == 0:
-            del self.avail_groups[_group.vid]
-
-        if _group.level == "host":
-            if _chosen_host.host_num_of_placed_servers == 0 and \
-               _group.vid in _chosen_host.host_memberships.keys():
-                del _chosen_host.host_memberships[_group.vid]
-
-                for _, np in self.avail_hosts.items():
-                    if _chosen_host.rack_name != "any" and np.rack_name == _chosen_host.rack_name:
-                        if _group.vid in np.rack_memberships.keys():
-                            del np.rack_memberships[_group.vid]
-        else:    # Rack level
-            if _chosen_host.rack_num_of_placed_servers == 0:
-                for _, np in self.avail_hosts.items():
-                    if _chosen_host.rack_name != "any" and np.rack_name == _chosen_host.rack_name:
-                        if _group.vid in np.rack_memberships.keys():
-                            del np.rack_memberships[_group.vid]
-
-    def _remove_group(self, _chosen_host, _group, _level):
-        """Remove valet group."""
-
-        if _group.level == _level:
-            gr = self.avail_groups[_group.vid]
-
-            host_name = _chosen_host.get_resource_name(_level)
-
-            gr.num_of_placed_servers -= 1
-            gr.num_of_placed_servers_of_host[host_name] -= 1
-
-            if gr.num_of_placed_servers_of_host[host_name] == 0:
-                del gr.num_of_placed_servers_of_host[host_name]
-
-            if gr.num_of_placed_servers == 0:
-                del self.avail_groups[_group.vid]
-
-            exist_group = True
-            if _group.vid not in self.avail_groups.keys():
-                exist_group = False
-            else:
-                if host_name not in gr.num_of_placed_servers_of_host.keys():
-                    exist_group = False
-
-            if _level == "host":
-                if not exist_group and _group.vid in _chosen_host.host_memberships.keys():
-                    del _chosen_host.host_memberships[_group.vid]
-
-                    for _, np in self.avail_hosts.items():
-                        if _chosen_host.rack_name != "any" and np.rack_name == _chosen_host.rack_name:
-                            if _group.vid in np.rack_memberships.keys():
-                                del np.rack_memberships[_group.vid]
-            else:    # Rack level
-                if not exist_group:
-                    for _, np in self.avail_hosts.items():
-                        if _chosen_host.rack_name != "any" and np.rack_name == _chosen_host.rack_name:
-                            if _group.vid in np.rack_memberships.keys():
-                                del np.rack_memberships[_group.vid]
-
-    def _rollback_server_resources(self, _v):
-        """Return back the amount of resources to host."""
-
-        if _v in self.node_placements.keys():
-            chosen_host = self.avail_hosts[self.node_placements[_v].host_name]
-
-            chosen_host.host_avail_vCPUs += _v.vCPUs
-            chosen_host.host_avail_mem += _v.mem
-            chosen_host.host_avail_local_disk += _v.local_volume_size
-
-            # Apply rollback into NUMA
-            if _v.need_numa_alignment():
-                s_info = {}
-                s_info["stack_id"] = "none"
-                s_info["stack_name"] = self.app.app_name
-                s_info["uuid"] = "none"
-                s_info["name"] = _v.name
-                s_info["vcpus"] = _v.vCPUs
-                s_info["mem"] = _v.mem
-
-                chosen_host.NUMA.rollback_server_resources(s_info)
-
-            chosen_host.host_num_of_placed_servers -= 1
-
-            if chosen_host.host_num_of_placed_servers == 0:
-                self.num_of_hosts -= 1
-
-            for _, np in self.avail_hosts.items():
-                if chosen_host.rack_name != "any" and np.rack_name == chosen_host.rack_name:
-                    np.rack_avail_vCPUs += _v.vCPUs
-                    np.rack_avail_mem += _v.mem
-                    np.rack_avail_local_disk += _v.local_volume_size
-
-                    np.rack_num_of_placed_servers -= 1
-
-            # If the chosen host was a new host and its host type was unknown,
-            # rollback to the original unknown state.
-            if chosen_host.host_num_of_placed_servers == 0:
-                if chosen_host.old_candidate_host_types is not None and len(chosen_host.old_candidate_host_types) > 0:
-                    flavor_type_list = _v.get_flavor_types()
-                    ha = self.avail_groups[flavor_type_list[0]]
-
-                    chosen_host.rollback_avail_resources(ha)
-                    chosen_host.candidate_host_types = copy.deepcopy(chosen_host.old_candidate_host_types)
-                    chosen_host.old_candidate_host_types.clear()
-
-                    for hrk, hr in self.avail_hosts.items():
-                        if hrk != chosen_host.host_name:
-                            if hr.rack_name == chosen_host.rack_name:
-                                hr.rollback_avail_rack_resources(ha,
-                                                                 chosen_host.rack_avail_vCPUs,
-                                                                 chosen_host.rack_avail_mem,
-                                                                 chosen_host.rack_avail_local_disk)
-
-    def _rollback_node_placement(self, _v):
-        """Remove placement decisions."""
-
-        if _v in self.node_placements.keys():
-            del self.node_placements[_v]
-
-        if isinstance(_v, Group):
-            for _, sg in _v.subgroups.items():
-                self._rollback_node_placement(sg)
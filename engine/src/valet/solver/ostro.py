@@ -19,10 +19,14 @@
 
 
 import json
+import threading
 import traceback
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 from valet.engine.db_connect.locks import *
+from valet.utils import codec
 
 
 # noinspection PyBroadException
@@ -30,9 +34,12 @@ class Ostro(object):
     """Main class for scheduling and query."""
 
     def __init__(self, _bootstrapper):
+        self.bootstrapper = _bootstrapper
+
         self.valet_id = _bootstrapper.valet_id
 
         self.dbh = _bootstrapper.dbh
+        self.intake = _bootstrapper.intake
 
         self.rh = _bootstrapper.rh
         self.ahandler = _bootstrapper.ah
@@ -44,14 +51,36 @@ class Ostro(object):
         # To lock valet-engine per datacenter.
         self.lock = _bootstrapper.lock
 
+        # Max number of datacenters handled in parallel.
+        self.num_of_workers = int(_bootstrapper.config["engine"].get("workers", 1))
+
+        # key = datacenter id (None for requests of no datacenter),
+        # value = Ostro with its own handlers
+        self.workers = {}
+        self.worker_tasks = {}
+
+        # Datacenter of each request to route its confirm or rollback,
+        # in least recently used order. Beyond the max, the datacenter
+        # is looked up in DB.
+        self.req_regions = OrderedDict()
+        self.max_req_regions = 5000
+
         self.end_of_process = False
 
+        # Set to stop the thread syncing resources with platform.
+        self.end_of_sync = threading.Event()
+
     def run_ostro(self):
         """Run main valet-engine loop."""
 
-        self.logger.info("*** start valet-engine main loop")
+        self._start_sync()
 
-        # TODO(Gueyoung): Run resource handler thread.
+        if self.num_of_workers > 1:
+            self._run_workers()
+            self.end_of_sync.set()
+            return
+
+        self.logger.info("*** start valet-engine main loop")
 
         try:
             # NOTE(Gueyoung): if DB causes any error, Valet-Engine exits.
@@ -61,23 +90,238 @@ class Ostro(object):
                 if not self.lock.set_regions():
                     break
 
-                request_list = self.dbh.get_requests()
+                request_list = self.intake.get_requests()
                 if len(request_list) > 0:
                     rc = self._handle_requests(request_list)
                     Logger.set_req_id(None)
                     if not rc:
                         break
 
-                time.sleep(1)
+                self.intake.wait(len(request_list) > 0)
         except KeyboardInterrupt:
             self.logger.error("keyboard interrupt")
         except Exception:
             self.logger.error(traceback.format_exc())
 
+        self.end_of_sync.set()
+
         self.lock.done_with_my_turn()
 
         self.logger.info("*** exit valet-engine")
 
+    def _start_sync(self):
+        """Run the thread syncing resident resources with platform periodically.
+
+        Only when requests may skip sync within the staleness bound.
+        """
+
+        if self.rh.sync_staleness <= 0 or not self.rh.batch_sync_interval:
+            return
+
+        sync_thread = threading.Thread(target=self._run_sync, name="sync")
+        sync_thread.daemon = True
+        sync_thread.start()
+
+    def _run_sync(self):
+        """Sync resident resources of all handlers (main and workers) with platform."""
+
+        interval = float(self.rh.batch_sync_interval)
+
+        self.logger.info("*** start syncing resources every " + str(interval) + " sec")
+
+        # Own lock, since requests are handled with the main lock at the same time.
+        lock = Locks(self.dbh, self.bootstrapper.config["engine"]["timeout"])
+
+        try:
+            while not self.end_of_sync.wait(interval):
+                handlers = [self.rh]
+                for worker in list(self.workers.values()):
+                    handlers.append(worker.rh)
+
+                for rh in handlers:
+                    if not rh.sync_resources(lock):
+                        self.logger.error("DB error while syncing resources")
+                        break
+
+                Logger.set_req_id(None)
+        except Exception:
+            self.logger.error(traceback.format_exc())
+
+        lock.done_with_my_turn()
+
+        self.logger.info("*** stop syncing resources")
+
+    def _run_workers(self):
+        """Run main loop handling datacenters in parallel.
+
+        Requests of a datacenter are handled in order by one worker at a time.
+        Requests of no datacenter are handled alone (see _partition_requests).
+        """
+
+        self.logger.info("*** start valet-engine main loop with " + str(self.num_of_workers) + " workers")
+
+        pool = ThreadPoolExecutor(max_workers=self.num_of_workers)
+
+        try:
+            while self.end_of_process is False:
+
+                # Check workers before reading requests, so that
+                # requests handled by a finished worker are not read again.
+                busy_regions = self._check_workers()
+                if busy_regions is None:
+                    break
+
+                if not self.lock.set_regions():
+                    break
+
+                dispatched = False
+
+                request_list = self.intake.get_requests()
+                for (region, req_list) in self._partition_requests(request_list):
+                    if region in busy_regions or None in busy_regions:
+                        continue
+
+                    if region is None and len(busy_regions) > 0:
+                        continue
+
+                    worker = self._get_worker(region)
+                    worker.lock.locked_regions = list(self.lock.locked_regions)
+
+                    task = pool.submit(self._run_worker, worker, req_list)
+                    self.worker_tasks[region] = task
+                    dispatched = True
+
+                    # Wake up to dispatch requests waiting for this worker.
+                    task.add_done_callback(lambda _: self.intake.notify())
+
+                # Requests of busy datacenters do not shorten the wait,
+                # since they are dispatched when the worker is done.
+                self.intake.wait(dispatched)
+        except KeyboardInterrupt:
+            self.logger.error("keyboard interrupt")
+        except Exception:
+            self.logger.error(traceback.format_exc())
+
+        self.end_of_process = True
+        pool.shutdown(wait=True)
+
+        for _, worker in self.workers.items():
+            worker.lock.done_with_my_turn()
+
+        self.logger.info("*** exit valet-engine")
+
+    def _check_workers(self):
+        """Return datacenters being handled or None if any worker failed."""
+
+        busy_regions = []
+
+        for region in list(self.worker_tasks.keys()):
+            task = self.worker_tasks[region]
+
+            if not task.done():
+                busy_regions.append(region)
+                continue
+
+            del self.worker_tasks[region]
+
+            if not task.result():
+                self.logger.error("worker for datacenter (" + str(region) + ") failed")
+                return None
+
+        return busy_regions
+
+    def _run_worker(self, _worker, _req_list):
+        """Handle requests of a datacenter in a worker thread."""
+
+        try:
+            rc = _worker._handle_requests(_req_list)
+        except Exception:
+            self.logger.error(traceback.format_exc())
+            _worker.lock.done_with_my_turn()
+            rc = False
+
+        Logger.set_req_id(None)
+
+        return rc
+
+    def _get_worker(self, _region):
+        """Get the worker for the datacenter."""
+
+        if _region not in self.workers.keys():
+            self.workers[_region] = Ostro(self.bootstrapper.clone())
+
+        return self.workers[_region]
+
+    def _partition_requests(self, _req_list):
+        """Split requests by datacenter, keeping the order within each.
+
+        Requests of no datacenter (e.g., group rule changes) may affect
+        any datacenter. So, split only the requests before the first of
+        them or, if the list begins with them, only these requests.
+        The rest is read again and split once these are handled.
+        """
+
+        partitions = []
+        index = {}
+
+        for req in _req_list:
+            region = self._get_region(req)
+
+            if (region is None) != (None in index.keys()):
+                if len(partitions) > 0:
+                    break
+
+            if region not in index.keys():
+                index[region] = len(partitions)
+                partitions.append((region, []))
+
+            partitions[index[region]][1].append(req)
+
+        return partitions
+
+    def _get_region(self, _req):
+        """Get the datacenter of the request, or None if it has not."""
+
+        req_id_elements = _req["request_id"].split("-", 1)
+        opt = req_id_elements[0]
+        req_id = req_id_elements[-1]
+
+        try:
+            req_body = codec.loads(_req["request"])
+        except ValueError:
+            return None
+
+        if not isinstance(req_body, dict):
+            return None
+
+        if opt in ("create", "delete", "update"):
+            dc = req_body.get("datacenter")
+            if isinstance(dc, dict) and dc.get("id") is not None:
+                self.req_regions[req_id] = dc["id"].strip()
+                self.req_regions.move_to_end(req_id)
+                if len(self.req_regions) > self.max_req_regions:
+                    self.req_regions.popitem(last=False)
+
+                return self.req_regions[req_id]
+
+        elif opt in ("confirm", "rollback"):
+            if req_id in self.req_regions.keys():
+                self.req_regions.move_to_end(req_id)
+                return self.req_regions[req_id]
+
+            # Look for the datacenter of the prior request.
+            stack_id_map = self.dbh.get_stack_id_map(req_id)
+            if stack_id_map is not None and len(stack_id_map) > 0:
+                stack = self.dbh.get_stack(stack_id_map.get("stack_id"))
+                if stack is not None and len(stack) > 0:
+                    return stack.get("datacenter")
+
+        elif opt == "group_query":
+            if req_body.get("name") and req_body.get("datacenter_id"):
+                return req_body.get("datacenter_id")
+
+        return None
+
     def plan(self):
         """Handle planning requests.
 
@@ -114,17 +358,22 @@ class Ostro(object):
             Logger.set_req_id(req_id)
             begin_time = datetime.now()
 
-            req_body = json.loads(req["request"])
+            req_body = codec.loads(req["request"])
 
             self.logger.debug("input request_type = " + opt)
-            self.logger.debug("request = " + json.dumps(req_body, indent=4))
+
+            # Dump request and result only if enabled, since they can be large.
+            log_payload = self.logger.is_payload_enabled()
+            if log_payload:
+                self.logger.debug("request = " + json.dumps(req_body, indent=4))
 
             # Check if the same request with prior request.
             (status, result) = self.ahandler.check_history(req["request_id"])
 
             if result is None:
                 if opt in ("create", "delete", "update", "confirm", "rollback"):
-                    app = self._handle_app(opt, req_id, req_body)
+                    with self.rh.resource_lock:
+                        app = self._handle_app(opt, req_id, req_body)
 
                     if app is None:
                         errstr = "valet-engine exits due to " + opt + " error"
@@ -143,7 +392,8 @@ class Ostro(object):
                 elif opt in ("group_query", "group_create"):
                     # TODO(Gueyoung): group_delete and group_update
 
-                    (status, result) = self._handle_rule(opt, req_body)
+                    with self.rh.resource_lock:
+                        (status, result) = self._handle_rule(opt, req_body)
 
                     if result is None:
                         errstr = "valet-engine exits due to " + opt + " error"
@@ -185,8 +435,9 @@ class Ostro(object):
             if not self.dbh.return_request(req["request_id"], status, result):
                 return False
 
-            self.logger.debug("output status = " + json.dumps(status, indent=4))
-            self.logger.debug("       result = " + json.dumps(result, indent=4))
+            if log_payload:
+                self.logger.debug("output status = " + json.dumps(status, indent=4))
+                self.logger.debug("       result = " + json.dumps(result, indent=4))
 
             Logger.get_logger('audit').info("done request = " + req["request_id"], beginTimestamp=begin_time, elapsedTime=datetime.now() - begin_time)
             self.logger.info("done request = " + req["request_id"] + ' ----')
@@ -247,8 +498,9 @@ class Ostro(object):
 
             resource = self.rh.resource_list[0]
 
-            # Sync rsource status with platform (OpenStack Nova).
-            if not resource.sync_with_platform():
+            # Sync rsource status with platform (OpenStack Nova),
+            # unless synced within the staleness bound.
+            if not self.rh.sync_resource(resource):
                 self.logger.error("fail to sync resource status")
                 app.status = "fail to sync resource status"
                 return app
@@ -287,7 +539,7 @@ class Ostro(object):
             resource = self.rh.resource_list[0]
 
             # Sync rsource status with platform
-            if not resource.sync_with_platform():
+            if not self.rh.sync_resource(resource):
                 self.logger.error("fail to sync resource status")
                 app.status = "fail to sync resource status"
                 return app
@@ -339,14 +591,23 @@ class Ostro(object):
             app.status = "timeout"
             return app
 
-        # Store app info into DB.
+        # Store app info and resource into DB.
+        # Their writes are independent, so applied at once.
+        self.dbh.begin_batch()
+
         if not self.ahandler.store_app(app):
+            self.dbh.submit_batch()
             return None
-        self.logger.info("requested app(" + app.app_name + ") is stored")
 
-        # Store resource into DB.
         if not resource.store_resource(opt=_opt, req_id=_req_id):
+            self.dbh.submit_batch()
             return None
+
+        if not self.dbh.submit_batch():
+            # Not reused, since not stored as it is.
+            resource.stored = False
+            return None
+        self.logger.info("requested app(" + app.app_name + ") is stored")
         self.logger.info("resource status(" + resource.datacenter_id + ") is stored")
 
         # TODO(Gueyoung): if timeout happened at this moment,
@@ -432,7 +693,7 @@ class Ostro(object):
                 resource = self.rh.resource_list[0]
 
                 # Sync rsource status with platform
-                if not resource.sync_with_platform():
+                if not self.rh.sync_resource(resource):
                     status["status"] = "failed"
                     status["message"] = "Platform delay"
                     return status, {}
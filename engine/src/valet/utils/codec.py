@@ -0,0 +1,117 @@
+#
+# -------------------------------------------------------------------------
+#   Copyright (c) 2019 AT&T Intellectual Property
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# -------------------------------------------------------------------------
+#
+
+
+"""Encode and decode blobs stored in DB.
+
+Use the fastest JSON library installed (orjson, ujson), otherwise the
+standard json. All produce the same JSON content, so blobs written by one
+are read by the others.
+"""
+
+import base64
+import json
+
+from collections import OrderedDict
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+# Binary resource encoding stored as text, i.e., prefix + version + ':' + base64.
+# Bump the version whenever the layout is changed.
+MSGPACK_PREFIX = "msgpack:"
+MSGPACK_VERSION = 1
+
+
+def _orjson_dumps(_obj):
+    # As json does, keys such as numbers are stored as strings.
+    return orjson.dumps(_obj, option=orjson.OPT_NON_STR_KEYS).decode("utf-8")
+
+
+# key = library name, value = (dumps, loads), fastest first
+JSON_BACKENDS = OrderedDict()
+if orjson is not None:
+    JSON_BACKENDS["orjson"] = (_orjson_dumps, orjson.loads)
+if ujson is not None:
+    JSON_BACKENDS["ujson"] = (ujson.dumps, ujson.loads)
+JSON_BACKENDS["json"] = (json.dumps, json.loads)
+
+backend = list(JSON_BACKENDS)[0]
+_dumps, _loads = JSON_BACKENDS[backend]
+
+
+def dumps(_obj):
+    """Encode as JSON string."""
+
+    return _dumps(_obj)
+
+
+def loads(_s):
+    """Decode JSON string."""
+
+    return _loads(_s)
+
+
+def is_msgpack_supported():
+    """Check if the binary encoding is installed."""
+
+    return msgpack is not None
+
+
+def encode_resource(_resource, _encoding="json"):
+    """Encode resource blob as 'json' or 'msgpack'.
+
+    Fall back to JSON if msgpack is not installed.
+    """
+
+    if _encoding == "msgpack" and msgpack is not None:
+        packed = msgpack.packb(_resource, use_bin_type=True)
+        return MSGPACK_PREFIX + str(MSGPACK_VERSION) + ":" + \
+            base64.b64encode(packed).decode("ascii")
+
+    return _dumps(_resource)
+
+
+def decode_resource(_s):
+    """Decode resource blob of any encoding."""
+
+    if not _s.startswith(MSGPACK_PREFIX):
+        return _loads(_s)
+
+    (version, packed) = _s[len(MSGPACK_PREFIX):].split(":", 1)
+
+    if msgpack is None:
+        raise ValueError("msgpack not installed to decode resource")
+    if int(version) != MSGPACK_VERSION:
+        raise ValueError("unknown resource encoding version = " + version)
+
+    return msgpack.unpackb(base64.b64decode(packed), raw=False, strict_map_key=False)
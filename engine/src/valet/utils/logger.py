@@ -23,12 +23,26 @@ from valet.utils.logger import Logger
         Logger.get_logger('metric').info('bootstrap STUFF')
 """
 
+import atexit
 import json
 import logging
+import random
 import socket
+import threading
 from datetime import datetime
 from logging.handlers import RotatingFileHandler
 
+try:
+    import queue
+    from logging.handlers import QueueHandler, QueueListener
+except ImportError:
+    # Python 2, where log files are written by the logging threads
+    queue = None
+
+
+LEVELS = {"debug": logging.DEBUG, "info": logging.INFO,
+          "warning": logging.WARNING, "error": logging.ERROR}
+
 
 class Logger(object):
     logs = None
@@ -38,6 +52,7 @@ class Logger(object):
             Logger.logs = {"console": Console()}
 
         if Logger.logs is None:
+            EcompLogger.set_writer(_config)
             Logger.logs = {"audit": Audit(_config), "metric": Metric(_config), "debug": Debug(_config)}
             Logger.logs["error"] = Error(_config, Logger.logs["debug"])
             if console:
@@ -59,17 +74,42 @@ class EcompLogger(object):
     _size    = 10000000
     datefmt = '%d/%m/%Y %H:%M:%S'
 
-    _requestID = None
+    # Request id per thread, since requests of datacenters can be handled in parallel.
+    _requestID = threading.local()
+
+    # Thread writing log files, None if written by the logging thread
+    _writer = None
 
     def __init__(self):
         self.fh = None
         self.logger = None
 
+    @classmethod
+    def set_writer(cls, _config):
+        """Write log files off the logging threads if queue is configured."""
+
+        if _config.get("queue", "false") != "true" or EcompLogger._writer is not None:
+            return
+
+        # Queue handlers are not in Python 2.
+        if queue is None:
+            return
+
+        EcompLogger._writer = LogWriter(queue.Queue(-1))
+        EcompLogger._writer.start()
+        atexit.register(EcompLogger._writer.stop)
+
     def set_fh(self, name, fmt, _config, lvl=_lvl, size=_size):
         logfile = _config.get("path") + name + ".log"
-        self.fh = RotatingFileHandler(logfile, mode='a', maxBytes=size, backupCount=2, encoding=None, delay=0)
-        self.fh.setLevel(lvl)
-        self.fh.setFormatter(fmt)
+        fh = RotatingFileHandler(logfile, mode='a', maxBytes=size, backupCount=2, encoding=None, delay=0)
+        fh.setLevel(lvl)
+        fh.setFormatter(fmt)
+
+        if EcompLogger._writer is not None:
+            # Filters are run by the logging thread, i.e., added to the queued handler.
+            self.fh = QueuedHandler(EcompLogger._writer.queue, fh)
+        else:
+            self.fh = fh
 
         self.logger = logging.getLogger(name)
         self.logger.addHandler(self.fh)
@@ -79,10 +119,10 @@ class EcompLogger(object):
         self.fh.addFilter(fltr())
 
     @classmethod
-    def get_request_id(cls): return EcompLogger._requestID
+    def get_request_id(cls): return getattr(EcompLogger._requestID, "value", None)
 
     @classmethod
-    def _set_request_id(cls, uuid): EcompLogger._requestID = uuid
+    def _set_request_id(cls, uuid): EcompLogger._requestID.value = uuid
         
     @staticmethod
     def format_str(fmt, sep="|"):
@@ -90,6 +130,31 @@ class EcompLogger(object):
         return fmt.replace('%(asctime)s', '%(asctime)s.%(msecs)03d')
 
 
+if queue is not None:
+    class QueuedHandler(QueueHandler):
+        """Filter and format records in the logging thread, then queue them
+        to be written into the file by LogWriter.
+        """
+
+        def __init__(self, _queue, _handler):
+            QueueHandler.__init__(self, _queue)
+            self.handler = _handler
+            self.setLevel(_handler.level)
+
+        def enqueue(self, record):
+            self.queue.put_nowait((self.handler, record))
+
+    class LogWriter(QueueListener):
+        """Thread writing queued records, each into its own handler."""
+
+        def __init__(self, _queue):
+            QueueListener.__init__(self, _queue)
+
+        def handle(self, item):
+            (handler, record) = item
+            handler.handle(record)
+
+
 class LoggerFilter(logging.Filter):
     def filter(self, record):
         record.requestId = EcompLogger.get_request_id() or ''
@@ -255,7 +320,13 @@ class Debug(EcompLogger):
     def __init__(self, _config):
         EcompLogger.__init__(self)
         fmt = logging.Formatter(self.format_str(Debug.fmt) + '^', EcompLogger.datefmt)
-        self.set_fh("debug", fmt, _config, lvl=logging.DEBUG)
+        lvl = LEVELS.get(_config.get("level", "debug"), logging.DEBUG)
+        self.set_fh("debug", fmt, _config, lvl=lvl)
+
+        # So that messages below the level are not even formatted.
+        self.logger.setLevel(lvl)
+
+        DebugAdapter.payload_rate = float(_config.get("payload_sample_rate", 1.0))
 
         self.adapter = DebugAdapter(self.logger, Debug.instantiation)
 
@@ -266,6 +337,20 @@ class DebugAdapter(logging.LoggerAdapter):
     _errorCode = ''
     _errorDescription = ''
 
+    # Ratio of payload dumps (e.g., whole resource) logged at debug level
+    payload_rate = 1.0
+
+    def is_payload_enabled(self):
+        """Check if a large payload is to be dumped into the debug log.
+
+        Callers skip building the payload otherwise.
+        """
+
+        if not self.isEnabledFor(logging.DEBUG):
+            return False
+
+        return DebugAdapter.payload_rate >= 1.0 or random.random() < DebugAdapter.payload_rate
+
     def process(self, msg, kwargs):
         DebugAdapter._targetEntity = kwargs.pop('targetEntity', self.extra['targetEntity'])
         DebugAdapter._targetServiceName = kwargs.pop('targetServiceName', self.extra['targetServiceName'])
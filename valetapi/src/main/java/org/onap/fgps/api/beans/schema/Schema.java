@@ -170,6 +170,33 @@ public class Schema {
 		jsonRequest.put("fields", fields);
 		return jsonRequest.toJSONString();
 	}
+	@SuppressWarnings("unchecked")
+	public static String getResourceVersionsTableSchema() {
+		JSONObject fields = new JSONObject();
+
+		fields.put("id", "varchar");
+		fields.put("requests", "varchar");
+		fields.put("timestamp", "varchar");
+		fields.put("PRIMARY KEY", "(id)");
+
+		JSONObject jsonRequest = getCommonTableSchema();
+		jsonRequest.put("fields", fields);
+		return jsonRequest.toJSONString();
+	}
+	@SuppressWarnings("unchecked")
+	public static String getResourcePatchesTableSchema() {
+		JSONObject fields = new JSONObject();
+
+		fields.put("id", "varchar");
+		fields.put("resource", "varchar");
+		fields.put("timestamp", "varchar");
+		fields.put("PRIMARY KEY", "(id)");
+
+		JSONObject jsonRequest = getCommonTableSchema();
+		jsonRequest.put("fields", fields);
+		return jsonRequest.toJSONString();
+	}
+
 	@SuppressWarnings("unchecked")
 	public static String getRegionsTableSchema() {
 		JSONObject fields = new JSONObject();
@@ -204,6 +231,7 @@ public class Schema {
 		fields.put("server_list", "varchar");
 		fields.put("member_hosts", "varchar");
 		fields.put("status", "varchar");
+		fields.put("datacenter_id", "varchar");
 		
 
 		JSONObject jsonRequest = getCommonTableSchema();
@@ -96,8 +96,11 @@ public class SchemaDAO {
 		createTable(keyspace, Constants.TABLE_STACKS, Schema.getStacksTableSchema());
 		createTable(keyspace, Constants.TABLE_STACKS_ID_MAP, Schema.getStacksIdMapTableSchema());
 		createTable(keyspace, Constants.TABLE_RESOURCES, Schema.getResourcesTableSchema());
+		createTable(keyspace, Constants.TABLE_RESOURCE_VERSIONS, Schema.getResourceVersionsTableSchema());
+		createTable(keyspace, Constants.TABLE_RESOURCE_PATCHES, Schema.getResourcePatchesTableSchema());
 		createTable(keyspace, Constants.TABLE_REGIONS, Schema.getRegionsTableSchema());
 		createTable(keyspace, Constants.TABLE_Groups, Schema.getGroupsTableSchema());
+		createIndex(keyspace, Constants.TABLE_Groups, "datacenter_id");
 
 
 		System.out.println("Tables created");
@@ -174,4 +177,16 @@ public class SchemaDAO {
 
 		return dbProxy.post(uri.format(data), jsonRequest);
 	}
+
+	public String createIndex(String keySpaceName, String tableName, String fieldName) {
+	    LOGGER.info(EELFLoggerDelegate.applicationLogger,"SchemaDAO : createIndex called");
+
+		MessageFormat uri = new MessageFormat(MusicDBConstants.INDEX);
+		Object data[] = { keySpaceName, tableName, fieldName };
+
+		DBProxy dbProxy = new DBProxy();
+		System.out.println(uri.format(data));
+
+		return dbProxy.post(uri.format(data), "");
+	}
 }
@@ -81,6 +81,8 @@ public class Constants {
 	public static final String TABLE_STACKS = "stacks";
 	public static final String TABLE_STACKS_ID_MAP = "stack_id_map";
 	public static final String TABLE_RESOURCES = "resources";
+	public static final String TABLE_RESOURCE_VERSIONS = "resource_versions";
+	public static final String TABLE_RESOURCE_PATCHES = "resource_patches";
 	public static final String TABLE_REGIONS = "regions";
 	public static final String TABLE_Groups = "groups";
 